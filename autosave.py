@@ -0,0 +1,720 @@
+# autosave.py - Journaling every edit of the workspaces to disk, so a crashed session can be recovered.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Every workspace with unsaved changes has a journal, a file of JSON lines which starts with what the document
+# was made from (nothing, a file it was opened from or saved to, or a snapshot) followed by every change since,
+# as the range it replaced and what is there now. A change is written as plain text when it is typed in the
+# format already there, and as a small .ptxt document otherwise, so writing costs as much as the change. Undo
+# and redo are recorded over a range widened around what Qt reports, which is at times less than they changed.
+# Changes too large to be worth recording and journals which grew too long are compacted into a new snapshot.
+#
+# The files are written on a worker thread. Each session keeps its journals in a folder of its own, locked
+# while it runs, so the folders of a session which crashed are the ones left unlocked when the next one starts.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+from PyQt6 import sip
+
+
+import base64
+import io
+import json
+import os
+import queue
+import shutil
+import uuid
+
+from document_loader import read_document
+from document_saver import write_atomically
+from ptxt_format import read_ptxt, write_ptxt
+from plain_workspace import is_plain_editor
+
+# Version of the journal files
+journal_version = 1
+
+# Changes spanning more characters than this are saved as a snapshot instead of a record
+snapshot_characters = 256 * 1024
+
+# Journals growing past this many bytes since their snapshot are compacted into a new one
+compact_journal_bytes = 4 * 1024 * 1024
+
+# Lock file of a running session, inside its folder
+lock_name = 'session.lock'
+
+# Characters which cannot be inserted as plain text, paragraph and frame borders and objects such as images
+structure_characters = ('\u2029', '\ufdd0', '\ufdd1', '\ufffc')
+
+
+# Folder the sessions keep their journals in
+def default_folder():
+    return os.path.join(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericDataLocation), 'PowerText', 'autosave')
+
+
+# What a change left in a range of a document: its text when inserting that text at the start of the range
+# gives the same formats, the range as a .ptxt document otherwise. Text inserted inside a block takes the
+# format of the character before it, which the change left as it was, at the start of a block it would take
+# the format of whatever follows
+def change_record(document, position, removed, added):
+    end = min(position + added, document.characterCount() - 1)
+
+    cursor = QTextCursor(document)
+    cursor.setPosition(position)
+    text_format = cursor.charFormat()
+    inside_block = not cursor.atBlockStart()
+    cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+    text = cursor.selectedText()
+
+    if (not added and inside_block) or (text and inside_block and not any(character in text for character in structure_characters) and is_plain(document, position, end, text_format)):
+        return {'p': position, 'r': removed, 't': text, 'n': document.characterCount()}
+
+    return range_record(document, position, removed, end)
+
+
+# Range an undo or redo changed, as its start, the characters it replaced and its end. Qt at times reports
+# less than it changed, a block short at the start and more at the end, so the range is taken from the block
+# before the reported one to the block after the reported range and its length once more. The length of the
+# document before the change tells what was replaced
+def undo_range(document, position, removed, added, characters):
+    count = document.characterCount()
+    reported = max(removed, 0) + added
+    added = max(added, removed + count - characters, count - characters)
+
+    first = document.findBlock(max(position - 1, 0))
+    last = document.findBlock(min(position + added + reported, count - 1))
+
+    if first.previous().isValid():
+        first = first.previous()
+    if last.next().isValid():
+        last = last.next()
+
+    start, end = first.position(), min(last.position() + last.length() - 1, count - 1)
+    return start, end - start + characters - count, end
+
+
+# What a change left in a range of a document as a .ptxt document. A fragment only carries the formats of the
+# blocks and frames it holds whole, along with the separator before them which holds the format of the first
+# block, so it is widened to them. Inside a table cell it is widened to the cell alone, whose first block has
+# no separator before it and gets its formats on replay
+def range_record(document, position, removed, end):
+    added = end - position
+    cell = cell_range(document, position, end)
+    start, end = cell or whole_range(document, position, end)
+
+    cursor = QTextCursor(document)
+    cursor.setPosition(start)
+    cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+    widened = (position - start) + max(end - position - added, 0)
+    first = document.findBlock(start) if cell or start == 0 else document.findBlock(start).next()
+
+    record = {'p': start, 'r': removed + widened, 'd': range_data(cursor), 'l': list_groups(document, first, end), 'n': document.characterCount()}
+
+    if cell:
+        record['c'] = 1
+    return record
+
+
+# The selection of a cursor written as a .ptxt document of its own, kept as text in the journal
+def range_data(cursor):
+    part = QTextDocument()
+    QTextCursor(part).insertFragment(cursor.selection())
+
+    # A selection starting at a block in a list brings that block along as a block of its own
+    if part.characterCount() > cursor.selectionEnd() - cursor.selectionStart() + 1:
+        separator = QTextCursor(part)
+        separator.movePosition(QTextCursor.MoveOperation.NextCharacter, QTextCursor.MoveMode.KeepAnchor)
+        separator.removeSelectedText()
+
+    copy_block(part.firstBlock(), cursor.document().findBlock(cursor.selectionStart()))
+
+    data = io.BytesIO()
+    write_ptxt(part, data, compress=False)
+    return base64.b64encode(data.getvalue()).decode('ascii')
+
+
+# Range of the whole blocks around a range and the separator before them, and of the whole tables and frames
+# it reaches into. A block right after a table has the end of the table before it, so the table is taken too
+def whole_range(document, start, end):
+    while True:
+        first = document.findBlock(start)
+        last = document.findBlock(end)
+        widened_start = outer_frame(document, first).firstPosition() - 1 if outer_frame(document, first) else first.position()
+        widened_end = outer_frame(document, last).lastPosition() + 1 if outer_frame(document, last) else last.position() + last.length() - 1
+
+        if (widened_start, widened_end) == (start, end):
+            if start == 0 or document.characterAt(start - 1) == '\u2029':
+                return max(start - 1, 0), end
+
+            widened_start -= 1
+
+        start, end = min(start, widened_start), max(end, widened_end)
+
+
+# Range of the contents of the table cell a range lies in, None when the range is not inside a single cell or
+# the cell holds frames of its own, which are taken whole with the table around them
+def cell_range(document, start, end):
+    cursor = QTextCursor(document)
+    cursor.setPosition(start)
+    table = cursor.currentTable()
+
+    if table is None:
+        return None
+
+    cell = table.cellAt(start)
+    cursor.setPosition(end)
+
+    if not cell.isValid() or cursor.currentTable() != table or table.cellAt(end) != cell:
+        return None
+
+    first, last = cell.firstCursorPosition().position(), cell.lastCursorPosition().position()
+    cursor.setPosition(first)
+    cursor.setPosition(last, QTextCursor.MoveMode.KeepAnchor)
+
+    if '\ufdd0' in cursor.selectedText() or '\ufdd1' in cursor.selectedText():
+        return None
+    return first, last
+
+
+# Frame inside the root frame which holds a block, None when the block is in the root frame itself
+def outer_frame(document, block):
+    frame = QTextCursor(block).currentFrame()
+
+    if frame == document.rootFrame():
+        return None
+
+    while frame.parentFrame() != document.rootFrame():
+        frame = frame.parentFrame()
+
+    return frame
+
+
+# Lists the blocks of a range are in, from its first whole block, as the positions of those blocks and of a
+# block of the same list outside the range if there is one. A fragment puts its blocks in lists of their own,
+# which the replay joins up again
+def list_groups(document, block, end):
+    groups = {}
+
+    while block.isValid() and block.position() <= end:
+        if block.textList() is not None:
+            groups.setdefault(block.textList().objectIndex(), (block.textList(), []))[1].append(block.position())
+        block = block.next()
+
+    listed = []
+
+    for text_list, positions in groups.values():
+        first = text_list.itemNumber(document.findBlock(positions[0]))
+        last = text_list.itemNumber(document.findBlock(positions[-1]))
+
+        if first > 0:
+            outside = text_list.item(first - 1).position()
+        elif last + 1 < text_list.count():
+            outside = text_list.item(last + 1).position()
+        else:
+            outside = None
+
+        if outside is not None or len(positions) > 1:
+            listed.append([outside, positions])
+
+    return listed
+
+
+# Whether all the text in a range has one format
+def is_plain(document, start, end, text_format):
+    block = document.findBlock(start)
+
+    while block.isValid() and block.position() <= end:
+        iterator = block.begin()
+
+        while not iterator.atEnd():
+            fragment = iterator.fragment()
+
+            if fragment.position() < end and fragment.position() + fragment.length() > start and fragment.charFormat() != text_format:
+                return False
+
+            iterator += 1
+
+        block = block.next()
+
+    return True
+
+
+# Applying a record to a document, what the range held is removed and what the change left is put in
+def apply_record(document, record):
+    # Removing a range which starts at an empty block gives that block the format of the last block removed,
+    # the block before a range is never part of the change so it keeps what it has now
+    kept = document.findBlock(record['p'])
+    kept_formats = kept.blockFormat(), kept.charFormat()
+    kept_list = kept.textList()
+    kept_list_format = kept_list.format() if kept_list is not None else None
+
+    cursor = QTextCursor(document)
+    cursor.setPosition(record['p'])
+    cursor.setPosition(min(record['p'] + record['r'], document.characterCount() - 1), QTextCursor.MoveMode.KeepAnchor)
+    cursor.removeSelectedText()
+
+    if 'd' in record:
+        part = QTextDocument()
+        read_ptxt(part, io.BytesIO(base64.b64decode(record['d'])))
+        expected = document.characterCount() + part.characterCount() - 1
+        cursor.insertFragment(QTextDocumentFragment(part))
+
+        # A fragment starting with a block in a list goes in as a block of its own, which is joined up again
+        if document.characterCount() > expected:
+            cursor.setPosition(record['p'])
+            cursor.movePosition(QTextCursor.MoveOperation.NextCharacter, QTextCursor.MoveMode.KeepAnchor)
+            cursor.removeSelectedText()
+
+        # The first block of the document or of a cell has no separator before it to carry its format
+        if record['p'] == 0 or record.get('c'):
+            copy_block(document.findBlock(record['p']), part.firstBlock())
+        else:
+            # A list left without blocks is gone, the block starts a new one like it
+            text_list = kept_list_format if kept_list is not None and sip.isdeleted(kept_list) else kept_list
+            set_block(document.findBlock(record['p']), *kept_formats, text_list)
+
+        for outside, positions in record['l']:
+            text_list = document.findBlock(positions[0] if outside is None else outside).textList()
+
+            for position in positions:
+                if text_list is not None and document.findBlock(position).textList() != text_list:
+                    text_list.add(document.findBlock(position))
+    elif record['t']:
+        cursor.insertText(record['t'])
+
+    # The length the document had after the change tells whether the replay went astray
+    if document.characterCount() != record['n']:
+        raise ValueError(f'The document differs from the journal at position {record["p"]}')
+
+
+# Giving a block the formats of a block of another document, in a list like the one that block is in
+def copy_block(block, source):
+    set_block(block, source.blockFormat(), source.charFormat(), source.textList().format() if source.textList() is not None else None)
+
+
+# Giving a block its formats and its list, which is a list of its document, the format of a new one or None
+def set_block(block, block_format, char_format, text_list):
+    block_format = QTextBlockFormat(block_format)
+    block_format.setObjectIndex(text_list.objectIndex() if isinstance(text_list, QTextList) else -1)
+
+    cursor = QTextCursor(block)
+    cursor.setBlockFormat(block_format)
+    cursor.setBlockCharFormat(char_format)
+
+    if isinstance(text_list, QTextListFormat):
+        cursor.createList(text_list)
+
+
+# Worker thread which writes the journals, appends are made durable together once the queue is empty
+class JournalWriter(QThread):
+    write_failed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super(JournalWriter, self).__init__(parent)
+
+        self.operations = queue.Queue()
+
+    def append(self, path, text):
+        self.operations.put(('append', path, text))
+
+    def write(self, path, data):
+        self.operations.put(('write', path, data))
+
+    def remove(self, paths):
+        self.operations.put(('remove', paths, None))
+
+    def finish_input(self):
+        self.operations.put(None)
+
+    def run(self):
+        done = False
+
+        while not done:
+            operations = [self.operations.get()]
+
+            while not self.operations.empty():
+                operations.append(self.operations.get())
+
+            appended = {}
+
+            for operation in operations:
+                if operation is None:
+                    done = True
+                    continue
+
+                kind, path, data = operation
+
+                try:
+                    if kind == 'append':
+                        if path not in appended:
+                            appended[path] = open(path, 'a', encoding='utf-8')
+                        appended[path].write(data)
+                    elif kind == 'write':
+                        if path in appended:
+                            appended.pop(path).close()
+                        write_atomically(path, data)
+                    else:
+                        for removed in path:
+                            if removed in appended:
+                                appended.pop(removed).close()
+                            if os.path.exists(removed):
+                                os.remove(removed)
+                except OSError as e:
+                    self.write_failed.emit(str(e))
+
+            for f in appended.values():
+                try:
+                    f.flush()
+                    os.fsync(f.fileno())
+                    f.close()
+                except OSError as e:
+                    self.write_failed.emit(str(e))
+
+
+# Journal of one editor, following whichever document the editor shows
+class Journal:
+    def __init__(self, editor, folder):
+        self.editor = editor
+        self.folder = folder
+        self.name = uuid.uuid4().hex
+        self.generation = 0
+        self.document = None
+        self.path = None
+        self.base = {'kind': 'empty'}
+        self.started = False
+        self.size = 0
+        self.changes = 0
+        self.saving = None
+        self.compacting = False
+        self.undo_steps = 0
+        self.redo_available = False
+        self.characters = 0
+
+    def journal_path(self, generation=None):
+        return os.path.join(self.folder, f'{self.name}.{self.generation if generation is None else generation}.journal')
+
+    def snapshot_path(self, generation=None):
+        return os.path.join(self.folder, f'{self.name}.{self.generation if generation is None else generation}.ptxt')
+
+    # Files of the current generation, those which were written
+    def files(self):
+        return [self.journal_path(), self.snapshot_path()]
+
+
+# Journals of the editors of a tab widget, for the session they are open in
+class AutosaveManager(QObject):
+    write_failed = pyqtSignal(str)
+
+    def __init__(self, tabs, folder=None, parent=None):
+        super(AutosaveManager, self).__init__(parent)
+
+        self.tabs = tabs
+        self.root = folder or default_folder()
+        self.folder = os.path.join(self.root, uuid.uuid4().hex)
+        os.makedirs(self.folder, exist_ok=True)
+
+        # Locked until the session closes, a crashed session leaves it for the next one to find
+        self.lock = QLockFile(os.path.join(self.folder, lock_name))
+        self.lock.lock()
+
+        self.journals = {}
+
+        # What is kept of a hibernated workspace, its editor shows an empty stand-in which is not journaled
+        self.hibernated = lambda editor: None
+
+        self.writer = JournalWriter(self)
+        self.writer.write_failed.connect(self.write_failed)
+        self.writer.start()
+
+    # Journaling an editor whose document is empty
+    def track(self, editor):
+        self.journals[editor] = Journal(editor, self.folder)
+        self.attach(self.journals[editor])
+
+    # Following a document the editor was handed, which holds what it held before
+    def attach(self, journal):
+        journal.document = journal.editor.document()
+        journal.undo_steps = journal.document.availableUndoSteps()
+        journal.redo_available = journal.document.isRedoAvailable()
+        journal.characters = journal.document.characterCount()
+        journal.document.contentsChange.connect(lambda position, removed, added, document=journal.document:
+                                                self.contents_change(journal, document, position, removed, added))
+
+    # Starting over when the editor's document is the file at a path, or empty when there is no path
+    def reset(self, editor, path=None):
+        journal = self.journals.get(editor)
+
+        if journal is None:
+            return
+
+        journal.path = path
+        journal.compacting = False
+
+        # A hibernated workspace saved from its scratch file is followed again once it comes back
+        if journal.document is not editor.document() and self.hibernated(editor) is None:
+            self.attach(journal)
+
+        # The file is the start as long as it stays as it is now, one which cannot be read is replaced by a snapshot
+        try:
+            base = {'kind': 'file', 'path': path, 'size': os.path.getsize(path), 'mtime': os.path.getmtime(path), 'plain': is_plain_editor(editor)} if path else {'kind': 'empty'}
+        except OSError:
+            self.compact(journal)
+            return
+
+        self.start_generation(journal, base)
+
+    # Starting over from a snapshot, when the editor's document is nowhere on disk
+    def rebase(self, editor):
+        journal = self.journals.get(editor)
+
+        if journal is None:
+            return
+
+        if journal.document is not editor.document():
+            self.attach(journal)
+        self.compact(journal)
+
+    # Writing the files of a new generation, the old ones are removed only after them
+    def start_generation(self, journal, base, snapshot=None):
+        old_files = journal.files()
+
+        journal.generation += 1
+        journal.base = base
+        journal.started = False
+        journal.size = 0
+
+        if snapshot is not None:
+            self.writer.write(journal.snapshot_path(), snapshot)
+            self.write_header(journal, write=True)
+
+        self.writer.remove(old_files)
+
+    def write_header(self, journal, write=False):
+        index = self.tabs.indexOf(journal.editor)
+        header = {'journal': journal_version, 'title': self.tabs.tabText(index) if index != -1 else '', 'path': journal.path, 'base': journal.base}
+        text = json.dumps(header) + '\n'
+
+        if write:
+            self.writer.write(journal.journal_path(), text)
+        else:
+            self.writer.append(journal.journal_path(), text)
+
+        journal.started = True
+
+    # Recording a change of a journaled document as it happens
+    def contents_change(self, journal, document, position, removed, added):
+        if document is not journal.document:
+            return
+
+        journal.changes += 1
+        undo_steps, redo_available = journal.undo_steps, journal.redo_available
+        journal.undo_steps, journal.redo_available = document.availableUndoSteps(), document.isRedoAvailable()
+        characters, journal.characters = journal.characters, document.characterCount()
+
+        if journal.compacting:
+            return
+
+        # Undo and redo at times report less of the document than they changed, so their range is widened
+        undone = journal.undo_steps < undo_steps or redo_available or removed < 0
+
+        if undone:
+            position, removed, end = undo_range(document, position, removed, added, characters)
+            added = end - position
+
+        # Too large a change is cheaper to save whole, once the edit it belongs to is over
+        if max(removed, added) > snapshot_characters or journal.size > compact_journal_bytes:
+            self.compact_later(journal)
+            return
+
+        if not journal.started:
+            self.write_header(journal)
+
+        record = range_record(document, position, removed, end) if undone else change_record(document, position, removed, added)
+        text = json.dumps(record) + '\n'
+        journal.size += len(text)
+        self.writer.append(journal.journal_path(), text)
+
+    def compact_later(self, journal):
+        journal.compacting = True
+        QTimer.singleShot(0, lambda: journal.compacting and self.compact(journal))
+
+    # Saving the document whole as the snapshot of a new generation
+    def compact(self, journal):
+        journal.compacting = False
+
+        if sip.isdeleted(journal.editor) or journal.editor not in self.journals or journal.document is not journal.editor.document():
+            return
+
+        data = io.BytesIO()
+        write_ptxt(journal.document, data)
+        self.start_generation(journal, {'kind': 'snapshot', 'file': os.path.basename(journal.snapshot_path(journal.generation + 1))}, data.getvalue())
+
+    # Following the documents editors were handed meanwhile, such as a hibernated workspace coming back
+    def documents_changed(self, *arguments):
+        for editor, journal in self.journals.items():
+            if not sip.isdeleted(editor) and journal.document is not editor.document() and self.hibernated(editor) is None:
+                self.attach(journal)
+
+    # A save which covers every change made before it starts
+    def save_started(self, editor):
+        if editor in self.journals:
+            self.journals[editor].saving = self.journals[editor].changes
+
+    # Once written the file is the new start, unless the document changed while it was being written
+    def saved(self, editor, path):
+        journal = self.journals.get(editor)
+
+        if journal is not None and journal.saving == journal.changes:
+            self.reset(editor, path)
+        elif journal is not None:
+            journal.path = path
+
+    # Dropping the journal of a workspace which was closed
+    def forget(self, editor):
+        journal = self.journals.pop(editor, None)
+
+        if journal is not None:
+            self.writer.remove(journal.files())
+
+    # Finishing the writes and removing the session's journals once the application quits normally
+    def clean_up(self):
+        self.writer.finish_input()
+        self.writer.wait()
+        self.journals.clear()
+        self.lock.unlock()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+# A workspace left behind by a session which did not close, as its newest complete journal
+class RecoverableWorkspace:
+    __slots__ = ('title', 'path', 'journal_path', 'header')
+
+    def __init__(self, title, path, journal_path, header):
+        self.title = title
+        self.path = path
+        self.journal_path = journal_path
+        self.header = header
+
+
+# A session which did not close, locked by this one from now on until it is recovered or discarded
+class RecoverableSession:
+    __slots__ = ('folder', 'lock', 'workspaces')
+
+    def __init__(self, folder, lock, workspaces):
+        self.folder = folder
+        self.lock = lock
+        self.workspaces = workspaces
+
+    # Removing the journals once they were recovered or are not wanted
+    def discard(self):
+        self.lock.unlock()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    # Leaving the journals for a later session
+    def release(self):
+        self.lock.unlock()
+
+
+# Header of a journal, or None when it was never completed
+def read_header(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            header = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+
+    return header if isinstance(header, dict) and header.get('journal') == journal_version else None
+
+
+# Sessions under a folder which are not running any more, with the newest journal of each of their workspaces
+def recoverable_sessions(folder=None, running=None):
+    root = folder or default_folder()
+    sessions = []
+
+    if not os.path.isdir(root):
+        return sessions
+
+    for name in sorted(os.listdir(root)):
+        session_folder = os.path.join(root, name)
+
+        if not os.path.isdir(session_folder) or session_folder == running:
+            continue
+
+        # A running session holds its lock, one which crashed left a stale lock behind
+        lock = QLockFile(os.path.join(session_folder, lock_name))
+
+        if not lock.tryLock(0):
+            continue
+
+        newest = {}
+
+        for file_name in os.listdir(session_folder):
+            parts = file_name.split('.')
+
+            if len(parts) != 3 or parts[2] != 'journal' or not parts[1].isdigit():
+                continue
+
+            path = os.path.join(session_folder, file_name)
+            header = read_header(path)
+
+            # A journal whose snapshot never got written is incomplete, the generation before it still holds
+            if header is None or (header['base'].get('kind') == 'snapshot' and not os.path.exists(os.path.join(session_folder, header['base']['file']))):
+                continue
+
+            if parts[0] not in newest or int(parts[1]) > newest[parts[0]][0]:
+                newest[parts[0]] = (int(parts[1]), path, header)
+
+        workspaces = [RecoverableWorkspace(header.get('title') or 'Workspace', header.get('path'), path, header)
+                      for _, path, header in sorted(newest.values(), key=lambda item: item[1])]
+
+        if workspaces:
+            sessions.append(RecoverableSession(session_folder, lock, workspaces))
+        else:
+            lock.unlock()
+            shutil.rmtree(session_folder, ignore_errors=True)
+
+    return sessions
+
+
+# Rebuilding a workspace into a document, from what its journal started with and every change recorded after it.
+# Raises when what it started with is gone, and hands back why it stopped early when a change did not fit
+def recover_workspace(workspace, document):
+    base = workspace.header['base']
+
+    if base['kind'] == 'file':
+        if not os.path.exists(base['path']) or os.path.getsize(base['path']) != base['size'] or os.path.getmtime(base['path']) != base['mtime']:
+            raise ValueError(f'{base["path"]} changed since the workspace was journaled')
+        read_document(document, base['path'], plain=base.get('plain', False))
+    elif base['kind'] == 'snapshot':
+        with open(os.path.join(os.path.dirname(workspace.journal_path), base['file']), 'rb') as f:
+            read_ptxt(document, f)
+
+    with open(workspace.journal_path, encoding='utf-8') as f:
+        f.readline()
+
+        for line in f:
+            # The last line is cut short when the session crashed while writing it
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+
+            try:
+                apply_record(document, record)
+            except ValueError as e:
+                return str(e)
+
+    return None
@@ -0,0 +1,138 @@
+# batch_convert.py - Converting documents from the command line without opening a window.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage: python main.py convert --to pdf|txt|ptxt|html in/*.ptxt -o out/ [-j processes]
+
+# Libraries required to be imported
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+
+
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import time
+
+from document_loader import read_document
+from document_saver import serialize_document, write_atomically
+from pdf_export import render_pdf
+from plain_workspace import is_plain_path
+
+# Formats documents can be converted to
+formats = ('pdf', 'txt', 'ptxt', 'html')
+
+# Documents handed to a process at a time, enough to keep the processes busy without sending each one by itself
+batch_size = 8
+
+# Application of a conversion process, made once per process
+application = None
+
+
+# Starting Qt without a display in a conversion process
+def start_process():
+    global application
+
+    os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+
+    if QGuiApplication.instance() is None:
+        application = QGuiApplication(['PowerText'])
+
+
+# Converting one file, reporting the error instead of raising it so one bad file does not stop the batch
+def convert_file(source, target_format, output_folder):
+    target = os.path.join(output_folder, os.path.splitext(os.path.basename(source))[0] + '.' + target_format)
+
+    try:
+        document = QTextDocument()
+        read_document(document, source, plain=is_plain_path(source))
+
+        if target_format == 'pdf':
+            data = render_pdf(document, os.path.splitext(os.path.basename(target))[0])
+        else:
+            data = serialize_document(document, target)
+
+        write_atomically(target, data)
+    except Exception as e:
+        return source, target, str(e) or type(e).__name__
+
+    return source, target, None
+
+
+# Expanding patterns the shell left alone, as it does on Windows
+def expand_inputs(inputs):
+    paths = []
+
+    for pattern in inputs:
+        if glob.has_magic(pattern):
+            paths.extend(path for path in sorted(glob.glob(pattern)) if os.path.isfile(path))
+        else:
+            paths.append(pattern)
+
+    return paths
+
+
+# Converting many files spread across processes, yielding the results in the order of the paths as they are done
+def convert(paths, target_format, output_folder, processes=None):
+    os.makedirs(output_folder, exist_ok=True)
+
+    # Processes are spawned, so no Qt state of this process leaks into them
+    context = multiprocessing.get_context('spawn')
+    processes = min(processes or os.cpu_count() or 1, max(1, len(paths)))
+
+    with ProcessPoolExecutor(processes, mp_context=context, initializer=start_process) as executor:
+        chunk = max(1, min(batch_size, len(paths) // (processes * 4)))
+        yield from executor.map(convert_file, paths, [target_format] * len(paths), [output_folder] * len(paths), chunksize=chunk)
+
+
+# Command line entry point, exiting with 1 when any document failed
+def main(arguments=None):
+    parser = argparse.ArgumentParser(prog='main.py convert', description='Convert documents without opening PowerText.')
+    parser.add_argument('inputs', nargs='+', help='documents to convert, patterns such as in/*.ptxt are expanded')
+    parser.add_argument('--to', required=True, choices=formats, help='format to convert to')
+    parser.add_argument('-o', '--output', required=True, help='folder the converted documents are written to')
+    parser.add_argument('-j', '--processes', type=int, default=None, help='conversion processes, one per CPU by default')
+    parser.add_argument('-q', '--quiet', action='store_true', help='only report failures')
+    options = parser.parse_args(arguments)
+
+    paths = expand_inputs(options.inputs)
+
+    if not paths:
+        parser.error('no documents match ' + ' '.join(options.inputs))
+
+    # Two inputs with the same name would overwrite each other's output
+    names = {}
+    for path in paths:
+        names.setdefault(os.path.splitext(os.path.basename(path))[0], []).append(path)
+
+    clashes = [group for group in names.values() if len(group) > 1]
+    if clashes:
+        parser.error('more than one document converts to the same name: ' + ', '.join(clashes[0]))
+
+    start = time.perf_counter()
+    failed = 0
+
+    for source, target, error in convert(paths, options.to, options.output, options.processes):
+        if error is not None:
+            failed += 1
+            print(f'Failed {source}: {error}', file=sys.stderr)
+        elif not options.quiet:
+            print(f'Converted {source} -> {target}')
+
+    print(f'{len(paths) - failed} of {len(paths)} documents converted in {time.perf_counter() - start:.1f}s', file=sys.stderr)
+    return 1 if failed else 0
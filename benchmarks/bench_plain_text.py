@@ -0,0 +1,121 @@
+# bench_plain_text.py - Times opening and typing in text files in the rich and the plain text workspaces.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage: python benchmarks/bench_plain_text.py [scale ...]
+#
+# Every file is opened the way PowerText opens it, streamed in by DocumentLoad, and the load counts until the
+# whole document is laid out, which is when the scroll bar knows its range.
+
+import os
+import sys
+
+# No display is needed
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+from PyQt6.QtTest import QTest
+
+
+import tempfile
+import time
+
+from document_loader import DocumentLoad
+from synthetic import plain_text
+
+scales = [1, 10, 50]
+keystrokes = 10
+editors = [('QTextEdit', QTextEdit), ('QPlainTextEdit', QPlainTextEdit)]
+
+
+# A visible editor, so that layout and painting happen as they would for the user
+def new_editor(editor_class):
+    editor = editor_class()
+    editor.resize(1050, 600)
+    editor.show()
+    QApplication.processEvents()
+    return editor
+
+
+# Finishing any layout still pending, so it does not count towards the keystrokes
+def settle(editor):
+    editor.document().documentLayout().documentSize()
+    editor.viewport().repaint()
+    QApplication.processEvents()
+
+
+def load_time(editor, path):
+    load = DocumentLoad(editor, path)
+    finished = []
+    load.load_finished.connect(finished.append)
+
+    start = time.perf_counter()
+    load.start()
+    while not finished:
+        QApplication.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 10)
+    settle(editor)
+    return time.perf_counter() - start
+
+
+# Average time from a keystroke in the middle of the document until the editor has been painted again
+def keystroke_time(editor):
+    cursor = QTextCursor(editor.document())
+    cursor.setPosition(editor.document().characterCount() // 2)
+    editor.setTextCursor(cursor)
+    editor.ensureCursorVisible()
+    settle(editor)
+
+    start = time.perf_counter()
+    for _ in range(keystrokes):
+        QTest.keyClick(editor, Qt.Key.Key_X)
+        QApplication.processEvents()
+        editor.viewport().repaint()
+    return (time.perf_counter() - start) / keystrokes
+
+
+def main():
+    app = QApplication(sys.argv[:1])
+    folder = tempfile.mkdtemp(prefix='powertext-bench-')
+
+    print(f'{"lines":>8}{"size (MB)":>11}  {"editor":<16}{"load (s)":>10}{"keystroke (ms)":>16}')
+    for scale in [int(argument) for argument in sys.argv[1:]] or scales:
+        path = os.path.join(folder, f'plain-{scale}.txt')
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(plain_text(scale))
+
+        size = os.path.getsize(path) / (1024 * 1024)
+
+        for label, editor_class in editors:
+            editor = new_editor(editor_class)
+            load = load_time(editor, path)
+            keystroke = keystroke_time(editor)
+            print(f'{2000 * scale:>8}{size:>11.1f}  {label:<16}{load:>10.3f}{keystroke * 1000:>16.2f}')
+
+            editor.close()
+            editor.deleteLater()
+            QApplication.processEvents()
+
+        os.remove(path)
+
+    os.rmdir(folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+# bench_ptxt.py - Compares saving and opening .ptxt version 2 against the HTML of version 1.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage: python benchmarks/bench_ptxt.py [scale]
+
+import os
+import sys
+
+# No display is needed
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+
+
+import io
+import tempfile
+import time
+
+from ptxt_format import read_ptxt, write_ptxt
+
+
+# Building the synthetic documents
+def rich_text_html(scale):
+    paragraph = '<p><b>Bold</b> plain <i>italic</i> <u>underlined</u> <span style="color:#c00000">red</span> and some more ordinary text.</p>'
+    items = '<ul><li>First point</li><li>Second <s>point</s></li></ul><ol><li>Numbered</li></ol>'
+    return (paragraph * 9 + items) * 200 * scale
+
+
+def tables_html(scale):
+    rows = ''.join('<tr>' + ''.join(f'<td>Row {row} Column {column}</td>' for column in range(10)) + '</tr>' for row in range(50))
+    return ('<p>Table</p><table border="1">' + rows + '</table>') * 4 * scale
+
+
+def images_html(scale, image_path):
+    paragraph = f'<p>Figure <img src="{image_path}" width="120" height="120"> with its caption.</p>'
+    return paragraph * 500 * scale
+
+
+# Best of a few runs
+def timed(function, runs=3):
+    best = None
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, result
+
+
+def bench(name, html):
+    document = QTextDocument()
+    document.setHtml(html)
+
+    html_save, saved_html = timed(document.toHtml)
+    html_open, _ = timed(lambda: QTextDocument().setHtml(saved_html))
+
+    rows = [(name, 'html (v1)', html_save, html_open, len(saved_html.encode('utf-8')))]
+
+    for label, compress in (('ptxt v2', False), ('ptxt v2 zlib', True)):
+        def save():
+            data = io.BytesIO()
+            write_ptxt(document, data, compress)
+            return data.getvalue()
+
+        def load():
+            read_ptxt(QTextDocument(), io.BytesIO(saved))
+
+        save_time, saved = timed(save)
+        open_time, _ = timed(load)
+        rows.append((name, label, save_time, open_time, len(saved)))
+
+    return rows
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    app = QApplication(sys.argv)
+
+    with tempfile.TemporaryDirectory() as folder:
+        image_path = os.path.join(folder, 'figure.png')
+        image = QImage(640, 480, QImage.Format.Format_RGB32)
+        image.fill(QColor('steelblue'))
+        image.save(image_path)
+
+        rows = []
+        rows += bench('rich text', rich_text_html(scale))
+        rows += bench('tables', tables_html(scale))
+        rows += bench('images', images_html(scale, image_path))
+
+    print(f'{"document":<12}{"format":<16}{"save (s)":>10}{"open (s)":>10}{"size (bytes)":>15}')
+    for name, label, save_time, open_time, size in rows:
+        print(f'{name:<12}{label:<16}{save_time:>10.3f}{open_time:>10.3f}{size:>15,}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+# bench_startup.py - Measures how long PowerText takes from a fresh interpreter to its first painted window.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage: python benchmarks/bench_startup.py [runs] [--json results.json]
+
+# Every run starts a new interpreter, so nothing is imported or cached from an earlier run. The numbers
+# are the median over the runs, and the Qt modules loaded by the first paint are listed so that a module
+# creeping back into startup shows up.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Wall clock time at which this file began to run, the end of the interpreter phase of a probe
+script_started = time.time()
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Phases of a startup, in the order they happen
+phases = ('interpreter', 'import', 'window', 'first paint', 'total')
+
+
+# Runs inside the new interpreter, reports the time of every phase as one line of JSON
+def probe(started):
+    import_start = time.perf_counter()
+    sys.path.insert(0, root)
+
+    import main
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QEvent, QObject, QStandardPaths, QTimer
+
+    import_end = time.perf_counter()
+
+    # The session, journals and locks go to Qt's test folders, away from those of the user
+    QStandardPaths.setTestModeEnabled(True)
+
+    app = QApplication(sys.argv[:1])
+    window = main.PowerText()
+    window.setGeometry(100, 100, 1050, 600)
+    window_end = time.perf_counter()
+
+    painted = []
+
+    # Noting the first paint of anything in the window, and quitting once it is done
+    class FirstPaint(QObject):
+        def eventFilter(self, watched, event):
+            if not painted and event.type() == QEvent.Type.Paint and watched.isWidgetType() and watched.window() is window:
+                painted.append(time.perf_counter())
+                QTimer.singleShot(0, app.quit)
+            return False
+
+    first_paint = FirstPaint()
+    app.installEventFilter(first_paint)
+    window.show()
+    app.exec()
+
+    end = painted[0] if painted else time.perf_counter()
+    print(json.dumps({
+        'import': import_end - import_start,
+        'window': window_end - import_end,
+        'first paint': end - window_end,
+        'started': started,
+        'qt modules': sorted(name for name in sys.modules if name.startswith('PyQt6.Qt')),
+    }))
+
+
+# One run in a new interpreter, timed from the outside as well
+def run_once():
+    environment = dict(os.environ)
+    environment.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    launched = time.time()
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--probe'], cwd=root, env=environment,
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    # Time from launching the process until the probe itself began
+    result['interpreter'] = result.pop('started') - launched
+    result['total'] = sum(result[phase] for phase in phases[:-1])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time PowerText from a fresh interpreter to its first painted window.')
+    parser.add_argument('runs', type=int, nargs='?', default=10, help='startups timed, the median is reported')
+    parser.add_argument('--json', dest='json_path', metavar='PATH', help='file the results are written to as JSON')
+    options = parser.parse_args()
+
+    runs = options.runs
+    json_path = options.json_path
+    results = [run_once() for _ in range(runs)]
+
+    summary = {
+        'runs': runs,
+        'platform': os.environ.get('QT_QPA_PLATFORM', 'offscreen'),
+        'python': sys.version.split()[0],
+        'median': {phase: statistics.median(result[phase] for result in results) for phase in phases},
+        'best': {phase: min(result[phase] for result in results) for phase in phases},
+        'qt modules': results[-1]['qt modules'],
+    }
+
+    print(f'{"phase":<14}{"median (ms)":>14}{"best (ms)":>12}')
+    for phase in phases:
+        print(f'{phase:<14}{summary["median"][phase] * 1000:>14.1f}{summary["best"][phase] * 1000:>12.1f}')
+    print('Qt modules loaded: ' + ', '.join(name.split('.')[-1] for name in summary['qt modules']))
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--probe']:
+        probe(script_started)
+    else:
+        main()
@@ -0,0 +1,339 @@
+# bench_suite.py - Times the hot operations of PowerText on synthetic documents and flags regressions.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage: python benchmarks/bench_suite.py [--scale N] [--runs N] [--warmup N] [--only open,save,...]
+#                                         [--output results.json] [--baseline baseline.json] [--threshold 0.25]
+#
+# Every operation goes through the toolbar action of a real PowerText window, with the dialogs it opens
+# answered by the suite, and is timed until its background work is done. Results are written as JSON,
+# and a baseline written by an earlier run marks every operation whose median got slower than the
+# threshold allows. The exit status is 1 when anything regressed.
+
+import os
+import sys
+
+# No display is needed
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+
+
+from unittest import mock
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import tempfile
+import time
+
+import main
+from document_saver import serialize_document
+from synthetic import fill_document, kinds
+
+# Changes smaller than this are noise whatever the threshold, waking a worker thread alone varies by milliseconds
+noise_floor = 0.015
+
+# Longest an operation may take before the suite gives up on it
+timeout_seconds = 600
+
+# Tables inserted by the insert table benchmark, one built at once and one built in segments
+table_sizes = [(20, 10), (200, 50)]
+
+
+# Running the event loop until a condition holds
+def wait_until(condition):
+    deadline = time.perf_counter() + timeout_seconds
+
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError('operation did not finish')
+        QApplication.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 10)
+
+
+# Answers for the dialogs an action opens, the suite has nobody to click them
+def answering(open_path='', save_path='', integers=()):
+    integers = list(integers)
+
+    return [
+        mock.patch.object(QFileDialog, 'getOpenFileName', staticmethod(lambda *arguments, **options: (open_path, ''))),
+        mock.patch.object(QFileDialog, 'getOpenFileNames', staticmethod(lambda *arguments, **options: ([open_path] if open_path else [], ''))),
+        mock.patch.object(QFileDialog, 'getSaveFileName', staticmethod(lambda *arguments, **options: (save_path, ''))),
+        mock.patch.object(QInputDialog, 'getInt', staticmethod(lambda *arguments, **options: (integers.pop(0), True))),
+        mock.patch.object(QMessageBox, 'information', staticmethod(lambda *arguments, **options: QMessageBox.StandardButton.Ok)),
+        mock.patch.object(QMessageBox, 'warning', staticmethod(lambda *arguments, **options: QMessageBox.StandardButton.Ok)),
+    ]
+
+
+# The operations, each sets up a fresh workspace untimed and hands back what is timed
+class Suite:
+    def __init__(self, window, folder, scale):
+        self.window = window
+        self.folder = folder
+        self.scale = scale
+        self.files = {}
+
+    # A workspace of its own for every run
+    def workspace(self, kind=None):
+        self.window.text_editor_tab()
+        editor = self.window.text_editor
+        self.window.center.setCurrentWidget(editor)
+
+        if kind is not None:
+            fill_document(editor.document(), kind, self.scale, self.folder)
+            editor.document().setModified(False)
+
+        QApplication.processEvents()
+        return editor
+
+    def close_workspaces(self):
+        while self.window.center.count() > 1:
+            self.window.close_tab(self.window.center.count() - 1)
+        QApplication.processEvents()
+
+    # Files to open, written once per kind in the format PowerText saves that kind in
+    def document_file(self, kind):
+        if kind not in self.files:
+            editor = self.workspace(kind)
+            path = os.path.join(self.folder, kind + ('.txt' if kind == 'plain' else '.ptxt'))
+
+            with open(path, 'wb' if path.endswith('.ptxt') else 'w') as f:
+                f.write(serialize_document(editor.document(), path))
+
+            self.files[kind] = path
+            self.close_workspaces()
+
+        return self.files[kind]
+
+    # open_document: reading a file into the current workspace until it is shown
+    def open(self, kind):
+        path = self.document_file(kind)
+        self.workspace()
+
+        def run():
+            with_answers(answering(open_path=path), self.window.open.trigger, lambda: not self.window.loads)
+
+        return run
+
+    # save_document: writing the current workspace until the file is on disk
+    def save(self, kind):
+        editor = self.workspace(kind)
+        path = os.path.join(self.folder, 'saved-' + kind + ('.txt' if kind == 'plain' else '.ptxt'))
+        self.window.documents[editor].set_path(path)
+
+        def run():
+            self.window.save.trigger()
+            wait_until(lambda: not self.window.savers[editor].busy())
+
+        return run
+
+    # bold_function: making the whole document bold and laying it out again
+    def bold(self, kind):
+        editor = self.workspace(kind)
+        cursor = editor.textCursor()
+        cursor.select(QTextCursor.SelectionType.Document)
+        editor.setTextCursor(cursor)
+
+        def run():
+            self.window.bold.setChecked(True)
+            self.window.bold.triggered.emit(True)
+            editor.document().documentLayout().documentSize()
+            QApplication.processEvents()
+
+        return run
+
+    # insert_table_function: inserting an empty table until the editor is handed back
+    def insert_table(self, size):
+        rows, columns = size
+        editor = self.workspace()
+
+        def run():
+            with_answers(answering(integers=[rows, columns]), self.window.insert_table.trigger, lambda: not editor.isReadOnly())
+            editor.document().documentLayout().documentSize()
+
+        return run
+
+    # save_as_pdf: exporting the current workspace until the PDF is written
+    def pdf(self, kind):
+        self.workspace(kind)
+        path = os.path.join(self.folder, 'exported-' + kind + '.pdf')
+
+        def run():
+            with_answers(answering(save_path=path), self.window.saveas_pdf.trigger, lambda: not self.window.exports)
+
+        return run
+
+    # Every benchmark by name, with how to set up one run of it
+    def benchmarks(self):
+        cases = []
+
+        for kind in kinds:
+            cases.append(('open/' + kind, lambda kind=kind: self.open(kind)))
+        for kind in kinds:
+            cases.append(('save/' + kind, lambda kind=kind: self.save(kind)))
+        for kind in kinds:
+            cases.append(('bold/' + kind, lambda kind=kind: self.bold(kind)))
+        for size in table_sizes:
+            cases.append((f'insert_table/{size[0]}x{size[1]}', lambda size=size: self.insert_table(size)))
+        for kind in kinds:
+            cases.append(('pdf/' + kind, lambda kind=kind: self.pdf(kind)))
+
+        return cases
+
+
+# Calling a function with the dialogs answered, until what it started is done, the dialogs shown at the end included
+def with_answers(patches, function, done=lambda: True):
+    for patch in patches:
+        patch.start()
+
+    try:
+        function()
+        wait_until(done)
+    finally:
+        for patch in patches:
+            patch.stop()
+
+
+# Timing every run of a benchmark, each on a fresh workspace, after untimed runs that warm up caches
+def measure(suite, setup, runs, warmup):
+    times = []
+
+    for index in range(warmup + runs):
+        run = setup()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        suite.close_workspaces()
+
+        if index >= warmup:
+            times.append(elapsed)
+
+    return {'median': statistics.median(times), 'best': min(times), 'runs': times}
+
+
+# Comparing against a baseline, a benchmark regressed when its median grew by more than the threshold
+def compare(results, baseline, threshold):
+    comparison = {}
+
+    for name, result in results.items():
+        before = baseline.get('results', {}).get(name)
+
+        if before is None:
+            comparison[name] = (None, 'new')
+            continue
+
+        change = (result['median'] - before['median']) / max(before['median'], 1e-9)
+
+        if result['median'] - before['median'] > noise_floor and change > threshold:
+            verdict = 'REGRESSION'
+        elif before['median'] - result['median'] > noise_floor and -change > threshold:
+            verdict = 'faster'
+        else:
+            verdict = ''
+
+        comparison[name] = (before['median'], verdict)
+
+    return comparison
+
+
+def main_suite():
+    parser = argparse.ArgumentParser(description='Time the hot operations of PowerText on synthetic documents.')
+    parser.add_argument('--scale', type=int, default=1, help='size of the synthetic documents')
+    parser.add_argument('--runs', type=int, default=3, help='runs of every benchmark, the median is compared')
+    parser.add_argument('--warmup', type=int, default=1, help='untimed runs before the timed ones')
+    parser.add_argument('--only', default='', help='comma separated benchmark name prefixes, such as open,bold')
+    parser.add_argument('--output', help='file the results are written to as JSON')
+    parser.add_argument('--baseline', help='results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='relative slowdown counted as a regression')
+    options = parser.parse_args()
+
+    # The session, journals and locks go to Qt's test folders, closing the window must not replace the user's session
+    QStandardPaths.setTestModeEnabled(True)
+
+    app = QApplication(sys.argv[:1])
+    window = main.PowerText()
+    window.setGeometry(100, 100, 1050, 600)
+    window.show()
+
+    prefixes = [prefix for prefix in options.only.split(',') if prefix]
+    results = {}
+
+    with tempfile.TemporaryDirectory() as folder:
+        suite = Suite(window, folder, options.scale)
+
+        for name, setup in suite.benchmarks():
+            if prefixes and not any(name.startswith(prefix) for prefix in prefixes):
+                continue
+
+            results[name] = measure(suite, setup, options.runs, options.warmup)
+            print(f'{name:<24}{results[name]["median"] * 1000:>12.1f} ms', file=sys.stderr)
+
+        window.close()
+
+    report = {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'scale': options.scale,
+            'runs': options.runs,
+            'warmup': options.warmup,
+            'python': platform.python_version(),
+            'qt': QT_VERSION_STR,
+            'platform': platform.platform(),
+            'qpa': os.environ.get('QT_QPA_PLATFORM'),
+        },
+        'results': results,
+    }
+
+    regressed = False
+
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+
+        if baseline.get('meta', {}).get('scale') != options.scale:
+            print(f'Warning: the baseline was run at scale {baseline.get("meta", {}).get("scale")}', file=sys.stderr)
+
+        comparison = compare(results, baseline, options.threshold)
+        report['baseline'] = {name: {'median': before, 'verdict': verdict} for name, (before, verdict) in comparison.items()}
+        regressed = any(verdict == 'REGRESSION' for _, verdict in comparison.values())
+
+        print(f'{"benchmark":<24}{"median (ms)":>12}{"baseline (ms)":>15}{"change":>9}  verdict')
+        for name, result in results.items():
+            before, verdict = comparison[name]
+            if before is None:
+                print(f'{name:<24}{result["median"] * 1000:>12.1f}{"-":>15}{"-":>9}  {verdict}')
+            else:
+                change = (result['median'] - before) / max(before, 1e-9) * 100
+                print(f'{name:<24}{result["median"] * 1000:>12.1f}{before * 1000:>15.1f}{change:>+8.0f}%  {verdict}')
+    else:
+        print(f'{"benchmark":<24}{"median (ms)":>12}{"best (ms)":>12}')
+        for name, result in results.items():
+            print(f'{name:<24}{result["median"] * 1000:>12.1f}{result["best"] * 1000:>12.1f}')
+
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_suite())
@@ -0,0 +1,115 @@
+# bench_tables.py - Times inserting large tables and typing inside them.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage: python benchmarks/bench_tables.py [--baseline]
+#
+# --baseline also times a plain QTextCursor.insertTable(), which takes minutes at 1000x100
+
+import os
+import sys
+
+# No display is needed
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+from PyQt6.QtTest import QTest
+
+
+import time
+
+from table_engine import TableBuilder
+
+sizes = [(10, 10), (100, 100), (1000, 100)]
+keystrokes = 10
+
+
+# A visible editor, so that layout and painting happen as they would for the user
+def new_editor():
+    editor = QTextEdit()
+    editor.resize(1050, 600)
+    editor.show()
+    QApplication.processEvents()
+    return editor
+
+
+# Finishing any layout still pending, so it does not count towards the keystrokes
+def settle(editor):
+    editor.document().documentLayout().documentSize()
+    editor.viewport().repaint()
+    QApplication.processEvents()
+
+
+# Average time from a keystroke in a cell until the editor has been laid out and painted again
+def keystroke_time(editor, table):
+    editor.setTextCursor(table.cellAt(table.rows() // 2, table.columns() // 2).firstCursorPosition())
+    editor.ensureCursorVisible()
+    settle(editor)
+
+    start = time.perf_counter()
+    for _ in range(keystrokes):
+        QTest.keyClick(editor, Qt.Key.Key_X)
+        QApplication.processEvents()
+        editor.viewport().repaint()
+    return (time.perf_counter() - start) / keystrokes
+
+
+def bench_plain(rows, columns):
+    editor = new_editor()
+
+    start = time.perf_counter()
+    table = editor.textCursor().insertTable(rows, columns)
+    settle(editor)
+    insert_time = time.perf_counter() - start
+
+    return insert_time, keystroke_time(editor, table)
+
+
+def bench_builder(rows, columns):
+    editor = new_editor()
+    builder = TableBuilder(editor, columns)
+
+    start = time.perf_counter()
+    builder.add_empty_rows(rows)
+    builder.finish_input()
+    builder.start(editor.textCursor())
+    while not builder.done:
+        QApplication.processEvents()
+    settle(editor)
+    insert_time = time.perf_counter() - start
+
+    return insert_time, keystroke_time(editor, builder.tables[len(builder.tables) // 2])
+
+
+def main():
+    app = QApplication(sys.argv)
+
+    runs = [('table engine', bench_builder)]
+    if '--baseline' in sys.argv:
+        runs.insert(0, ('insertTable', bench_plain))
+
+    print(f'{"table":<12}{"method":<16}{"insert (s)":>12}{"keystroke (ms)":>16}')
+    for rows, columns in sizes:
+        for label, bench in runs:
+            insert_time, keystroke = bench(rows, columns)
+            print(f'{f"{rows}x{columns}":<12}{label:<16}{insert_time:>12.3f}{keystroke * 1000:>16.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# synthetic.py - Synthetic documents of a chosen size for the benchmarks.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Libraries required to be imported
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+
+
+import os
+
+# Kinds of document every benchmark is run on
+kinds = ('plain', 'rich', 'tables', 'images')
+
+# Words the text is made of, the same every run so that runs compare
+words = 'the quick brown fox jumps over a lazy dog while seven wizards quietly box and judge pale vexing jumbo quartz'.split()
+
+
+# Lines of ordinary prose, about 2000 per unit of scale
+def plain_text(scale):
+    lines = []
+
+    for line in range(2000 * scale):
+        lines.append(' '.join(words[(line + word) % len(words)] for word in range(12)))
+
+    return '\n'.join(lines)
+
+
+# Paragraphs mixing bold, italic, underline, colour and lists
+def rich_text_html(scale):
+    paragraph = '<p><b>Bold</b> plain <i>italic</i> <u>underlined</u> <span style="color:#c00000">red</span> and some more ordinary text.</p>'
+    items = '<ul><li>First point</li><li>Second <s>point</s></li></ul><ol><li>Numbered</li></ol>'
+    return (paragraph * 9 + items) * 200 * scale
+
+
+# Tables of ten columns with a heading before each
+def tables_html(scale):
+    rows = ''.join('<tr>' + ''.join(f'<td>Row {row} Column {column}</td>' for column in range(10)) + '</tr>' for row in range(50))
+    return ('<p>Table</p><table border="1">' + rows + '</table>') * 4 * scale
+
+
+# Paragraphs with an image shown smaller than the file
+def images_html(scale, image_path):
+    paragraph = f'<p>Figure <img src="{image_path}" width="120" height="120"> with its caption.</p>'
+    return paragraph * 200 * scale
+
+
+# Writing the image the image documents show
+def write_image(folder):
+    path = os.path.join(folder, 'figure.png')
+    image = QImage(640, 480, QImage.Format.Format_RGB32)
+    image.fill(QColor('steelblue'))
+    image.save(path)
+    return path
+
+
+# A document of a kind, as plain text or as HTML
+def document_text(kind, scale, folder):
+    if kind == 'plain':
+        return plain_text(scale)
+    elif kind == 'rich':
+        return rich_text_html(scale)
+    elif kind == 'tables':
+        return tables_html(scale)
+    else:
+        return images_html(scale, write_image(folder))
+
+
+# Filling a document with a kind of content
+def fill_document(document, kind, scale, folder):
+    text = document_text(kind, scale, folder)
+
+    if kind == 'plain':
+        document.setPlainText(text)
+    else:
+        document.setHtml(text)
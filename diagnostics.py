@@ -0,0 +1,430 @@
+# diagnostics.py - Opt-in timing of toolbar actions, event loop stalls and workspace statistics, for profiling real sessions.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+
+
+from collections import deque
+import datetime
+import json
+import os
+import platform
+import time
+
+from document_saver import write_atomically
+from hibernation import document_memory
+from image_cache import original_prefix
+from plain_workspace import workspace_editors
+
+# Diagnostics start switched on when this is set to 1, for sessions which are to be profiled from the start
+environment_variable = 'POWERTEXT_DIAGNOSTICS'
+
+# How often the watchdog expects to run, in milliseconds, and how late it must be for the event loop to count as stalled
+watchdog_interval = 50
+stall_threshold = 0.1
+
+# How often the workspaces are sampled, in milliseconds
+sample_interval = 2000
+
+# Events kept for export, the oldest are dropped in a long session
+max_events = 20000
+
+# Rows of the trace every kind of event is drawn on
+trace_threads = {'action': 1, 'stall': 2, 'load': 3, 'save': 4, 'export': 5}
+
+
+# Whether the environment asks for diagnostics
+def requested():
+    return os.environ.get(environment_variable, '') not in ('', '0')
+
+
+# Timings of one action
+class ActionStats:
+    __slots__ = ('count', 'total', 'longest', 'last')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.longest = 0.0
+        self.last = 0.0
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        self.longest = max(self.longest, duration)
+        self.last = duration
+
+    def as_dict(self):
+        return {'count': self.count, 'total_ms': self.total * 1000, 'mean_ms': self.total / max(self.count, 1) * 1000,
+                'longest_ms': self.longest * 1000, 'last_ms': self.last * 1000}
+
+
+# Memory taken by the images a document holds as resources, every image counted once
+def resource_memory(document):
+    names = set()
+    memory = 0
+
+    for text_format in document.allFormats():
+        if not text_format.isImageFormat():
+            continue
+
+        name = text_format.toImageFormat().name()
+        if name in names:
+            continue
+        names.add(name)
+
+        # An embedded image shown shrunk keeps the data it was read from as well, an image not shown yet is only data
+        for resource in (document.resource(QTextDocument.ResourceType.ImageResource, QUrl(name)),
+                         document.resource(QTextDocument.ResourceType.ImageResource, QUrl(original_prefix + name))):
+            if isinstance(resource, QImage):
+                memory += resource.sizeInBytes()
+            elif isinstance(resource, QByteArray):
+                memory += resource.size()
+            elif isinstance(resource, QPixmap):
+                memory += resource.width() * resource.height() * max(resource.depth(), 8) // 8
+
+    return memory
+
+
+# Records what the GUI thread spends its time on, only while switched on
+class Diagnostics(QObject):
+    action_timed = pyqtSignal(str, float)
+    stall_detected = pyqtSignal(float)
+    sampled = pyqtSignal(list)
+
+    def __init__(self, tabs, parent=None):
+        super(Diagnostics, self).__init__(parent)
+
+        self.tabs = tabs
+        self.enabled = False
+
+        # What is kept of a hibernated workspace, its document is empty meanwhile
+        self.hibernated = lambda editor: None
+
+        # Estimated memory of a workspace's undo history
+        self.undo_memory = lambda editor: 0
+
+        self.origin = time.perf_counter()
+        self.started = datetime.datetime.now()
+        self.events = deque(maxlen=max_events)
+        self.actions = {}
+        self.stall_count = 0
+        self.stall_total = 0.0
+        self.longest_stall = 0.0
+        self.workspaces = []
+
+        # Actions running right now, with the time the event loop spun inside them, such as in their dialogs
+        self.running = []
+        self.last_action = None
+
+        self.last_tick = None
+        self.watchdog = QTimer(self)
+        self.watchdog.setTimerType(Qt.TimerType.PreciseTimer)
+        self.watchdog.timeout.connect(self.tick)
+
+        self.sampler = QTimer(self)
+        self.sampler.timeout.connect(self.sample)
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+
+        if enabled:
+            self.last_tick = time.perf_counter()
+            self.watchdog.start(watchdog_interval)
+            self.sampler.start(sample_interval)
+            self.sample()
+        else:
+            self.watchdog.stop()
+            self.sampler.stop()
+            self.running.clear()
+
+    # Forgetting everything recorded so far
+    def clear(self):
+        self.events.clear()
+        self.actions.clear()
+        self.stall_count = 0
+        self.stall_total = 0.0
+        self.longest_stall = 0.0
+        self.last_action = None
+
+    def record(self, category, name, start, duration, details=None):
+        self.events.append((category, name, start - self.origin, duration, details))
+
+    # A handler which is timed while diagnostics are on, and called as it is otherwise
+    def timed(self, name, handler):
+        def run(*arguments):
+            if not self.enabled:
+                return handler()
+
+            # Name, start and the time the event loop spun inside the handler so far
+            entry = [name, time.perf_counter(), 0.0]
+            self.running.append(entry)
+
+            try:
+                return handler()
+            finally:
+                end = time.perf_counter()
+
+                # Switching diagnostics off or on meanwhile drops the running actions
+                if any(running is entry for running in self.running):
+                    self.running = [running for running in self.running if running is not entry]
+                    self.action_finished(name, entry[1], end, entry[2])
+
+        return run
+
+    # Only the time the handler kept the event loop from running counts, time in its dialogs does not
+    def action_finished(self, name, start, end, waited):
+        busy = max(0.0, end - start - waited)
+
+        self.actions.setdefault(name, ActionStats()).add(busy)
+        self.record('action', name, start, end - start, {'busy_ms': round(busy * 1000, 3), 'waiting_ms': round(waited * 1000, 3)})
+        self.last_action = (name, end)
+        self.action_timed.emit(name, busy)
+
+    # Timing background work until the returned function is called
+    def task(self, name, category):
+        if not self.enabled:
+            return lambda: None
+
+        start = time.perf_counter()
+
+        def finish():
+            if self.enabled:
+                self.record(category, name, start, time.perf_counter() - start)
+
+        return finish
+
+    # The watchdog runs on the event loop, so running late means something held the loop up
+    def tick(self):
+        now = time.perf_counter()
+        previous = self.last_tick
+        late = now - previous - watchdog_interval / 1000
+        self.last_tick = now
+
+        # The event loop running while an action is, means the action is waiting on a dialog
+        for entry in self.running:
+            since = max(previous, entry[1])
+            entry[2] += now - since if late <= stall_threshold else min(now - since, watchdog_interval / 1000)
+
+        if late > stall_threshold:
+            self.stall_count += 1
+            self.stall_total += late
+            self.longest_stall = max(self.longest_stall, late)
+
+            # Naming the action which ended during the stall, it is most likely what held the loop up
+            details = None
+            if self.last_action is not None and self.last_action[1] >= now - late:
+                details = {'after': self.last_action[0]}
+
+            self.record('stall', 'Event loop stalled', now - late, late, details)
+            self.stall_detected.emit(late)
+
+    # Size of every workspace, a hibernated one as it was when it was hibernated
+    def workspace_stats(self):
+        stats = []
+
+        for index in range(self.tabs.count()):
+            widget = self.tabs.widget(index)
+
+            if not isinstance(widget, workspace_editors):
+                stats.append({'tab': self.tabs.tabText(index), 'kind': type(widget).__name__})
+                continue
+
+            tab = self.hibernated(widget)
+            document = widget.document()
+
+            if tab is not None:
+                stats.append({'tab': self.tabs.tabText(index), 'kind': 'Hibernated', 'memory': tab.memory})
+            else:
+                stats.append({'tab': self.tabs.tabText(index), 'kind': 'Workspace', 'characters': document.characterCount(),
+                              'blocks': document.blockCount(), 'resources': resource_memory(document), 'memory': document_memory(document),
+                              'undo': self.undo_memory(widget)})
+
+        return stats
+
+    # Sampling the workspaces, the totals are kept as counters of the trace
+    def sample(self):
+        self.workspaces = self.workspace_stats()
+
+        now = time.perf_counter()
+        totals = {key: sum(stats.get(key, 0) for stats in self.workspaces) for key in ('characters', 'blocks', 'resources', 'memory', 'undo')}
+        self.record('counter', 'Workspaces', now, 0, totals)
+        self.sampled.emit(self.workspaces)
+
+    def stall_summary(self):
+        return {'count': self.stall_count, 'total_ms': self.stall_total * 1000, 'longest_ms': self.longest_stall * 1000}
+
+    # Everything recorded, as plain JSON
+    def report(self):
+        return {
+            'meta': {
+                'started': self.started.isoformat(timespec='seconds'),
+                'duration_s': time.perf_counter() - self.origin,
+                'python': platform.python_version(),
+                'qt': QT_VERSION_STR,
+                'platform': platform.platform(),
+                'watchdog_interval_ms': watchdog_interval,
+                'stall_threshold_ms': stall_threshold * 1000,
+            },
+            'actions': {name: stats.as_dict() for name, stats in sorted(self.actions.items())},
+            'stalls': self.stall_summary(),
+            'workspaces': self.workspace_stats(),
+            'events': [{'category': category, 'name': name, 'start_ms': start * 1000, 'duration_ms': duration * 1000, 'details': details}
+                       for category, name, start, duration, details in self.events],
+        }
+
+    # Everything recorded, in the trace event format read by chrome://tracing and Perfetto
+    def chrome_trace(self):
+        process = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': process, 'args': {'name': 'PowerText'}}]
+
+        for category, thread in trace_threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': process, 'tid': thread, 'args': {'name': category.capitalize()}})
+
+        for category, name, start, duration, details in self.events:
+            if category == 'counter':
+                events.append({'name': name, 'ph': 'C', 'pid': process, 'ts': start * 1e6, 'args': details})
+            else:
+                events.append({'name': name, 'cat': category, 'ph': 'X', 'pid': process, 'tid': trace_threads[category],
+                               'ts': start * 1e6, 'dur': duration * 1e6, 'args': details or {}})
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+# Dock showing what the diagnostics recorded, with the exports
+class DiagnosticsPanel(QDockWidget):
+    closed = pyqtSignal()
+
+    def __init__(self, diagnostics, parent=None):
+        super(DiagnosticsPanel, self).__init__('Diagnostics', parent)
+
+        self.diagnostics = diagnostics
+        self.setObjectName('Diagnostics')
+
+        panel = QWidget()
+        layout = QVBoxLayout()
+        panel.setLayout(layout)
+        self.setWidget(panel)
+
+        # Panel Toolbar
+        self.panel_toolbar = QToolBar('Diagnostics Bar', self)
+
+        self.export_json = QAction('Export JSON', self)
+        self.export_json.setStatusTip('Save everything recorded as JSON')
+        self.export_json.triggered.connect(lambda: self.export('Export Diagnostics', 'JSON Files (*.json)', '.json', self.diagnostics.report))
+
+        self.export_trace = QAction('Export Trace', self)
+        self.export_trace.setStatusTip('Save everything recorded as a Chrome trace, for chrome://tracing or Perfetto')
+        self.export_trace.triggered.connect(lambda: self.export('Export Trace', 'Chrome Trace (*.json)', '.json', self.diagnostics.chrome_trace))
+
+        self.clear = QAction('Clear', self)
+        self.clear.setStatusTip('Forget everything recorded so far')
+        self.clear.triggered.connect(self.clear_function)
+
+        self.panel_toolbar.addActions([self.export_json, self.export_trace, self.clear])
+        layout.addWidget(self.panel_toolbar)
+
+        self.summary = QLabel()
+        layout.addWidget(self.summary)
+
+        # Timings of the actions
+        self.action_table = QTableWidget(0, 5)
+        self.action_table.setHorizontalHeaderLabels(['Action', 'Count', 'Last (ms)', 'Mean (ms)', 'Longest (ms)'])
+        self.action_table.setStatusTip('Time every toolbar action kept the editor busy, not counting its dialogs')
+        self.action_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.action_table.verticalHeader().hide()
+        layout.addWidget(self.action_table)
+
+        # Sizes of the workspaces
+        self.workspace_table = QTableWidget(0, 6)
+        self.workspace_table.setHorizontalHeaderLabels(['Tab', 'Characters', 'Blocks', 'Images (MB)', 'Memory (MB)', 'Undo (MB)'])
+        self.workspace_table.setStatusTip('Size of every workspace, hibernated ones as they were when hibernated')
+        self.workspace_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.workspace_table.verticalHeader().hide()
+        layout.addWidget(self.workspace_table)
+
+        self.diagnostics.action_timed.connect(self.refresh)
+        self.diagnostics.stall_detected.connect(self.refresh)
+        self.diagnostics.sampled.connect(self.refresh)
+
+    # Filling a row of a table, numbers are right aligned
+    def set_row(self, table, row, values):
+        for column, value in enumerate(values):
+            item = QTableWidgetItem(value)
+
+            if column:
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            table.setItem(row, column, item)
+
+    def refresh(self, *arguments):
+        if not self.isVisible():
+            return
+
+        stalls = self.diagnostics.stall_summary()
+        self.summary.setText(f'Event loop stalls: {stalls["count"]}, longest {stalls["longest_ms"]:.0f} ms, '
+                             f'{stalls["total_ms"] / 1000:.1f} s in all')
+
+        actions = sorted(self.diagnostics.actions.items(), key=lambda item: item[1].longest, reverse=True)
+        self.action_table.setRowCount(len(actions))
+
+        for row, (name, stats) in enumerate(actions):
+            self.set_row(self.action_table, row, [name, str(stats.count), f'{stats.last * 1000:.1f}',
+                                                  f'{stats.total / stats.count * 1000:.1f}', f'{stats.longest * 1000:.1f}'])
+
+        self.workspace_table.setRowCount(len(self.diagnostics.workspaces))
+
+        for row, stats in enumerate(self.diagnostics.workspaces):
+            if stats['kind'] == 'Workspace':
+                values = [stats['tab'], f'{stats["characters"]:,}', f'{stats["blocks"]:,}',
+                          f'{stats["resources"] / (1024 * 1024):.1f}', f'{stats["memory"] / (1024 * 1024):.1f}',
+                          f'{stats["undo"] / (1024 * 1024):.1f}']
+            elif stats['kind'] == 'Hibernated':
+                values = [stats['tab'], 'Hibernated', '', '', f'{stats["memory"] / (1024 * 1024):.1f}', '']
+            else:
+                values = [stats['tab'], stats['kind'], '', '', '', '']
+
+            self.set_row(self.workspace_table, row, values)
+
+    def showEvent(self, event):
+        super(DiagnosticsPanel, self).showEvent(event)
+        self.refresh()
+
+    # Closing the panel switches diagnostics off
+    def closeEvent(self, event):
+        super(DiagnosticsPanel, self).closeEvent(event)
+        self.closed.emit()
+
+    def clear_function(self):
+        self.diagnostics.clear()
+        self.refresh()
+
+    # Writing a report out, it is made here so it covers everything up to now
+    def export(self, title, file_filter, extension, make_report):
+        path, _ = QFileDialog.getSaveFileName(self, title, 'powertext-diagnostics' + extension, file_filter)
+
+        if not path:
+            return
+
+        if not path.endswith(extension):
+            path += extension
+
+        try:
+            write_atomically(path, json.dumps(make_report(), indent=1))
+        except Exception as e:
+            QMessageBox.warning(self, "Export Error", f"Unable to export diagnostics due to:\n{e}")
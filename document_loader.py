@@ -0,0 +1,343 @@
+# document_loader.py - Background, chunked loading of documents into a workspace.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+
+
+from collections import deque
+import os
+
+from ptxt_format import PtxtReader, is_ptxt, magic
+from image_cache import image_cache
+from plain_workspace import is_plain_editor, replace_document
+
+# Characters decoded per chunk, and how many decoded chunks may wait for the GUI at once
+chunk_size = 256 * 1024
+chunks_in_flight = 2
+
+# Files read at once when many are opened together
+open_threads = 4
+
+
+# Raised inside the reader to stop a document being built when the load is cancelled
+class ReadInterrupted(Exception):
+    pass
+
+
+# File object which reports how far it has been read, and stops when the reader is interrupted
+class ProgressFile:
+    def __init__(self, f, total, reader):
+        self.f = f
+        self.total = total
+        self.reader = reader
+
+    def read(self, size=-1):
+        if self.reader.isInterruptionRequested():
+            raise ReadInterrupted()
+
+        data = self.f.read(size)
+        self.reader.progress_changed.emit(min(self.f.tell(), self.total), self.total)
+        return data
+
+
+# Reading a whole file into a document on the calling thread, for batch jobs with no window to keep responsive.
+# Plain text is never taken for HTML
+def read_document(document, path, encoding='utf-8', plain=False):
+    with open(path, 'rb') as f:
+        if is_ptxt(f.read(len(magic))):
+            f.seek(0)
+            PtxtReader(f).read_document(document)
+            return
+
+    with open(path, 'r', encoding=encoding) as f:
+        text = f.read()
+
+    # Same rich text detection as the reader below, which only looks at the first chunk
+    if not plain and Qt.mightBeRichText(text[:chunk_size]):
+        document.setHtml(text)
+    else:
+        document.setPlainText(text)
+
+
+# Worker thread which reads and decodes a file chunk by chunk
+class DocumentReader(QThread):
+    chunk_read = pyqtSignal(str)
+    document_read = pyqtSignal(object)
+    progress_changed = pyqtSignal(int, int)
+    read_failed = pyqtSignal(str)
+    read_finished = pyqtSignal()
+
+    def __init__(self, path, encoding='utf-8', default_font=None, plain=False, parent=None):
+        super(DocumentReader, self).__init__(parent)
+
+        self.path = path
+        self.encoding = encoding
+        self.plain = plain
+        self.default_font = QFont(default_font) if default_font is not None else QFont()
+
+        # Every emitted chunk takes a slot, the GUI gives it back once the chunk is inserted
+        self.slots = QSemaphore(chunks_in_flight)
+
+    # Giving a slot back after the GUI consumed a chunk
+    def chunk_consumed(self):
+        self.slots.release()
+
+    # Handing a document built on this thread over to the GUI, with its images decoded here at the size they are shown
+    def hand_over(self, document):
+        image_cache().prepare_document(document)
+        document.moveToThread(QCoreApplication.instance().thread())
+        self.document_read.emit(document)
+
+    # Reading the file
+    def run(self):
+        try:
+            total = os.path.getsize(self.path)
+
+            with open(self.path, 'rb') as f:
+                binary = is_ptxt(f.read(len(magic)))
+
+            # Binary documents and HTML are built into a document right here, away from the GUI
+            if binary:
+                document = QTextDocument()
+                document.setDefaultFont(self.default_font)
+
+                with open(self.path, 'rb') as f:
+                    PtxtReader(ProgressFile(f, total, self)).read_document(document)
+                self.hand_over(document)
+                return
+
+            # Text mode decodes incrementally and translates newlines across chunk borders
+            with open(self.path, 'r', encoding=self.encoding) as f:
+                rich_text = False if self.plain else None
+
+                while not self.isInterruptionRequested():
+                    text = f.read(chunk_size)
+
+                    if not text:
+                        break
+
+                    # Same rich text detection as QTextEdit.setText(), which only looks at the start
+                    if rich_text is None:
+                        rich_text = Qt.mightBeRichText(text)
+
+                        if rich_text:
+                            chunks = [text]
+
+                            while not self.isInterruptionRequested() and text:
+                                text = f.read(chunk_size)
+                                chunks.append(text)
+                                self.progress_changed.emit(min(f.buffer.tell(), total), total)
+
+                            if self.isInterruptionRequested():
+                                return
+
+                            document = QTextDocument()
+                            document.setDefaultFont(self.default_font)
+                            document.setHtml(''.join(chunks))
+                            self.hand_over(document)
+                            return
+
+                    # Waiting until the GUI has room for another chunk
+                    while not self.slots.tryAcquire(1, 100):
+                        if self.isInterruptionRequested():
+                            return
+
+                    self.chunk_read.emit(text)
+                    self.progress_changed.emit(min(f.buffer.tell(), total), total)
+        except ReadInterrupted:
+            return
+        except Exception as e:
+            self.read_failed.emit(str(e))
+            return
+
+        if not self.isInterruptionRequested():
+            self.read_finished.emit()
+
+
+# Streams a file into the document of an editor, keeping the GUI responsive
+class DocumentLoad(QObject):
+    progress_changed = pyqtSignal(int, int)
+    load_finished = pyqtSignal(str)
+    load_failed = pyqtSignal(str, str)
+    load_cancelled = pyqtSignal(str)
+
+    def __init__(self, editor, path, encoding='utf-8', parent=None):
+        super(DocumentLoad, self).__init__(parent)
+
+        self.editor = editor
+        self.path = path
+        self.document = None
+        self.cursor = None
+        self.done = False
+
+        self.reader = DocumentReader(path, encoding, editor.document().defaultFont(), is_plain_editor(editor), self)
+        self.reader.chunk_read.connect(self.insert_chunk)
+        self.reader.document_read.connect(self.document_read)
+        self.reader.progress_changed.connect(self.progress_changed)
+        self.reader.read_failed.connect(self.reader_failed)
+        self.reader.read_finished.connect(self.reader_finished)
+
+    # Starting the load
+    def start(self):
+        # The text streams into a document of its own, which only replaces the editor's once complete,
+        # so it is never laid out piece by piece and a cancelled load leaves the workspace untouched
+        self.document = QTextDocument(self.editor)
+        self.document.setDefaultFont(self.editor.document().defaultFont())
+
+        # Loading is not an edit, so there is nothing to undo and no need to record a second copy
+        self.document.setUndoRedoEnabled(False)
+
+        self.cursor = QTextCursor(self.document)
+        self.cursor.beginEditBlock()
+
+        self.editor.setReadOnly(True)
+        self.reader.start()
+
+    # Inserting a chunk which arrived from the reader
+    def insert_chunk(self, text):
+        if self.done:
+            return
+
+        self.cursor.insertText(text)
+        self.reader.chunk_consumed()
+
+    # Finishing the load
+    def reader_finished(self):
+        if self.done:
+            return
+
+        self.cursor.endEditBlock()
+        self.show_document(self.document)
+
+    # Taking over a document the reader built whole, replacing the one meant for streaming
+    def document_read(self, document):
+        if self.done:
+            return
+
+        self.cursor.endEditBlock()
+        self.document.deleteLater()
+        document.setParent(self.editor)
+        self.show_document(document)
+
+    def show_document(self, document):
+        document.setUndoRedoEnabled(True)
+        document.setModified(False)
+        replace_document(self.editor, document)
+
+        self.finish()
+        self.load_finished.emit(self.path)
+
+    # Reporting a failed load
+    def reader_failed(self, message):
+        if self.done:
+            return
+
+        self.discard()
+        self.load_failed.emit(self.path, message)
+
+    # Cancelling the load
+    def cancel(self):
+        if self.done:
+            return
+
+        self.reader.requestInterruption()
+        self.reader.wait()
+        self.discard()
+        self.load_cancelled.emit(self.path)
+
+    # Stopping the reader when the editor itself is gone
+    def abandon(self):
+        if self.done:
+            return
+
+        self.done = True
+        self.reader.requestInterruption()
+        self.reader.wait()
+
+    # Throwing away a partially loaded document
+    def discard(self):
+        self.cursor.endEditBlock()
+        self.document.deleteLater()
+        self.finish()
+
+    # Handing the editor back to the user
+    def finish(self):
+        self.done = True
+        self.cursor = None
+        self.document = None
+        self.editor.setReadOnly(False)
+
+
+# Loads of many files with only a few reading at once, the workspace of a file made only when its turn comes
+class BatchOpen(QObject):
+    progress_changed = pyqtSignal(int, int)
+    batch_finished = pyqtSignal(list)
+
+    def __init__(self, paths, workers=open_threads, parent=None):
+        super(BatchOpen, self).__init__(parent)
+
+        self.queued = deque(paths)
+        self.total = len(paths)
+        self.workers = max(1, workers)
+        self.running = []
+        self.results = []
+        self.cancelled = False
+
+        # How the load of a file is started, the owner makes the workspace it streams into
+        self.load = lambda path: None
+
+    def start(self):
+        self.start_next()
+
+    # Starting queued loads while there are free workers
+    def start_next(self):
+        while self.queued and len(self.running) < self.workers and not self.cancelled:
+            path = self.queued.popleft()
+            load = self.load(path)
+
+            if load is None:
+                self.results.append((path, 'No workspace could be made for it'))
+                continue
+
+            load.load_finished.connect(lambda path, load=load: self.load_ended(load, path, None))
+            load.load_failed.connect(lambda path, message, load=load: self.load_ended(load, path, message))
+            load.load_cancelled.connect(lambda path, load=load: self.load_ended(load, path, 'Cancelled'))
+            self.running.append(load)
+
+        self.progress_changed.emit(len(self.results), self.total)
+
+        if not self.running and (not self.queued or self.cancelled):
+            self.results.extend((path, 'Cancelled') for path in self.queued)
+            self.queued.clear()
+            self.batch_finished.emit(self.results)
+
+    def load_ended(self, load, path, error):
+        if load not in self.running:
+            return
+
+        self.running.remove(load)
+        self.results.append((path, error))
+        self.start_next()
+
+    # Leaving the queued files unopened, the running loads finish or are cancelled on their own
+    def cancel(self):
+        self.cancelled = True
+
+        if not self.running:
+            self.start_next()
@@ -0,0 +1,67 @@
+# document_model.py - Keeping what is known of the document of every workspace with the workspace itself.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Every workspace has a model of the file its document belongs to, kept by its editor rather than by the place of
+# its tab, which changes whenever tabs are moved or closed. The model counts the edits made to the document, so a
+# save knows whether it wrote the latest of them, and a workspace whose document is as it was last saved or
+# opened is left alone by Save All. An editor handed another document, as when it is hibernated or a file is
+# loaded into it, has not been edited by that.
+
+# Libraries required to be imported
+from document_saver import document_format
+
+
+# What is known of the document of a workspace
+class DocumentModel:
+    __slots__ = ('path', 'format', 'encoding', 'modified', 'revision', 'saved_revision', 'document')
+
+    def __init__(self, document, path=None, encoding='utf-8'):
+        self.path = None
+        self.format = None
+        self.encoding = encoding
+        self.modified = False
+        self.revision = 0
+        self.saved_revision = 0
+        self.document = document
+        self.set_path(path)
+
+    # Following the file the document is saved to, its format goes by the name of the file
+    def set_path(self, path):
+        self.path = path
+        self.format = document_format(path) if path else None
+
+    # Noting a change of the editor's document, the editor being handed another document is not an edit
+    def contents_changed(self, document):
+        if document is not self.document:
+            self.document = document
+            return
+
+        self.revision += 1
+        self.modified = document.isModified()
+
+    # The document is the file at a path as it is now, or nothing at all when there is no path
+    def reset(self, path=None):
+        self.set_path(path)
+        self.modified = False
+        self.saved_revision = self.revision
+
+    # A write which started at a revision is on disk, the document is saved unless it was edited meanwhile
+    def saved(self, revision):
+        self.saved_revision = revision
+
+        if revision == self.revision:
+            self.modified = False
+        return not self.modified
@@ -0,0 +1,250 @@
+# document_saver.py - Saving documents off the GUI thread without ever leaving a half-written file.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+from PyQt6 import sip
+
+
+from collections import deque
+import io
+import os
+import shutil
+import tempfile
+
+from ptxt_format import write_ptxt
+
+# Number of documents Save All writes at the same time
+save_threads = 4
+
+# Permissions new files are created with, read once since the umask can only be read by changing it
+file_umask = os.umask(0)
+os.umask(file_umask)
+
+
+# Format a document is written in for a path
+def document_format(path):
+    if path.endswith('.txt'):
+        return 'txt'
+    elif path.endswith('.ptxt'):
+        return 'ptxt'
+    else:
+        return 'html'
+
+
+# Turning a document into what gets written for a path
+def serialize_document(document, path):
+    if document_format(path) == 'txt':
+        return document.toPlainText()
+    elif document_format(path) == 'ptxt':
+        data = io.BytesIO()
+        write_ptxt(document, data)
+        return data.getvalue()
+    else:
+        return document.toHtml()
+
+
+# Writing a file through a temporary file in the same folder, so the old file stays intact until the new one is complete
+def write_atomically(path, data, encoding='utf-8'):
+    folder = os.path.dirname(os.path.abspath(path))
+    handle, temporary_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=folder)
+
+    try:
+        # Text gets encoded, bytes are written as they are
+        with open(handle, 'wb') if isinstance(data, bytes) else open(handle, 'w', encoding=encoding) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Keeping the permissions of the file being replaced, or giving a new file the ones open() would have
+        if os.path.exists(path):
+            shutil.copymode(path, temporary_path)
+        else:
+            os.chmod(temporary_path, 0o666 & ~file_umask)
+
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+    # Making the rename itself durable, where the platform allows opening folders
+    if hasattr(os, 'O_DIRECTORY'):
+        folder_handle = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(folder_handle)
+        finally:
+            os.close(folder_handle)
+
+
+# Worker thread which writes a serialized snapshot of a document
+class SaveWriter(QThread):
+    def __init__(self, text, path, encoding='utf-8', parent=None):
+        super(SaveWriter, self).__init__(parent)
+
+        self.text = text
+        self.path = path
+        self.encoding = encoding
+        self.error = None
+
+    def run(self):
+        try:
+            write_atomically(self.path, self.text, self.encoding)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.text = None
+
+
+# Saves of one editor, one write at a time, with saves requested meanwhile coalesced into the next write
+class DocumentSaver(QObject):
+    save_started = pyqtSignal(str)
+    save_finished = pyqtSignal(str)
+    save_failed = pyqtSignal(str, str)
+
+    def __init__(self, editor, parent=None):
+        super(DocumentSaver, self).__init__(parent)
+
+        self.editor = editor
+        self.writer = None
+        self.pending = None
+
+        # Where the document to write is read from, the owner may keep it elsewhere for a while
+        self.document = lambda editor: editor.document()
+
+    # Requesting a save of the editor's current contents
+    def save(self, path, encoding='utf-8'):
+        if self.writer is not None:
+            # Only the newest request matters, and it is taken once the current write is done
+            self.pending = (path, encoding)
+        else:
+            self.start_writing(path, encoding)
+
+    def start_writing(self, path, encoding):
+        self.save_started.emit(path)
+
+        # The snapshot is the serialized text, QTextDocument.clone() costs several times more than serializing.
+        # A document kept elsewhere, such as a scratch file, may not be readable, which fails the save
+        try:
+            text = serialize_document(self.document(self.editor), path)
+        except Exception as e:
+            self.save_failed.emit(path, str(e))
+            return
+
+        writer = SaveWriter(text, path, encoding, self)
+        writer.finished.connect(lambda: self.writer_finished(writer))
+        self.writer = writer
+        writer.start()
+
+    def writer_finished(self, writer):
+        # A writer already handled by flush()
+        if writer is not self.writer:
+            return
+
+        self.writer = None
+        writer.deleteLater()
+
+        if writer.error is None:
+            self.save_finished.emit(writer.path)
+        else:
+            self.save_failed.emit(writer.path, writer.error)
+
+        if self.pending is not None:
+            (path, encoding), self.pending = self.pending, None
+            self.start_writing(path, encoding)
+
+    # Whether a write is running or waiting
+    def busy(self):
+        return self.writer is not None
+
+    # Finishing every outstanding write before the application quits
+    def flush(self):
+        while self.writer is not None:
+            self.writer.wait()
+            self.writer_finished(self.writer)
+
+
+# Saves of several editors, a few written at the same time, each through the saver of its editor
+class BatchSave(QObject):
+    progress_changed = pyqtSignal(int, int)
+    batch_finished = pyqtSignal(list)
+
+    def __init__(self, jobs, workers=save_threads, parent=None):
+        super(BatchSave, self).__init__(parent)
+
+        self.queued = deque(jobs)
+        self.total = len(jobs)
+        self.workers = max(1, workers)
+        self.running = []
+        self.results = []
+
+        # Saver of an editor, the owner keeps one for every editor it saves
+        self.saver = lambda editor: None
+
+    def start(self):
+        self.start_next()
+
+    # Requesting queued saves while there are free workers
+    def start_next(self):
+        while self.queued and len(self.running) < self.workers:
+            editor, path, encoding = self.queued.popleft()
+
+            if sip.isdeleted(editor):
+                self.results.append((path, 'The workspace was closed'))
+                continue
+
+            self.request(editor, path, encoding)
+
+        self.progress_changed.emit(len(self.results), self.total)
+
+        if not self.running and not self.queued:
+            self.batch_finished.emit(self.results)
+
+    # A save is done once a write which started after it was requested is done, a write already running
+    # when it was requested holds older contents
+    def request(self, editor, path, encoding):
+        job = {'started': False}
+
+        def started(written):
+            job['started'] = job['started'] or written == path
+
+        def ended(written, error):
+            if not job['started'] or written != path:
+                return
+
+            for signal, slot in connections:
+                signal.disconnect(slot)
+
+            self.running.remove(job)
+            self.results.append((path, error))
+            self.start_next()
+
+        saver = self.saver(editor)
+        connections = [(saver.save_started, started), (saver.save_finished, lambda written: ended(written, None)),
+                       (saver.save_failed, ended)]
+
+        for signal, slot in connections:
+            signal.connect(slot)
+
+        self.running.append(job)
+        saver.save(path, encoding)
+
+    # Requesting every queued save at once, so the savers can finish them before the application quits
+    def flush(self):
+        self.workers = self.total
+        self.start_next()
@@ -0,0 +1,293 @@
+# formatting.py - Applying character formats to selections of any size as a single undo step.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Formatting a selection is cheap for the document itself, the time goes into the layout, which lays out every
+# changed block again before the call returns. Only a change of the whole document is laid out lazily, a screen
+# first and the rest in the background, and a document without a page size is not laid out at all. Large
+# selections are therefore formatted with the page size taken away, and putting it back lays the document out
+# lazily from the top. Undoing or redoing that step is done the same way.
+#
+# Anything which asks where text is, such as the editor blinking its cursor or repainting its selection, lays
+# the document out up to that text at once. The editor is therefore made read-only, which stops the cursor
+# blinking, and given its cursor before the change, while the layout is still whole. Until the lazy layout has
+# caught up the view keeps its old picture, and an undo or redo waits for it.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+
+
+import time
+
+# Selections with at least this many characters are formatted with the layout set aside
+deferred_layout_characters = 50000
+
+# How often a deferred layout is checked for having reached the text in view, in milliseconds
+layout_check_interval = 20
+
+# Longest the view waits for the layout before scrolling regardless, in seconds
+longest_layout_wait = 10
+
+# Property of a document holding its undo counts right before and right after its last large formatting step,
+# and where the formatted text starts
+large_step_property = 'powertext_large_format_step'
+
+
+# Text kept in view while a deferred layout catches up with it
+class LayoutWait:
+    __slots__ = ('document', 'position', 'offset', 'read_only', 'shown', 'queued', 'timer', 'deadline')
+
+    def __init__(self, document, position, offset, read_only, timer):
+        self.document = document
+        self.position = position
+        self.offset = offset
+        self.read_only = read_only
+        self.shown = False
+        self.queued = None
+        self.timer = timer
+        self.deadline = time.monotonic() + longest_layout_wait
+
+
+# One format made of several, so they are applied in a single pass over the selection
+def composite_format(formats):
+    composite = QTextCharFormat()
+
+    for text_format in formats:
+        composite.merge(text_format)
+
+    return composite
+
+
+# Whether the layout has reached a block yet
+def is_laid_out(block):
+    return block.layout().lineCount() > 0
+
+
+# Applies formats to the selection of editors, and undoes large formatting steps without the layout stalling
+class FormattingEngine(QObject):
+    def __init__(self, parent=None):
+        super(FormattingEngine, self).__init__(parent)
+
+        # Editors waiting for a deferred layout
+        self.waiting = {}
+
+    # Catching Undo and Redo of the editor, only large formatting steps are handled here
+    def watch(self, editor):
+        editor.installEventFilter(self)
+        editor.destroyed.connect(lambda: self.waiting.pop(editor, None))
+
+    # Applying all the formats to the selection at once as one undo step, or to what is typed next without one
+    def apply(self, editor, *formats):
+        composite = composite_format(formats)
+        cursor = editor.textCursor()
+
+        if not cursor.hasSelection():
+            editor.mergeCurrentCharFormat(composite)
+            return
+
+        if cursor.selectionEnd() - cursor.selectionStart() < deferred_layout_characters and editor not in self.waiting:
+            cursor.mergeCharFormat(composite)
+            return
+
+        document = editor.document()
+        before = document.availableUndoSteps()
+
+        def merge():
+            cursor.beginEditBlock()
+            cursor.mergeCharFormat(composite)
+            cursor.endEditBlock()
+
+        self.edit(editor, merge)
+        document.setProperty(large_step_property, [before, document.availableUndoSteps(), cursor.selectionStart()])
+
+    # Running any other change of an editor's document, with the layout set aside when the document is large
+    def edit(self, editor, change):
+        document = editor.document()
+
+        # A plain text editor lays out only the lines in view, so its changes are quick at any size
+        if not isinstance(editor, QTextEdit):
+            change()
+            return
+
+        if document.characterCount() < deferred_layout_characters and editor not in self.waiting:
+            change()
+            return
+
+        # An editor out of sight has no view to keep, its document is laid out again once it is shown
+        if not editor.isVisible() and editor not in self.waiting:
+            page_size = document.pageSize()
+            document.setPageSize(QSizeF())
+
+            try:
+                change()
+            finally:
+                document.setPageSize(page_size)
+            return
+
+        position, offset = self.text_in_view(editor)
+        self.without_layout(editor, change, position, offset)
+
+    # Undoing or redoing a large formatting step. The cursor moves to the start of the formatted text, as
+    # wherever the editor puts it gets laid out up to at once
+    def undo(self, editor):
+        self.step(editor, editor.document().undo)
+
+    def redo(self, editor):
+        self.step(editor, editor.document().redo)
+
+    def step(self, editor, undo_or_redo):
+        document = editor.document()
+
+        cursor = QTextCursor(document)
+        cursor.setPosition(min(document.property(large_step_property)[2], document.characterCount() - 1))
+        editor.setTextCursor(cursor)
+
+        self.edit(editor, undo_or_redo)
+
+    # Position of the text at the top of the view and how far it is scrolled past, an earlier deferred
+    # layout which is still catching up keeps the text it was waiting for
+    def text_in_view(self, editor):
+        if editor in self.waiting:
+            return self.waiting[editor].position, self.waiting[editor].offset
+
+        position = editor.cursorForPosition(QPoint(0, 0)).position()
+        return position, editor.verticalScrollBar().value() - self.position_top(editor.document(), position)
+
+    # Running a change with the page size taken away, nothing is laid out until it is put back and then the
+    # whole document is laid out lazily while the view waits
+    def without_layout(self, editor, change, position, offset):
+        document = editor.document()
+
+        if editor in self.waiting:
+            read_only = self.stop_waiting(editor).read_only
+        else:
+            read_only = editor.isReadOnly()
+            editor.setReadOnly(True)
+
+        editor.viewport().setUpdatesEnabled(False)
+
+        page_size = document.pageSize()
+        document.setPageSize(QSizeF())
+
+        try:
+            change()
+        finally:
+            document.setPageSize(page_size)
+
+        self.waiting[editor] = LayoutWait(document, min(position, document.characterCount() - 1), offset, read_only, QTimer(editor))
+        self.waiting[editor].timer.timeout.connect(lambda: self.check_layout(editor))
+        self.waiting[editor].timer.start(layout_check_interval)
+        self.check_layout(editor)
+
+    # Showing the text which was in view once the layout reaches it, and handing the editor back once
+    # the layout reaches its cursor
+    def check_layout(self, editor):
+        wait = self.waiting[editor]
+
+        # A workspace hibernated meanwhile has another document, which stays read-only
+        if editor.document() is not wait.document:
+            self.stop_waiting(editor)
+            editor.viewport().setUpdatesEnabled(True)
+            return
+
+        timed_out = time.monotonic() > wait.deadline
+
+        if not wait.shown and (is_laid_out(self.anchor_block(wait.document, wait.position)[0]) or timed_out):
+            editor.verticalScrollBar().setValue(round(self.position_top(wait.document, wait.position) + wait.offset))
+            editor.viewport().setUpdatesEnabled(True)
+            editor.viewport().update()
+            wait.shown = True
+
+        if wait.shown and (is_laid_out(editor.textCursor().block()) or timed_out):
+            self.stop_waiting(editor)
+            editor.setReadOnly(wait.read_only)
+
+            if wait.queued is None:
+                return
+
+            if self.is_large_step(wait.document, wait.queued):
+                self.step(editor, wait.document.redo if wait.queued else wait.document.undo)
+            elif wait.queued:
+                editor.redo()
+            else:
+                editor.undo()
+
+    def stop_waiting(self, editor):
+        wait = self.waiting.pop(editor)
+        wait.timer.stop()
+        wait.timer.deleteLater()
+        return wait
+
+    # Block the top of the text at a position is measured by, inside a table it is the block before the
+    # table, as measuring the table itself would lay out the whole document. Cursors are made from blocks,
+    # moving one to a position would lay the document out up to it
+    def anchor_block(self, document, position):
+        block = document.findBlock(position)
+        frame = QTextCursor(block).currentFrame()
+
+        if frame == document.rootFrame():
+            return block, False
+
+        while frame.parentFrame() != document.rootFrame():
+            frame = frame.parentFrame()
+
+        return document.findBlock(frame.firstPosition() - 1), True
+
+    # Top of the text at a position, laying out only up to it
+    def position_top(self, document, position):
+        block, before_table = self.anchor_block(document, position)
+        rect = document.documentLayout().blockBoundingRect(block)
+        return rect.bottom() if before_table else rect.top()
+
+    # Keeping the undo counts of a document's last large formatting step in line with its history once the oldest
+    # steps of the history were dropped, the step itself may have been among them
+    def history_trimmed(self, document, dropped):
+        steps = document.property(large_step_property)
+
+        if steps:
+            document.setProperty(large_step_property, [steps[0] - dropped, steps[1] - dropped, steps[2]] if steps[0] >= dropped else None)
+
+    # Whether the next undo or redo of a document is its last large formatting step, the undo
+    # count is the same before and after it only while nothing else was done in between
+    def is_large_step(self, document, redo):
+        steps = document.property(large_step_property)
+
+        if not steps:
+            return False
+        if redo:
+            return document.isRedoAvailable() and document.availableUndoSteps() == steps[0]
+        return document.isUndoAvailable() and document.availableUndoSteps() == steps[1]
+
+    # Undo and Redo while the editor is read-only waiting for the layout are done once it has caught up
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.KeyPress and isinstance(watched, QTextEdit) and (not watched.isReadOnly() or watched in self.waiting):
+            for redo, key in [(False, QKeySequence.StandardKey.Undo), (True, QKeySequence.StandardKey.Redo)]:
+                if not event.matches(key):
+                    continue
+
+                if watched in self.waiting:
+                    self.waiting[watched].queued = redo
+                    return True
+
+                if self.is_large_step(watched.document(), redo):
+                    if redo:
+                        self.redo(watched)
+                    else:
+                        self.undo(watched)
+                    return True
+
+        return False
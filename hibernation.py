@@ -0,0 +1,249 @@
+# hibernation.py - Offloading workspaces which are not in use to disk, and bringing them back when selected.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+from PyQt6 import sip
+
+
+import os
+import shutil
+import tempfile
+import time
+
+from ptxt_format import read_ptxt, write_ptxt, PtxtError
+from image_cache import image_cache
+from plain_workspace import workspace_editors, replace_document
+
+# Workspaces not selected for this long are hibernated
+default_idle_minutes = 10
+
+# Estimated memory the live workspaces may take before the least recently used ones are hibernated
+default_memory_budget = 512 * 1024 * 1024
+
+# How often idle workspaces are looked for
+check_interval = 60 * 1000
+
+# Rough cost of a document in memory: its text is UTF-16, and every block carries its own layout
+bytes_per_character = 2
+bytes_per_block = 256
+
+
+# Estimated memory a document takes
+def document_memory(document):
+    return document.characterCount() * bytes_per_character + document.blockCount() * bytes_per_block
+
+
+# What is remembered of a hibernated workspace
+class HibernatedTab:
+    __slots__ = ('scratch_path', 'cursor_position', 'cursor_anchor', 'horizontal_scroll', 'vertical_scroll', 'modified', 'memory')
+
+    def __init__(self, scratch_path, editor, memory):
+        cursor = editor.textCursor()
+
+        self.scratch_path = scratch_path
+        self.cursor_position = cursor.position()
+        self.cursor_anchor = cursor.anchor()
+        self.horizontal_scroll = editor.horizontalScrollBar().value()
+        self.vertical_scroll = editor.verticalScrollBar().value()
+        self.modified = editor.document().isModified()
+        self.memory = memory
+
+
+# Hibernates the editors of a tab widget which have not been used for a while
+class HibernationManager(QObject):
+    stats_changed = pyqtSignal(int, int)
+    restore_failed = pyqtSignal(object, str)
+
+    def __init__(self, tabs, idle_minutes=default_idle_minutes, memory_budget=default_memory_budget, parent=None):
+        super(HibernationManager, self).__init__(parent)
+
+        self.tabs = tabs
+        self.idle_seconds = idle_minutes * 60
+        self.memory_budget = memory_budget
+        self.scratch_folder = None
+
+        # Editors which may not be hibernated right now, such as ones still loading
+        self.busy = lambda editor: False
+
+        self.last_used = {}
+        self.hibernated = {}
+
+        self.tabs.currentChanged.connect(self.current_changed)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check)
+        self.timer.start(check_interval)
+
+    # Restoring the selected workspace and noting when it was used
+    def current_changed(self, index):
+        widget = self.tabs.widget(index)
+
+        if isinstance(widget, workspace_editors):
+            if widget in self.hibernated:
+                self.restore(widget)
+            self.last_used[widget] = time.monotonic()
+
+        self.check_budget()
+
+    # Hibernating every workspace which has been idle for too long, then any over the budget
+    def check(self):
+        now = time.monotonic()
+
+        for editor in self.candidates():
+            if now - self.last_used.get(editor, now) >= self.idle_seconds:
+                self.hibernate(editor)
+
+        self.check_budget()
+
+    def check_budget(self):
+        live = self.candidates()
+        used = sum(document_memory(editor.document()) for editor in live)
+
+        for editor in sorted(live, key=lambda editor: self.last_used.get(editor, 0)):
+            if used <= self.memory_budget:
+                break
+
+            memory = document_memory(editor.document())
+            if self.hibernate(editor):
+                used -= memory
+
+    # Editors which could be hibernated, which excludes the one in view
+    def candidates(self):
+        current = self.tabs.currentWidget()
+        editors = []
+
+        for index in range(self.tabs.count()):
+            widget = self.tabs.widget(index)
+
+            if isinstance(widget, workspace_editors) and widget is not current and widget not in self.hibernated:
+                self.last_used.setdefault(widget, time.monotonic())
+                editors.append(widget)
+
+        return editors
+
+    # Writing a workspace out to the scratch folder and freeing its document
+    def hibernate(self, editor):
+        if editor in self.hibernated or self.busy(editor) or editor.document().isEmpty():
+            return False
+
+        if self.scratch_folder is None:
+            self.scratch_folder = tempfile.mkdtemp(prefix='powertext-hibernation-')
+
+        document = editor.document()
+        scratch_path = os.path.join(self.scratch_folder, f'{id(editor):x}.ptxt')
+
+        try:
+            with open(scratch_path, 'wb') as f:
+                write_ptxt(document, f, compress=False)
+        except OSError:
+            return False
+
+        self.hibernated[editor] = HibernatedTab(scratch_path, editor, document_memory(document))
+
+        # An empty document takes the place of the old one, which is freed with it
+        empty = QTextDocument(editor)
+        empty.setDefaultFont(document.defaultFont())
+        replace_document(editor, empty)
+        editor.setReadOnly(True)
+
+        self.emit_stats()
+        return True
+
+    # Reading a hibernated workspace back in, with its cursor and scroll position. A scratch file which cannot be
+    # read leaves the workspace hibernated, so it can be tried again
+    def restore(self, editor):
+        tab = self.hibernated[editor]
+
+        document = QTextDocument(editor)
+        document.setDefaultFont(editor.document().defaultFont())
+        document.setUndoRedoEnabled(False)
+
+        try:
+            with open(tab.scratch_path, 'rb') as f:
+                read_ptxt(document, f)
+        except (OSError, ValueError, PtxtError) as e:
+            document.deleteLater()
+            self.restore_failed.emit(editor, str(e))
+            return False
+
+        del self.hibernated[editor]
+        os.remove(tab.scratch_path)
+        image_cache().prepare_document(document)
+
+        document.setUndoRedoEnabled(True)
+        document.setModified(tab.modified)
+        replace_document(editor, document)
+        editor.setReadOnly(False)
+
+        cursor = QTextCursor(document)
+        cursor.setPosition(min(tab.cursor_anchor, document.characterCount() - 1))
+        cursor.setPosition(min(tab.cursor_position, document.characterCount() - 1), QTextCursor.MoveMode.KeepAnchor)
+        editor.setTextCursor(cursor)
+
+        # Scrolling has to wait until the document has been laid out
+        QTimer.singleShot(0, lambda: self.restore_scroll(editor, tab))
+
+        self.emit_stats()
+        return True
+
+    def restore_scroll(self, editor, tab):
+        if not sip.isdeleted(editor):
+            editor.horizontalScrollBar().setValue(tab.horizontal_scroll)
+            editor.verticalScrollBar().setValue(tab.vertical_scroll)
+
+    # A copy of an editor's document, read from its scratch file while it is hibernated
+    def snapshot(self, editor):
+        tab = self.hibernated.get(editor)
+
+        if tab is None:
+            return editor.document().clone()
+
+        document = QTextDocument()
+        document.setDefaultFont(editor.document().defaultFont())
+
+        with open(tab.scratch_path, 'rb') as f:
+            read_ptxt(document, f)
+        return document
+
+    # Dropping what is kept of a workspace which was closed
+    def forget(self, editor):
+        self.last_used.pop(editor, None)
+        tab = self.hibernated.pop(editor, None)
+
+        if tab is not None:
+            if os.path.exists(tab.scratch_path):
+                os.remove(tab.scratch_path)
+            self.emit_stats()
+
+    # Removing the scratch folder once the application quits
+    def clean_up(self):
+        if self.scratch_folder is not None:
+            shutil.rmtree(self.scratch_folder, ignore_errors=True)
+            self.scratch_folder = None
+        self.hibernated.clear()
+
+    # Number of hibernated workspaces and the estimated memory reclaimed by hibernating them
+    def hibernated_count(self):
+        return len(self.hibernated)
+
+    def memory_reclaimed(self):
+        return sum(tab.memory for tab in self.hibernated.values())
+
+    def emit_stats(self):
+        self.stats_changed.emit(self.hibernated_count(), self.memory_reclaimed())
@@ -0,0 +1,124 @@
+# icon_pack.py - The toolbar icons packed into one pre-scaled image, so startup decodes a single small file.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage: python icon_pack.py, run again whenever an icon in the icons folder changes
+
+# Libraries required to be imported
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+
+
+import math
+import os
+import sys
+
+# Folder of the icons and the pack made from them
+icon_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'icons')
+pack_path = os.path.join(icon_folder, 'toolbar-pack.png')
+
+# Size of every icon in the pack, twice the toolbar size so that high DPI screens stay sharp
+pack_icon_size = 64
+
+# Key of the list of packed icons inside the PNG, every one with the size of its file
+names_key = 'PowerText icons'
+
+
+# Packing every PNG icon of the folder into a grid, scaled down once here instead of at every startup
+def pack_icons(folder=icon_folder, path=pack_path, size=pack_icon_size):
+    names = sorted(name for name in os.listdir(folder) if name.lower().endswith('.png') and os.path.join(folder, name) != path)
+    columns = max(1, math.ceil(math.sqrt(len(names))))
+    rows = max(1, math.ceil(len(names) / columns))
+
+    sheet = QImage(columns * size, rows * size, QImage.Format.Format_ARGB32_Premultiplied)
+    sheet.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(sheet)
+    painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+
+    for index, name in enumerate(names):
+        image = QImage(os.path.join(folder, name))
+        image = image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+
+        x = index % columns * size + (size - image.width()) // 2
+        y = index // columns * size + (size - image.height()) // 2
+        painter.drawImage(x, y, image)
+
+    painter.end()
+
+    sheet.setText(names_key, ','.join(f'{name}:{os.path.getsize(os.path.join(folder, name))}' for name in names))
+
+    if not sheet.save(path, 'PNG'):
+        raise OSError('Unable to write ' + path)
+
+    return names
+
+
+# Icons cut from the pack on request, the pack itself is decoded once on the first request
+class IconPack:
+    def __init__(self, path=pack_path, size=pack_icon_size):
+        self.path = path
+        self.size = size
+        self.sheet = None
+        self.positions = {}
+        self.icons = {}
+
+    def load(self):
+        self.sheet = QImage()
+
+        if not os.path.exists(self.path) or not self.sheet.load(self.path):
+            return
+
+        entries = [entry.rsplit(':', 1) for entry in self.sheet.text(names_key).split(',') if ':' in entry]
+        columns = max(1, self.sheet.width() // self.size)
+
+        # An icon whose file changed size since the pack was made is read from its own file
+        for index, (name, size) in enumerate(entries):
+            source = os.path.join(os.path.dirname(self.path), name)
+
+            if os.path.exists(source) and str(os.path.getsize(source)) == size:
+                self.positions[name.lower()] = QRect(index % columns * self.size, index // columns * self.size, self.size, self.size)
+
+    # Icon of a file, by its name in the pack when it is packed, from the file itself otherwise
+    def icon(self, path):
+        if self.sheet is None:
+            self.load()
+
+        name = os.path.basename(path).lower()
+
+        if name not in self.icons:
+            if name in self.positions:
+                self.icons[name] = QIcon(QPixmap.fromImage(self.sheet.copy(self.positions[name])))
+            else:
+                self.icons[name] = QIcon(path)
+
+        return self.icons[name]
+
+
+shared_pack = None
+
+
+def icon(path):
+    global shared_pack
+
+    if shared_pack is None:
+        shared_pack = IconPack()
+
+    return shared_pack.icon(path)
+
+
+if __name__ == '__main__':
+    application = QGuiApplication(sys.argv)
+    packed = pack_icons()
+    print(f'Packed {len(packed)} icons into {pack_path}')
@@ -0,0 +1,250 @@
+# image_cache.py - A process-wide cache of decoded, downscaled images shared by every workspace.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+from PyQt6 import sip
+
+
+from collections import OrderedDict
+import os
+import threading
+
+# Memory the decoded images may take before the least recently used ones are dropped
+default_budget = 256 * 1024 * 1024
+
+# Images are decoded in the background a couple at a time
+decode_threads = 2
+
+# Prefix of the name the data of an embedded image is kept under, once the document shows it shrunk
+original_prefix = 'original:'
+
+
+# Runnable which decodes one image for the cache
+class ImageDecode(QRunnable):
+    def __init__(self, cache, key):
+        super(ImageDecode, self).__init__()
+
+        self.cache = cache
+        self.key = key
+
+    def run(self):
+        image = decode_image(*self.key)
+        self.cache.image_decoded.emit(self.key, image)
+
+
+# Decoding a file straight to the size it is shown at, never larger than the file itself
+def decode_image(path, modified, width, height):
+    return read_scaled(QImageReader(path), width, height)
+
+
+def read_scaled(reader, width, height):
+    size = reader.size()
+
+    if width and height and size.isValid() and (size.width() > width or size.height() > height):
+        reader.setScaledSize(QSize(min(width, size.width()), min(height, size.height())))
+
+    return reader.read()
+
+
+# Cache of decoded images keyed by path, modification time and size
+class ImageCache(QObject):
+    image_decoded = pyqtSignal(object, QImage)
+
+    def __init__(self, budget=default_budget, parent=None):
+        super(ImageCache, self).__init__(parent)
+
+        self.budget = budget
+        self.used = 0
+        self.images = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Documents waiting for an image which is still being decoded
+        self.waiting = {}
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(decode_threads)
+        self.image_decoded.connect(self.image_ready)
+
+    # Key of an image shown at a size, in device pixels
+    def key(self, path, width, height):
+        ratio = QGuiApplication.primaryScreen().devicePixelRatio() if QGuiApplication.primaryScreen() else 1.0
+        return (os.path.abspath(path), os.stat(path).st_mtime_ns, round(width * ratio), round(height * ratio))
+
+    # Looking up an image, marking it as the most recently used
+    def get(self, key):
+        with self.lock:
+            image = self.images.get(key)
+
+            if image is not None:
+                self.images.move_to_end(key)
+
+            return image
+
+    # Storing an image and dropping the least recently used ones while over the budget
+    def put(self, key, image):
+        with self.lock:
+            if key in self.images:
+                return
+
+            self.images[key] = image
+            self.used += image.sizeInBytes()
+
+            while self.used > self.budget and len(self.images) > 1:
+                _, dropped = self.images.popitem(last=False)
+                self.used -= dropped.sizeInBytes()
+
+    # Changing the memory budget
+    def set_budget(self, budget):
+        self.budget = budget
+
+        with self.lock:
+            while self.used > self.budget and self.images:
+                _, dropped = self.images.popitem(last=False)
+                self.used -= dropped.sizeInBytes()
+
+    # Decoding on the calling thread, for callers which are in the background already
+    def image(self, path, width=0, height=0):
+        key = self.key(path, width, height)
+        image = self.get(key)
+
+        if image is None:
+            image = decode_image(*key)
+
+            if not image.isNull():
+                self.put(key, image)
+
+        return image
+
+    # Giving a document an image under a name, decoded in the background when it is not cached yet
+    def attach(self, document, name, path, width, height):
+        key = self.key(path, width, height)
+        image = self.get(key)
+
+        if image is not None:
+            document.addResource(QTextDocument.ResourceType.ImageResource, QUrl(name), image)
+            return
+
+        # A transparent stand-in of the same size keeps the document from loading the file itself meanwhile
+        placeholder = QImage(max(1, width), max(1, height), QImage.Format.Format_ARGB32_Premultiplied)
+        placeholder.fill(Qt.GlobalColor.transparent)
+        document.addResource(QTextDocument.ResourceType.ImageResource, QUrl(name), placeholder)
+
+        if key not in self.waiting:
+            self.waiting[key] = []
+            self.pool.start(ImageDecode(self, key))
+        self.waiting[key].append((document, name))
+
+    # Handing a decoded image to every document waiting for it
+    def image_ready(self, key, image):
+        if not image.isNull():
+            self.put(key, image)
+
+        for document, name in self.waiting.pop(key, []):
+            if sip.isdeleted(document) or image.isNull():
+                continue
+
+            document.addResource(QTextDocument.ResourceType.ImageResource, QUrl(name), image)
+
+            # The size comes from the image format, so the document only needs repainting
+            document.documentLayout().update.emit(QRectF(0, 0, 1e9, 1e9))
+
+    # Giving a freshly read document cached images for every image with an explicit size
+    def prepare_document(self, document):
+        for text_format in document.allFormats():
+            if not text_format.isImageFormat():
+                continue
+
+            image_format = text_format.toImageFormat()
+            name = image_format.name()
+            width, height = round(image_format.width()), round(image_format.height())
+
+            # Without an explicit size the layout depends on the size of the image itself, so it is left alone
+            if width <= 0 or height <= 0:
+                continue
+
+            if os.path.isfile(name):
+                image = self.image(name, width, height)
+            else:
+                # Images embedded in the document are only shrunk, from the data they were read as, which Qt
+                # would otherwise decode at full size once they are shown
+                data = document.resource(QTextDocument.ResourceType.ImageResource, QUrl(name))
+
+                if not isinstance(data, QByteArray) or data.isEmpty():
+                    continue
+
+                buffer = QBuffer(data)
+                reader = QImageReader(buffer)
+                size = reader.size()
+
+                if not size.isValid() or (size.width() <= width and size.height() <= height):
+                    continue
+
+                # Saving and exporting use the data, which is far smaller than the image decoded at full size
+                document.addResource(QTextDocument.ResourceType.ImageResource, QUrl(original_prefix + name), data)
+                image = read_scaled(reader, width, height)
+
+            if not image.isNull():
+                document.addResource(QTextDocument.ResourceType.ImageResource, QUrl(name), image)
+
+    # Memory taken by the cached images
+    def memory_used(self):
+        return self.used
+
+
+# The image a document holds under a name at its full size, as an image or as the data it was read from
+def original_image(document, name):
+    original = document.resource(QTextDocument.ResourceType.ImageResource, QUrl(original_prefix + name))
+
+    if isinstance(original, QByteArray) and not original.isEmpty():
+        return original
+    return document.resource(QTextDocument.ResourceType.ImageResource, QUrl(name))
+
+
+# Putting the full size images back into a copy of a document which is printed rather than shown, files are
+# read again as the document only holds them at the size they are shown at
+def restore_originals(document):
+    names = set()
+
+    for text_format in document.allFormats():
+        if text_format.isImageFormat():
+            names.add(text_format.toImageFormat().name())
+
+    for name in names:
+        image = QImage(name) if os.path.isfile(name) else original_image(document, name)
+
+        if (isinstance(image, QImage) and not image.isNull()) or (isinstance(image, QByteArray) and not image.isEmpty()):
+            document.addResource(QTextDocument.ResourceType.ImageResource, QUrl(name), image)
+
+
+# The cache shared by the whole process, made on first use and living on the GUI thread
+shared_cache = None
+shared_cache_lock = threading.Lock()
+
+
+def image_cache():
+    global shared_cache
+
+    with shared_cache_lock:
+        if shared_cache is None:
+            shared_cache = ImageCache()
+
+            if QCoreApplication.instance() is not None:
+                shared_cache.moveToThread(QCoreApplication.instance().thread())
+
+        return shared_cache
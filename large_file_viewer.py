@@ -0,0 +1,245 @@
+# large_file_viewer.py - A read-only viewer for plain-text files too large for a workspace.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+
+
+from array import array
+from bisect import bisect_left
+import mmap
+import os
+
+# Files from this size onwards open in the viewer instead of a workspace
+large_file_size = 64 * 1024 * 1024
+
+# The index remembers how many lines come before every page of the file instead of every line,
+# so finding a line never scans more than one page and the index stays a few MB for a GB file
+page_size = 16 * 1024
+scan_size = 4 * 1024 * 1024
+
+# Longest part of a single line which is shown
+max_line_length = 4096
+
+
+# Worker thread which counts the lines before every page of a mapped file
+class LineIndexer(QThread):
+    progress_changed = pyqtSignal(int, int)
+    index_finished = pyqtSignal()
+
+    def __init__(self, mapped, pages, parent=None):
+        super(LineIndexer, self).__init__(parent)
+
+        self.mapped = mapped
+        self.pages = pages
+        self.newlines = 0
+
+    # Scanning the file
+    def run(self):
+        size = len(self.mapped)
+        position = 0
+
+        while position < size and not self.isInterruptionRequested():
+            block = self.mapped[position:position + scan_size]
+
+            for start in range(0, len(block), page_size):
+                self.pages.append(self.newlines)
+                self.newlines += block.count(b'\n', start, start + page_size)
+
+            position += len(block)
+            self.progress_changed.emit(position, size)
+
+        if not self.isInterruptionRequested():
+            self.index_finished.emit()
+
+
+# Scroll area which paints only the lines in view
+class LineView(QAbstractScrollArea):
+    def __init__(self, mapped, parent=None):
+        super(LineView, self).__init__(parent)
+
+        self.mapped = mapped
+        self.pages = array('Q')
+        self.line_count = 1
+        self.widest_line = 0
+
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.verticalScrollBar().setRange(0, 0)
+        self.horizontalScrollBar().setRange(0, 0)
+
+    # Number of lines which fit in the viewport
+    def visible_lines(self):
+        return max(1, self.viewport().height() // self.fontMetrics().lineSpacing())
+
+    # Updating the scroll range as the index grows
+    def set_line_count(self, line_count):
+        self.line_count = max(1, line_count)
+        self.update_scroll_bars()
+        self.viewport().update()
+
+    def update_scroll_bars(self):
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.setRange(0, max(0, self.line_count - self.visible_lines()))
+        scroll_bar.setPageStep(self.visible_lines())
+        self.horizontalScrollBar().setRange(0, max(0, self.widest_line - self.viewport().width()))
+        self.horizontalScrollBar().setPageStep(self.viewport().width())
+
+    # Byte offset at which a line starts
+    def line_offset(self, line):
+        if line == 0:
+            return 0
+
+        # The last page whose preceding lines are fewer than the wanted line holds its newline
+        page = max(0, bisect_left(self.pages, line) - 1)
+        offset = page * page_size
+
+        for _ in range(line - self.pages[page]):
+            offset = self.mapped.find(b'\n', offset) + 1
+
+            if offset == 0:
+                return len(self.mapped)
+
+        return offset
+
+    # Text of the lines starting from a given line
+    def lines_from(self, line, count):
+        lines = []
+        offset = self.line_offset(line)
+        size = len(self.mapped)
+
+        while len(lines) < count and line + len(lines) < self.line_count and offset <= size:
+            end = self.mapped.find(b'\n', offset)
+
+            if end == -1:
+                end = size
+
+            raw = self.mapped[offset:min(end, offset + max_line_length)]
+            lines.append(raw.decode('utf-8', errors='replace').rstrip('\r').expandtabs(8))
+            offset = end + 1
+
+        return lines
+
+    # Scrolling so that a line is at the top
+    def go_to_line(self, line):
+        self.verticalScrollBar().setValue(max(0, min(line, self.line_count - 1)))
+
+    def resizeEvent(self, event):
+        super(LineView, self).resizeEvent(event)
+        self.update_scroll_bars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    # Painting the lines in view
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(event.rect(), self.palette().base())
+        painter.setPen(self.palette().text().color())
+
+        metrics = self.fontMetrics()
+        line_spacing = metrics.lineSpacing()
+        first = self.verticalScrollBar().value()
+        left = 4 - self.horizontalScrollBar().value()
+
+        widest_line = self.widest_line
+        for row, text in enumerate(self.lines_from(first, self.visible_lines() + 1)):
+            painter.drawText(left, row * line_spacing + metrics.ascent(), text)
+            widest_line = max(widest_line, metrics.horizontalAdvance(text) + 8)
+
+        painter.end()
+
+        # The horizontal range only grows with the widest line seen so far
+        if widest_line != self.widest_line:
+            self.widest_line = widest_line
+            self.update_scroll_bars()
+
+
+# Tab which shows a large file without loading it
+class LargeFileViewer(QWidget):
+    load_requested = pyqtSignal(str)
+
+    def __init__(self, path, parent=None):
+        super(LargeFileViewer, self).__init__(parent)
+
+        self.path = path
+        self.file = open(path, 'rb')
+
+        # A file which is empty cannot be mapped, an empty buffer stands in for it
+        if os.path.getsize(path):
+            self.mapped = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.mapped = b''
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+
+        # Viewer Toolbar
+        self.viewer_toolbar = QToolBar('Viewer Bar', self)
+
+        self.go_to = QAction('Go to Line', self)
+        self.go_to.setShortcut(QKeySequence('Ctrl+G'))
+        self.go_to.setStatusTip('Jump to a line of the file')
+        self.go_to.triggered.connect(self.go_to_function)
+
+        self.load_into_editor = QAction('Load into Editor', self)
+        self.load_into_editor.setStatusTip('Load the whole file into an editable workspace')
+        self.load_into_editor.triggered.connect(lambda: self.load_requested.emit(self.path))
+
+        self.index_status = QLabel('Indexing lines...')
+
+        self.viewer_toolbar.addActions([self.go_to, self.load_into_editor])
+        self.viewer_toolbar.addSeparator()
+        self.viewer_toolbar.addWidget(self.index_status)
+        layout.addWidget(self.viewer_toolbar)
+
+        # Lines of the file
+        self.line_view = LineView(self.mapped, self)
+        self.line_view.setStatusTip('Read-only view of ' + os.path.basename(path))
+        layout.addWidget(self.line_view)
+
+        # Indexing in the background, the part indexed so far is viewable straight away
+        self.indexer = LineIndexer(self.mapped, self.line_view.pages, self)
+        self.indexer.progress_changed.connect(self.index_progress)
+        self.indexer.index_finished.connect(self.index_finished)
+        self.indexer.start()
+
+    # Showing how far the index got
+    def index_progress(self, done, total):
+        self.line_view.set_line_count(self.indexer.newlines + 1)
+        self.index_status.setText(f'Indexing lines... {100 * done // max(total, 1)}%')
+
+    def index_finished(self):
+        self.line_view.set_line_count(self.indexer.newlines + 1)
+        self.index_status.setText(f'{self.line_view.line_count:,} lines')
+
+    # Defining Go to Line
+    def go_to_function(self):
+        line, ok = QInputDialog.getInt(self, 'Go to Line', 'Put the number of the line to jump to.', 1, 1, self.line_view.line_count)
+
+        if ok:
+            self.line_view.go_to_line(line - 1)
+
+    # Releasing the file once the tab goes away
+    def close_file(self):
+        self.indexer.requestInterruption()
+        self.indexer.wait()
+
+        if isinstance(self.mapped, mmap.mmap):
+            self.mapped.close()
+        self.file.close()
@@ -16,13 +16,27 @@
 
 # Libraries required to be imported
 from PyQt6.QtWidgets import *
-from PyQt6.QtWebEngineWidgets import *
 from PyQt6.QtGui import *
 from PyQt6.QtCore import *
-from PyQt6.QtPrintSupport import QPrinter
-from PyQt6.QtPdf import QPdfDocument
-from PyQt6.QtPdfWidgets import QPdfView
 
+from document_loader import DocumentLoad, BatchOpen
+from large_file_viewer import LargeFileViewer, large_file_size
+from document_saver import DocumentSaver, BatchSave
+from document_model import DocumentModel
+from plain_workspace import workspace_editors, is_plain_editor, is_plain_path, replace_document, rich_copy
+from image_cache import image_cache
+from table_engine import TableBuilder, TableImport, large_table_cells
+from hibernation import HibernationManager
+from pdf_viewer import PdfViewer
+from pdf_export import PdfExport, PdfBatchExport
+from formatting import FormattingEngine
+from undo_budget import UndoBudget
+from search import FindReplace, FindReplacePanel
+from autosave import AutosaveManager, recoverable_sessions, recover_workspace
+from session import SessionPlaceholder, default_path as session_path, read_session, write_session, workspace_tab, viewer_tab, pdf_tab, \
+    restore_workspace, restore_viewer, restore_pdf, WORKSPACE, PDF
+from diagnostics import Diagnostics, DiagnosticsPanel, requested as diagnostics_requested
+from icon_pack import icon
 
 import sys
 import os
@@ -45,7 +59,7 @@ class PowerText(QMainWindow):
         self.center = QTabWidget()
         self.center.setDocumentMode(True)
         self.center.tabBarDoubleClicked.connect(self.text_editor_tab)
-        self.center.tabCloseRequested.connect(lambda: self.center.removeTab(self.center.currentIndex()))
+        self.center.tabCloseRequested.connect(self.close_tab)
         self.center.setTabsClosable(True)
         self.center.setMovable(True)
         self.center.setStatusTip('Tabular System')
@@ -56,24 +70,460 @@ class PowerText(QMainWindow):
         self.status_bar.setStatusTip('Status Bar')
         self.setStatusBar(self.status_bar)
 
+        # Formatting of selections of any size as one undo step
+        self.formatting = FormattingEngine(self)
+
+        # Timing of the toolbar actions and of the event loop, only recorded once switched on
+        self.diagnostics = Diagnostics(self.center, self)
+
+        # Journal of every change, for recovering the workspaces after a crash
+        self.autosave = AutosaveManager(self.center, parent=self)
+        self.autosave.write_failed.connect(lambda message: self.status_bar.showMessage('Autosave failed: ' + message, 5000))
+
+        # Undo history of the workspaces, kept within a memory budget
+        self.undo_budget = UndoBudget(self.center, parent=self)
+        self.undo_budget.busy = lambda editor: editor in self.loads or editor in self.formatting.waiting
+        self.undo_budget.edit = self.trim_edit
+        self.undo_budget.hibernate = lambda editor: self.hibernation.hibernate(editor)
+        self.undo_budget.history_trimmed.connect(self.undo_history_trimmed)
+        self.diagnostics.undo_memory = self.undo_budget.memory
+
+        # A variable to keep the model of every workspace's document, keyed by its editor
+        self.documents = {}
+
         # Functions to Run
         self.text_editor_tab()
         self.navigations()
         self.center.currentChanged.connect(self.font_changed)
-
-        # A variable to recall paths from previously opened or saved files
-        self.path = {}
+        self.center.currentChanged.connect(self.open_session_tab)
+        self.center.currentChanged.connect(self.workspace_changed)
 
         # A variable to open PDFs
         self.pdf_path = None
 
+        # A variable to track documents which are still being loaded, keyed by their editor
+        self.loads = {}
+
+        # A variable to keep the background saver of every editor which has been saved
+        self.savers = {}
+
+        # A variable to keep the PDF exports running in the background
+        self.exports = []
+
+        # A variable to keep the Save All batches still writing
+        self.batch_saves = []
+
+        # A variable to keep the tables still being built or imported
+        self.table_jobs = []
+
+        # A variable to keep the batches of files still opening
+        self.batch_opens = []
+
+        # Files and folders dropped on the window are opened
+        self.setAcceptDrops(True)
+
+        # Hibernation of workspaces which are not in use, except while they load or save
+        self.hibernation = HibernationManager(self.center, parent=self)
+        self.hibernation.busy = lambda editor: editor in self.loads or (editor in self.savers and self.savers[editor].busy()) or \
+            editor in self.formatting.waiting or any(job.editor is editor for job in self.table_jobs)
+        self.hibernation.restore_failed.connect(self.restore_failed)
+
+        self.hibernation_status = QLabel()
+        self.hibernation_status.setStatusTip('Workspaces offloaded to disk until they are selected again')
+        self.hibernation_status.hide()
+        self.status_bar.addPermanentWidget(self.hibernation_status)
+        self.hibernation.stats_changed.connect(self.hibernation_changed)
+        self.diagnostics.hibernated = self.hibernation.hibernated.get
+        self.autosave.hibernated = self.hibernation.hibernated.get
+        self.hibernation.stats_changed.connect(self.autosave.documents_changed)
+
+        # Finding and replacing across every workspace, hibernated ones are searched from their scratch files
+        self.find_replace = FindReplace(self.center, self)
+        self.find_replace.hibernated = self.hibernation.hibernated.get
+        self.find_replace.restore = self.hibernation.restore
+        self.find_replace.busy = lambda editor: editor in self.loads
+        self.find_replace.edit = self.formatting.edit
+        self.find_replace_panel = None
+
+        # Find and Replace Action
+        self.find_replace_action = QAction('Find and Replace', self)
+        self.find_replace_action.setShortcut(QKeySequence.StandardKey.Find)
+        self.find_replace_action.setStatusTip('Find and replace text in every workspace')
+        self.find_replace_action.triggered.connect(self.diagnostics.timed('Find and Replace', self.find_replace_function))
+        self.addAction(self.find_replace_action)
+
+        # Diagnostics panel and summary, shown while diagnostics are on
+        self.diagnostics_panel = None
+        self.diagnostics_status = QLabel()
+        self.diagnostics_status.setStatusTip('Time of the last action and the event loop stalls so far, Ctrl+Shift+D for details')
+        self.diagnostics_status.hide()
+        self.status_bar.addPermanentWidget(self.diagnostics_status)
+        self.diagnostics.action_timed.connect(self.diagnostics_changed)
+        self.diagnostics.stall_detected.connect(self.diagnostics_changed)
+
+        # Diagnostics Action, kept off the toolbar as it is for tracking down slowness
+        self.diagnostics_action = QAction('Diagnostics', self)
+        self.diagnostics_action.setShortcut(QKeySequence('Ctrl+Shift+D'))
+        self.diagnostics_action.setStatusTip('Time every action and watch for the editor stalling')
+        self.diagnostics_action.setCheckable(True)
+        self.diagnostics_action.toggled.connect(self.diagnostics_toggled)
+        self.addAction(self.diagnostics_action)
+        self.diagnostics_action.setChecked(diagnostics_requested())
+
     # Text Editor Tab
     def text_editor_tab(self):
         # Text Editor
         self.text_editor = QTextEdit()
-        self.text_editor.setStatusTip('Workspace No. ' + str(1 + self.center.currentIndex()))
-        self.text_editor.setFont(QFont(default_font, default_font_size))
-        self.center.addTab(self.text_editor, 'New Workspace')
+        self.formatting.watch(self.text_editor)
+        self.add_workspace(self.text_editor)
+
+    # Plain Text Editor Tab, for text files which have no formatting to lay out
+    def plain_text_editor_tab(self):
+        self.text_editor = QPlainTextEdit()
+        self.add_workspace(self.text_editor)
+
+    # Workspace Tab of the kind a file opens in
+    def file_editor_tab(self, path):
+        if is_plain_path(path):
+            self.plain_text_editor_tab()
+        else:
+            self.text_editor_tab()
+
+    def add_workspace(self, editor):
+        self.track_workspace(editor)
+        self.show_workspace(editor, 'New Workspace')
+
+    # Following the document of a workspace, which may load before it has a tab
+    def track_workspace(self, editor):
+        editor.setFont(QFont(default_font, default_font_size))
+        editor.viewport().installEventFilter(self)
+        self.autosave.track(editor)
+        self.undo_budget.track(editor)
+        self.documents[editor] = DocumentModel(editor.document())
+        editor.textChanged.connect(lambda: self.contents_changed(editor))
+
+    def show_workspace(self, editor, title):
+        editor.setStatusTip('Workspace No. ' + str(1 + self.center.currentIndex()))
+        self.center.addTab(editor, title)
+
+    # Workspace of the kind a file opens in, without a tab until the file has loaded
+    def file_editor(self, path):
+        if is_plain_path(path):
+            return QPlainTextEdit()
+
+        editor = QTextEdit()
+        self.formatting.watch(editor)
+        return editor
+
+    # Keeping the model of a workspace's document up with its edits
+    def contents_changed(self, editor):
+        if editor in self.documents:
+            self.documents[editor].contents_changed(editor.document())
+
+    # Large File Viewer Tab
+    def large_file_tab(self, path):
+        try:
+            viewer = LargeFileViewer(path)
+        except Exception as e:
+            QMessageBox.warning(self, "Open Document Error", f"Unable to open document due to:\n{e}")
+            return
+
+        viewer.load_requested.connect(self.load_into_editor)
+        self.center.setCurrentIndex(self.center.addTab(viewer, 'View: ' + str(os.path.basename(path))))
+
+    # Defining loading a viewed file into a new workspace, only ever done on request
+    def load_into_editor(self, path):
+        self.file_editor_tab(path)
+        self.center.setCurrentWidget(self.text_editor)
+        self.load_document(self.text_editor, path)
+
+    # Trimming an undo history undoes and redoes its steps, which leaves the document as it was, so a save which
+    # started before it still leaves the document saved
+    def trim_edit(self, editor, change):
+        model = self.documents.get(editor)
+        revision = model.revision if model is not None else None
+        self.formatting.edit(editor, change)
+
+        if model is not None:
+            model.revision = revision
+
+    # Following a workspace whose oldest undo steps were dropped to stay within memory
+    def undo_history_trimmed(self, editor, dropped):
+        self.formatting.history_trimmed(editor.document(), dropped)
+
+        if editor in self.documents:
+            self.documents[editor].modified = editor.document().isModified()
+
+        index = self.center.indexOf(editor)
+
+        if index != -1 and dropped:
+            self.status_bar.showMessage('Dropped the oldest undo steps of ' + self.center.tabText(index) + ' to stay within memory', 5000)
+
+    # Showing how many workspaces are hibernated
+    def hibernation_changed(self, count, memory):
+        self.hibernation_status.setText(f'Hibernated: {count} ({memory / (1024 * 1024):.1f} MB freed)')
+        self.hibernation_status.setVisible(count > 0)
+
+    # A hibernated workspace whose scratch file could not be read stays hibernated, it is tried again when next selected
+    def restore_failed(self, editor, message):
+        QMessageBox.warning(self, "Restore Workspace Error", f"Unable to restore the workspace due to:\n{message}")
+
+    # Showing the find and replace panel, starting from the text selected in the editor
+    def find_replace_function(self):
+        # A PDF is searched from its own tab, its text cannot be replaced
+        if isinstance(self.center.currentWidget(), PdfViewer):
+            self.center.currentWidget().search_field.setFocus()
+            self.center.currentWidget().search_field.selectAll()
+            return
+
+        if self.find_replace_panel is None:
+            self.find_replace_panel = FindReplacePanel(self.find_replace, self)
+            self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.find_replace_panel)
+
+        current_editor = self.center.currentWidget()
+        text = ''
+
+        if isinstance(current_editor, workspace_editors):
+            text = current_editor.textCursor().selectedText()
+
+        self.find_replace_panel.start(text if '\u2029' not in text and len(text) < 200 else '')
+
+    # Switching diagnostics on or off along with their panel
+    def diagnostics_toggled(self, enabled):
+        self.diagnostics.set_enabled(enabled)
+
+        if enabled and self.diagnostics_panel is None:
+            self.diagnostics_panel = DiagnosticsPanel(self.diagnostics, self)
+            self.diagnostics_panel.closed.connect(lambda: self.diagnostics_action.setChecked(False))
+            self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.diagnostics_panel)
+
+        if self.diagnostics_panel is not None:
+            self.diagnostics_panel.setVisible(enabled)
+
+        self.diagnostics_status.setText('Diagnostics on')
+        self.diagnostics_status.setVisible(enabled)
+
+    # Showing the last action and the stalls so far
+    def diagnostics_changed(self, *arguments):
+        stalls = self.diagnostics.stall_summary()
+        text = f'Stalls: {stalls["count"]}' + (f', longest {stalls["longest_ms"]:.0f} ms' if stalls['count'] else '')
+
+        if self.diagnostics.last_action is not None:
+            name = self.diagnostics.last_action[0]
+            text = f'{name}: {self.diagnostics.actions[name].last * 1000:.0f} ms | ' + text
+
+        self.diagnostics_status.setText(text)
+
+    # Bringing back the tabs of the last session as placeholders, opened once they are selected
+    def restore_session(self):
+        tabs, current = read_session(session_path())
+
+        if not tabs:
+            return
+
+        # The empty workspace opened at start makes way for the session, unless it has been used meanwhile
+        first = self.center.widget(0)
+        unused = self.center.count() == 1 and isinstance(first, workspace_editors) and first.document().isEmpty() and self.documents[first].path is None
+
+        for tab in tabs:
+            self.center.addTab(SessionPlaceholder(tab), tab.title)
+
+        # Selecting the tab in view opens it, the rest wait until they are selected
+        self.center.setCurrentIndex(self.center.count() - len(tabs) + current)
+
+        if unused:
+            self.close_tab(0)
+            first.deleteLater()
+
+    # Opening a placeholder of the last session in its place
+    def open_session_tab(self, index):
+        placeholder = self.center.widget(index)
+
+        if not isinstance(placeholder, SessionPlaceholder):
+            return
+
+        tab = placeholder.tab
+
+        if not os.path.exists(tab.path):
+            placeholder.file_missing()
+            return
+
+        count = self.center.count()
+
+        if tab.kind == PDF:
+            self.pdf_path = tab.path
+            self.pdf_tab()
+        elif tab.kind == WORKSPACE and os.path.getsize(tab.path) < large_file_size:
+            self.file_editor_tab(tab.path)
+            self.center.setTabText(count, 'File: ' + str(os.path.basename(tab.path)))
+            self.load_document(self.text_editor, tab.path)
+        else:
+            self.large_file_tab(tab.path)
+
+        # Nothing was added when the file could not be opened, which has been reported
+        if self.center.count() == count:
+            return
+
+        widget = self.center.widget(count)
+        self.replace_tab(index, widget)
+        placeholder.deleteLater()
+
+        if isinstance(widget, workspace_editors) and widget in self.loads:
+            self.loads[widget].load_finished.connect(lambda path: restore_workspace(widget, tab))
+        elif isinstance(widget, LargeFileViewer):
+            restore_viewer(widget, tab)
+        elif isinstance(widget, PdfViewer):
+            restore_pdf(widget, tab)
+
+    # Remembering the tabs showing files for the next start, workspaces still loading by the file they load
+    def save_session(self):
+        tabs = []
+        current = 0
+
+        for index in range(self.center.count()):
+            widget = self.center.widget(index)
+            title = self.center.tabText(index)
+
+            if isinstance(widget, SessionPlaceholder):
+                tab = widget.tab
+            elif isinstance(widget, workspace_editors) and widget in self.loads:
+                tab = workspace_tab(widget, self.loads[widget].path, title)
+            elif isinstance(widget, workspace_editors) and self.documents[widget].path:
+                tab = workspace_tab(widget, self.documents[widget].path, title, self.hibernation.hibernated.get(widget))
+            elif isinstance(widget, LargeFileViewer):
+                tab = viewer_tab(widget, title)
+            elif isinstance(widget, PdfViewer):
+                tab = pdf_tab(widget, title)
+            else:
+                continue
+
+            if index == self.center.currentIndex():
+                current = len(tabs)
+            tabs.append(tab)
+
+        # A session which cannot be written only means starting with an empty workspace next time
+        try:
+            write_session(session_path(), tabs, current)
+        except OSError:
+            pass
+
+    # Offering to bring back the workspaces of sessions which did not close properly
+    def offer_recovery(self):
+        sessions = recoverable_sessions(self.autosave.root, self.autosave.folder)
+        workspaces = [workspace for session in sessions for workspace in session.workspaces]
+
+        if not workspaces:
+            return
+
+        message = QMessageBox(QMessageBox.Icon.Question, "Recover Workspaces",
+                              f'{len(workspaces)} workspaces with unsaved changes were left by a session which did not close properly.', parent=self)
+        message.setDetailedText('\n'.join(workspace.title + (f' ({workspace.path})' if workspace.path else '') for workspace in workspaces))
+        recover = message.addButton('Recover', QMessageBox.ButtonRole.AcceptRole)
+        discard = message.addButton('Discard', QMessageBox.ButtonRole.DestructiveRole)
+        message.addButton('Later', QMessageBox.ButtonRole.RejectRole)
+        message.exec()
+
+        errors = []
+
+        for session in sessions:
+            if message.clickedButton() is recover:
+                failed = [error for error in (self.recover_workspace_tab(workspace) for workspace in session.workspaces) if error]
+                errors.extend(failed)
+
+                # Journals which could not be replayed in full are kept for another try
+                if failed:
+                    session.release()
+                else:
+                    session.discard()
+            elif message.clickedButton() is discard:
+                session.discard()
+            else:
+                session.release()
+
+        if errors:
+            QMessageBox.warning(self, "Recover Workspaces Error", "Some workspaces were not recovered in full, their journals are kept:\n" + '\n'.join(errors))
+
+    # Recovered Workspace Tab, handing back what went wrong if anything did
+    def recover_workspace_tab(self, workspace):
+        document = QTextDocument()
+        document.setDefaultFont(QFont(default_font, default_font_size))
+        document.setUndoRedoEnabled(False)
+
+        try:
+            error = recover_workspace(workspace, document)
+        except Exception as e:
+            return f'{workspace.title}: {e}'
+
+        image_cache().prepare_document(document)
+        document.setUndoRedoEnabled(True)
+        document.setModified(True)
+
+        if workspace.path:
+            self.file_editor_tab(workspace.path)
+        else:
+            self.text_editor_tab()
+        document.setParent(self.text_editor)
+        replace_document(self.text_editor, document)
+        index = self.center.indexOf(self.text_editor)
+        self.center.setTabText(index, 'Recovered: ' + (os.path.basename(workspace.path) if workspace.path else workspace.title))
+
+        self.documents[self.text_editor].set_path(workspace.path)
+        self.documents[self.text_editor].modified = True
+
+        # Nothing on disk holds the recovered document, so its journal starts from a snapshot
+        self.autosave.rebase(self.text_editor)
+        return f'{workspace.title}: {error}' if error else None
+
+    # Putting the tab added last in the place of the tab at an index, which is closed. It is selected before it
+    # is moved, a selected placeholder would be opened again when moved aside
+    def replace_tab(self, index, widget):
+        self.center.setCurrentWidget(widget)
+        self.center.tabBar().moveTab(self.center.indexOf(widget), index)
+        self.close_tab(index + 1)
+
+    # The workspace a file opens in, one of the other kind makes way for a new workspace in its tab
+    def workspace_for(self, editor, path):
+        if is_plain_editor(editor) == is_plain_path(path):
+            return editor
+
+        if editor in self.loads:
+            self.loads[editor].cancel()
+
+        index = self.center.indexOf(editor)
+        self.file_editor_tab(path)
+        self.replace_tab(index, self.text_editor)
+        return self.text_editor
+
+    # Closing a tab along with whatever it holds open
+    def close_tab(self, index):
+        widget = self.center.widget(index)
+
+        # A load streaming into the workspace stops, tables being built stop where they got to and saves get written
+        if widget in self.loads:
+            self.loads[widget].abandon()
+
+        for job in [job for job in self.table_jobs if job.editor is widget]:
+            job.cancel()
+
+        if widget in self.savers:
+            saver = self.savers.pop(widget)
+            saver.flush()
+            saver.deleteLater()
+
+        self.center.removeTab(index)
+        self.hibernation.forget(widget)
+        self.autosave.forget(widget)
+        self.undo_budget.forget(widget)
+        self.documents.pop(widget, None)
+
+        if isinstance(widget, LargeFileViewer):
+            widget.close_file()
+            widget.deleteLater()
+        elif isinstance(widget, PdfViewer):
+            widget.close_document()
+            widget.deleteLater()
+        elif isinstance(widget, workspace_editors):
+            widget.deleteLater()
 
     # Navigations
     def navigations(self):
@@ -82,39 +532,55 @@ class PowerText(QMainWindow):
         self.navigations_toolbar.setIconSize(QSize(30, 30))
 
         # New Workspace Action
-        self.new_workspace = QAction(QIcon('Icons/new-tab.png'), 'New Workspace', self)
+        self.new_workspace = QAction(icon('Icons/new-tab.png'), 'New Workspace', self)
         self.new_workspace.setStatusTip('Add a new workspace')
-        self.new_workspace.triggered.connect(self.text_editor_tab)
+        self.new_workspace.triggered.connect(self.diagnostics.timed('New Workspace', self.text_editor_tab))
 
         # New Document Action
-        self.new = QAction(QIcon('Icons/add-file.png'), 'New', self)
-        self.new.triggered.connect(self.new_document)
+        self.new = QAction(icon('Icons/add-file.png'), 'New', self)
+        self.new.triggered.connect(self.diagnostics.timed('New', self.new_document))
         self.new.setStatusTip('Make a new document within the desired workspace')
 
         # Open Document
-        self.open = QAction(QIcon('Icons/arrow.png'), 'Open', self)
-        self.open.triggered.connect(self.open_document)
+        self.open = QAction(icon('Icons/arrow.png'), 'Open', self)
+        self.open.triggered.connect(self.diagnostics.timed('Open', self.open_document))
         self.open.setStatusTip('Open a document within the desired workspace')
 
         # Open PDF
-        self.open_pdf = QAction(QIcon('Icons/pdf.png'), 'Open PDF', self)
-        self.open_pdf.triggered.connect(self.open_pdf_function)
+        self.open_pdf = QAction(icon('Icons/pdf.png'), 'Open PDF', self)
+        self.open_pdf.triggered.connect(self.diagnostics.timed('Open PDF', self.open_pdf_function))
         self.open_pdf.setStatusTip('Open a PDF in a new tab')
 
         # Save
-        self.save = QAction(QIcon('Icons/save.png'), 'Save', self)
-        self.save.triggered.connect(self.save_document)
+        self.save = QAction(icon('Icons/save.png'), 'Save', self)
+        self.save.triggered.connect(self.diagnostics.timed('Save', self.save_document))
 
         # Save As
-        self.save_as = QAction(QIcon('Icons/save-as.png'), 'Save As', self)
-        self.save_as.triggered.connect(self.save_as_document)
+        self.save_as = QAction(icon('Icons/save-as.png'), 'Save As', self)
+        self.save_as.triggered.connect(self.diagnostics.timed('Save As', self.save_as_document))
         self.save_as.setStatusTip('Save the document in the desired workspace')
 
+        # Save All
+        self.save_all = QAction(icon('Icons/save.png'), 'Save All', self)
+        self.save_all.triggered.connect(self.diagnostics.timed('Save All', self.save_all_function))
+        self.save_all.setStatusTip('Save every workspace changed since it was last saved or opened')
+
         # Save As PDF
-        self.saveas_pdf = QAction(QIcon('Icons/file.png'), 'Save As PDF', self)
-        self.saveas_pdf.triggered.connect(self.save_as_pdf)
+        self.saveas_pdf = QAction(icon('Icons/file.png'), 'Save As PDF', self)
+        self.saveas_pdf.triggered.connect(self.diagnostics.timed('Save As PDF', self.save_as_pdf))
         self.saveas_pdf.setStatusTip('Save the document in the desired workspace as PDF')
 
+        # Convert to Rich Text, for a workspace showing a text file as plain text
+        self.convert_rich_text = QAction('Convert to Rich Text', self)
+        self.convert_rich_text.triggered.connect(self.diagnostics.timed('Convert to Rich Text', self.convert_rich_text_function))
+        self.convert_rich_text.setStatusTip('Edit the plain text of the desired workspace as rich text, so it can be formatted')
+        self.convert_rich_text.setEnabled(False)
+
+        # Export All to PDF
+        self.export_all_pdf = QAction(icon('Icons/file.png'), 'Export All to PDF', self)
+        self.export_all_pdf.triggered.connect(self.diagnostics.timed('Export All to PDF', self.export_all_pdf_function))
+        self.export_all_pdf.setStatusTip('Export the document of every workspace as PDF into a folder')
+
         # Font Box
         self.font_box = QFontComboBox()
         self.font_box.setStatusTip('Change the font of your selected text')
@@ -130,90 +596,96 @@ class PowerText(QMainWindow):
         self.font_size.setValue(default_font_size)
 
         # Bold
-        self.bold = QAction(QIcon('Icons/bold.png'), 'Bold', self)
+        self.bold = QAction(icon('Icons/bold.png'), 'Bold', self)
         self.bold.setStatusTip('Make the selected text Bold')
-        self.bold.triggered.connect(self.bold_function)
+        self.bold.triggered.connect(self.diagnostics.timed('Bold', self.bold_function))
         self.bold.setCheckable(True)
         self.bold.setChecked(False)
 
         # Italic
-        self.italic = QAction(QIcon('Icons/text.png'), 'Italic', self)
+        self.italic = QAction(icon('Icons/text.png'), 'Italic', self)
         self.italic.setStatusTip('Make the selected text Italic')
-        self.italic.triggered.connect(self.italic_function)
+        self.italic.triggered.connect(self.diagnostics.timed('Italic', self.italic_function))
         self.italic.setCheckable(True)
         self.italic.setChecked(False)
 
         # Underline
-        self.underline = QAction(QIcon('Icons/underline.png'), 'Underline', self)
+        self.underline = QAction(icon('Icons/underline.png'), 'Underline', self)
         self.underline.setStatusTip('Make the selected text Underlined')
-        self.underline.triggered.connect(self.underline_function)
+        self.underline.triggered.connect(self.diagnostics.timed('Underline', self.underline_function))
         self.underline.setCheckable(True)
         self.underline.setChecked(False)
 
         # Strikethrough
-        self.strikethrough = QAction(QIcon('Icons/strikethrough.png'), 'Strikethrough', self)
+        self.strikethrough = QAction(icon('Icons/strikethrough.png'), 'Strikethrough', self)
         self.strikethrough.setStatusTip('Make the selected text be Striked Out')
-        self.strikethrough.triggered.connect(self.strikethrough_function)
+        self.strikethrough.triggered.connect(self.diagnostics.timed('Strikethrough', self.strikethrough_function))
         self.strikethrough.setCheckable(True)
         self.strikethrough.setChecked(False)
 
         # Insert Image Function
-        self.insert_image = QAction(QIcon('Icons/image.png'), 'Insert Image', self)
+        self.insert_image = QAction(icon('Icons/image.png'), 'Insert Image', self)
         self.insert_image.setStatusTip('Insert an Image onto the document')
-        self.insert_image.triggered.connect(self.insert_image_function)
+        self.insert_image.triggered.connect(self.diagnostics.timed('Insert Image', self.insert_image_function))
 
         # Insert Table Function
-        self.insert_table = QAction(QIcon('Icons/cells.png'), 'Insert Table', self)
+        self.insert_table = QAction(icon('Icons/cells.png'), 'Insert Table', self)
         self.insert_table.setStatusTip('Insert a Table onto the document')
-        self.insert_table.triggered.connect(self.insert_table_function)
+        self.insert_table.triggered.connect(self.diagnostics.timed('Insert Table', self.insert_table_function))
+
+        # Import Table Function
+        self.import_table = QAction(icon('Icons/cells.png'), 'Import Table', self)
+        self.import_table.setStatusTip('Import a CSV or TSV file as a Table onto the document')
+        self.import_table.triggered.connect(self.diagnostics.timed('Import Table', self.import_table_function))
 
         # Align to the Left
-        left_align = QAction(QIcon('Icons/left-align.png'), 'Left Alignment', self)
-        left_align.triggered.connect(self.left_align_function)
+        left_align = QAction(icon('Icons/left-align.png'), 'Left Alignment', self)
+        left_align.triggered.connect(self.diagnostics.timed('Left Alignment', self.left_align_function))
         left_align.setStatusTip('Align the selected text towards the left')
 
         # Align to the Right
-        right_align = QAction(QIcon('Icons/right-justification.png'), 'Right Alignment', self)
-        right_align.triggered.connect(self.right_align_function)
+        right_align = QAction(icon('Icons/right-justification.png'), 'Right Alignment', self)
+        right_align.triggered.connect(self.diagnostics.timed('Right Alignment', self.right_align_function))
         right_align.setStatusTip('Align the selected text towards the right')
 
         # Align to the Center
-        center_align = QAction(QIcon('Icons/text-center.png'), 'Center Alignment', self)
-        center_align.triggered.connect(self.center_align_function)
+        center_align = QAction(icon('Icons/text-center.png'), 'Center Alignment', self)
+        center_align.triggered.connect(self.diagnostics.timed('Center Alignment', self.center_align_function))
         center_align.setStatusTip('Align the selected text towards the center')
 
         # Justified Alignment
-        justify_align = QAction(QIcon('Icons/justified.png'), 'Justify Alignment', self)
-        justify_align.triggered.connect(self.justify_align_function)
+        justify_align = QAction(icon('Icons/justified.png'), 'Justify Alignment', self)
+        justify_align.triggered.connect(self.diagnostics.timed('Justify Alignment', self.justify_align_function))
         justify_align.setStatusTip('Align the selected text as justified')
 
         # Numbered List
-        number_list = QAction(QIcon('Icons/prioritize.png'), 'Number List', self)
-        number_list.triggered.connect(self.number_list)
+        number_list = QAction(icon('Icons/prioritize.png'), 'Number List', self)
+        number_list.triggered.connect(self.diagnostics.timed('Number List', self.number_list))
         number_list.setStatusTip('Make a list of numbers')
 
         # Bullet List
-        bullet_list = QAction(QIcon('Icons/menu.png'), 'Bullet Points List', self)
-        bullet_list.triggered.connect(self.bullet_list)
+        bullet_list = QAction(icon('Icons/menu.png'), 'Bullet Points List', self)
+        bullet_list.triggered.connect(self.diagnostics.timed('Bullet Points List', self.bullet_list))
         bullet_list.setStatusTip('Make a list of bullet points')
 
         # Highlight Text Function
-        self.highlight_text = QAction(QIcon('Icons/highlighter.png'), 'Highlight Text', self)
+        self.highlight_text = QAction(icon('Icons/highlighter.png'), 'Highlight Text', self)
         self.highlight_text.setStatusTip('Highlight Selected Text')
-        self.highlight_text.triggered.connect(self.highlight_text_function)
+        self.highlight_text.triggered.connect(self.diagnostics.timed('Highlight Text', self.highlight_text_function))
 
         # Text Colour Function
-        self.text_colour = QAction(QIcon('Icons/color.png'), 'Highlight Text', self)
+        self.text_colour = QAction(icon('Icons/color.png'), 'Highlight Text', self)
         self.text_colour.setStatusTip('Colour Selected Text')
-        self.text_colour.triggered.connect(self.text_colour_function)
+        self.text_colour.triggered.connect(self.diagnostics.timed('Text Colour', self.text_colour_function))
 
         # Adding the following actions made previously
         self.navigations_toolbar.addAction(self.new_workspace)
         self.navigations_toolbar.addSeparator()
-        self.navigations_toolbar.addActions([self.new, self.open, self.open_pdf,self.save, self.save_as, self.saveas_pdf])
+        self.navigations_toolbar.addActions([self.new, self.open, self.open_pdf,self.save, self.save_as, self.save_all, self.saveas_pdf, self.export_all_pdf])
         self.navigations_toolbar.addSeparator()
         self.navigations_toolbar.addWidget(self.font_box)
         self.navigations_toolbar.addWidget(self.font_size)
+        self.navigations_toolbar.addAction(self.convert_rich_text)
         self.navigations_toolbar.addSeparator()
         self.navigations_toolbar.addActions([self.bold, self.italic, self.underline, self.strikethrough])
         self.navigations_toolbar.addSeparator()
@@ -223,60 +695,273 @@ class PowerText(QMainWindow):
         self.navigations_toolbar.addSeparator()
         self.navigations_toolbar.addActions([number_list, bullet_list])
         self.navigations_toolbar.addSeparator()
-        self.navigations_toolbar.addActions([self.insert_image, self.insert_table])
+        self.navigations_toolbar.addActions([self.insert_image, self.insert_table, self.import_table])
 
         self.addToolBar(self.navigations_toolbar)
 
+        # Actions which format text, a plain text workspace has none to keep
+        self.rich_text_actions = [self.bold, self.italic, self.underline, self.strikethrough, self.highlight_text, self.text_colour,
+                                  left_align, right_align, center_align, justify_align, number_list, bullet_list,
+                                  self.insert_image, self.insert_table, self.import_table]
+
+    # Offering formatting only in rich text workspaces, and converting to rich text only in plain text ones
+    def workspace_changed(self):
+        plain = is_plain_editor(self.center.currentWidget())
+
+        for action in self.rich_text_actions:
+            action.setEnabled(not plain)
+        self.convert_rich_text.setEnabled(plain)
+
     # Defining new document
     def new_document(self):
         index = self.center.currentIndex()
         current_editor = self.center.currentWidget()
 
-        if isinstance(current_editor, QTextEdit):
+        if isinstance(current_editor, workspace_editors):
             current_editor.clear()
+            self.autosave.reset(current_editor)
             self.center.setTabText(index, 'New Workspace')
-            if index in self.path:
-                del self.path[index]
+            self.documents[current_editor].reset()
 
-    # Defining open document
+    # Defining open document, one file opens in the workspace in view and several in workspaces of their own
     def open_document(self):
         current_editor = self.center.currentWidget()
 
-        if isinstance(current_editor, QTextEdit):
-            path, _ = QFileDialog.getOpenFileName(self, 'Open File', '', 'Text Document (*.txt);;PowerText Document (*.ptxt);;All Files (*.*)')
+        if isinstance(current_editor, workspace_editors):
+            paths, _ = QFileDialog.getOpenFileNames(self, 'Open File', '', 'Text Document (*.txt);;PowerText Document (*.ptxt);;All Files (*.*)')
 
-            if path:
-                try:
-                    file_to_read = open(path, 'r', encoding='utf-8').read()
-                    self.path[self.center.currentIndex()] = path
-
-                    self.center.setTabText(self.center.currentIndex(), 'File: ' + str(os.path.basename(path)))
-                    current_editor.setText(file_to_read)
-                except Exception as e:
-                    QMessageBox.warning(self, "Open Document Error", f"Unable to open document due to:\n{e}")
+            if len(paths) > 1:
+                self.open_files(paths)
+            elif paths:
+                path = paths[0]
+
+                # Files too large for a workspace open read-only in a viewer tab of their own
+                if os.path.getsize(path) >= large_file_size:
+                    self.large_file_tab(path)
+                else:
+                    self.load_document(self.workspace_for(current_editor, path), path)
             else:
                 pass
+
+    # Opening files each in a tab of their own, a folder by the files directly inside it. Documents are read a few
+    # at a time and every tab appears once its file has loaded
+    def open_files(self, paths):
+        files = []
+
+        for path in paths:
+            if os.path.isdir(path):
+                files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                    if not name.startswith('.') and os.path.isfile(os.path.join(path, name))))
+            elif os.path.isfile(path):
+                files.append(path)
+
+        jobs = []
+
+        for path in files:
+            if path.lower().endswith('.pdf'):
+                self.pdf_path = path
+                self.pdf_tab()
+            elif os.path.getsize(path) >= large_file_size:
+                self.large_file_tab(path)
+            else:
+                jobs.append(path)
+
+        if not jobs:
+            return
+
+        batch = BatchOpen(jobs, parent=self)
+        batch.load = self.load_into_new_workspace
+        finish_task = self.diagnostics.task(f'Open {len(jobs)} files', 'load')
+
+        def batch_finished(results):
+            self.batch_opens.remove(batch)
+            finish_task()
+            batch.deleteLater()
+
+            failed = [(path, error) for path, error in results if error and error != 'Cancelled']
+            opened = sum(1 for _, error in results if not error)
+
+            if failed:
+                QMessageBox.warning(self, "Open Document Error", f"Unable to open {len(failed)} of {len(results)} documents due to:\n" +
+                                    '\n'.join(f'{os.path.basename(path)}: {error}' for path, error in failed))
+            else:
+                self.status_bar.showMessage(f'Opened {opened} documents', 5000)
+
+        batch.batch_finished.connect(batch_finished)
+        self.batch_opens.append(batch)
+        batch.start()
+
+    # Loading a file into a workspace of its own, whose tab is added once the file has loaded
+    def load_into_new_workspace(self, path):
+        editor = self.file_editor(path)
+        self.track_workspace(editor)
+        load = self.load_document(editor, path, quiet=True)
+
+        def load_finished(path):
+            first = not any(error is None for batch in self.batch_opens for _, error in batch.results)
+            self.show_workspace(editor, 'File: ' + str(os.path.basename(path)))
+
+            # The first file of a batch is brought into view, the rest open behind it
+            if first:
+                self.center.setCurrentWidget(editor)
+
+        def load_ended(*_):
+            self.autosave.forget(editor)
+            self.undo_budget.forget(editor)
+            self.documents.pop(editor, None)
+            editor.deleteLater()
+
+        load.load_finished.connect(load_finished)
+        load.load_failed.connect(load_ended)
+        load.load_cancelled.connect(load_ended)
+        return load
+
+    # Files dropped on the window or on a workspace, none when what is dragged holds no files
+    def dropped_paths(self, event):
+        if not event.mimeData().hasUrls():
+            return []
+        return [url.toLocalFile() for url in event.mimeData().urls() if url.isLocalFile()]
+
+    def dragEnterEvent(self, event):
+        if self.dropped_paths(event):
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        paths = self.dropped_paths(event)
+
+        if paths:
+            event.acceptProposedAction()
+            self.open_files(paths)
+
+    # Files dropped on a workspace are opened instead of their links being inserted into its document
+    def eventFilter(self, watched, event):
+        if event.type() in (QEvent.Type.DragEnter, QEvent.Type.DragMove, QEvent.Type.Drop) and self.dropped_paths(event):
+            event.acceptProposedAction()
+
+            if event.type() == QEvent.Type.Drop:
+                self.open_files(self.dropped_paths(event))
+            return True
+
+        return super(PowerText, self).eventFilter(watched, event)
+
+    # Defining loading of a document in the background, a quiet load leaves reporting a failure to its caller
+    def load_document(self, editor, path, quiet=False):
+        # Only one load may stream into an editor at a time
+        if editor in self.loads:
+            self.loads[editor].cancel()
+
+        load = DocumentLoad(editor, path, parent=self)
+        finish_task = self.diagnostics.task('Open ' + os.path.basename(path), 'load')
+
+        # Progress and Cancel shown in the status bar while loading
+        progress_bar = QProgressBar()
+        progress_bar.setMaximumWidth(200)
+        progress_bar.setStatusTip('Loading ' + os.path.basename(path))
+        cancel_button = QPushButton('Cancel')
+        cancel_button.setStatusTip('Cancel loading ' + os.path.basename(path))
+        cancel_button.clicked.connect(load.cancel)
+        self.status_bar.addPermanentWidget(progress_bar)
+        self.status_bar.addPermanentWidget(cancel_button)
+
+        def progress_changed(done, total):
+            progress_bar.setMaximum(max(total, 1))
+            progress_bar.setValue(done)
+
+        def load_ended():
+            if self.loads.get(editor) is not load:
+                return
+
+            del self.loads[editor]
+            finish_task()
+            self.status_bar.removeWidget(progress_bar)
+            self.status_bar.removeWidget(cancel_button)
+            progress_bar.deleteLater()
+            cancel_button.deleteLater()
+            load.deleteLater()
+
+        def load_finished(path):
+            load_ended()
+            index = self.center.indexOf(editor)
+
+            if editor in self.documents:
+                self.documents[editor].reset(path)
+
+            if index != -1:
+                self.center.setTabText(index, 'File: ' + str(os.path.basename(path)))
+            self.autosave.reset(editor, path)
+            self.status_bar.showMessage('Opened ' + path, 5000)
+
+        def load_failed(path, message):
+            load_ended()
+
+            if quiet:
+                self.status_bar.showMessage('Unable to open ' + path, 5000)
+            else:
+                QMessageBox.warning(self, "Open Document Error", f"Unable to open document due to:\n{message}")
+
+        def load_cancelled(path):
+            load_ended()
+            self.status_bar.showMessage('Cancelled opening ' + path, 5000)
+
+        load.progress_changed.connect(progress_changed)
+        load.load_finished.connect(load_finished)
+        load.load_failed.connect(load_failed)
+        load.load_cancelled.connect(load_cancelled)
+
+        # A workspace closed while loading takes its load with it
+        def editor_destroyed():
+            load.abandon()
+            load_ended()
+
+        editor.destroyed.connect(editor_destroyed)
+
+        self.loads[editor] = load
+        self.status_bar.showMessage('Opening ' + path)
+        load.start()
+        return load
+
+    # Stopping background loads and finishing background saves before the window goes away
+    def closeEvent(self, event):
+        self.save_session()
+
+        for batch in self.batch_opens:
+            batch.cancel()
+
+        for load in list(self.loads.values()):
+            load.abandon()
+
+        for export in self.exports:
+            export.abandon()
+
+        self.find_replace.abandon()
+
+        for batch in self.batch_saves:
+            batch.flush()
+
+        for saver in self.savers.values():
+            saver.flush()
+
+        self.hibernation.clean_up()
+        self.autosave.clean_up()
+
+        for index in range(self.center.count()):
+            if isinstance(self.center.widget(index), LargeFileViewer):
+                self.center.widget(index).close_file()
+            elif isinstance(self.center.widget(index), PdfViewer):
+                self.center.widget(index).close_document()
+
+        super(PowerText, self).closeEvent(event)
     
     # Defining save as function
     def save_as_document(self):
         current_editor = self.center.currentWidget()
 
-        if isinstance(current_editor, QTextEdit):
+        if isinstance(current_editor, workspace_editors):
             path, _ = QFileDialog.getSaveFileName(self, 'Save File As', '', 'Text File (*.txt);;PowerText Document(*.ptxt);;All Files (*.*)')
 
             if path:
-                try:
-                    self.path[self.center.currentIndex()] = path
-
-                    with open(path, 'w', encoding='utf-8') as f:
-                        if path.endswith('.txt'):
-                            f.write(current_editor.toPlainText())
-                            self.center.setTabText(self.center.currentIndex(), 'File: ' + os.path.basename(path))
-                        else:
-                            f.write(current_editor.toHtml())
-                            self.center.setTabText(self.center.currentIndex(), 'File: ' + os.path.basename(path))
-                except Exception as e:
-                    QMessageBox.warning(self, "Save Document Error", f"Unable to open document due to:\n{e}")
+                self.documents[current_editor].set_path(path)
+                self.write_document(current_editor, path)
             else:
                 pass
 
@@ -284,26 +969,117 @@ class PowerText(QMainWindow):
     def save_document(self):
         current_editor = self.center.currentWidget()
 
-        if isinstance(current_editor, QTextEdit):
-            index = self.center.currentIndex()
-            path = self.path.get(index)
+        if isinstance(current_editor, workspace_editors):
+            path = self.documents[current_editor].path
 
             if not path:
                 self.save_as_document()
                 return
 
-            try:
-                current_editor = self.center.currentWidget()
+            self.write_document(current_editor, path)
+
+    # Defining writing a document in the background
+    def write_document(self, editor, path):
+        self.document_saver(editor).save(path, self.documents[editor].encoding)
+
+    # The background saver of an editor, a hibernated workspace is written from its scratch file
+    def document_saver(self, editor):
+        if editor not in self.savers:
+            saver = DocumentSaver(editor, self)
+            saver.document = lambda editor: self.hibernation.snapshot(editor) if editor in self.hibernation.hibernated else editor.document()
+            tasks = []
+            revisions = []
+
+            def save_started(path):
+                tasks.append(self.diagnostics.task('Save ' + os.path.basename(path), 'save'))
+                revisions.append(self.documents[editor].revision if editor in self.documents else 0)
+                self.autosave.save_started(editor)
+                index = self.center.indexOf(editor)
+
+                if index != -1:
+                    self.center.setTabText(index, 'Saving: ' + os.path.basename(path))
+                self.status_bar.showMessage('Saving ' + path)
+
+            def save_finished(path):
+                if tasks:
+                    tasks.pop(0)()
+                self.document_saved(editor, revisions.pop(0))
+                self.autosave.saved(editor, path)
+                index = self.center.indexOf(editor)
+
+                if index != -1:
+                    self.center.setTabText(index, 'File: ' + os.path.basename(path))
+                self.status_bar.showMessage('Saved ' + path, 5000)
+
+            def save_failed(path, message):
+                if tasks:
+                    tasks.pop(0)()
+                revisions.pop(0)
+                index = self.center.indexOf(editor)
+
+                if index != -1:
+                    self.center.setTabText(index, 'File: ' + os.path.basename(path))
+                self.status_bar.clearMessage()
+                QMessageBox.warning(self, "Save Error", f"Unable to save document due to:\n{message}")
+
+            saver.save_started.connect(save_started)
+            saver.save_finished.connect(save_finished)
+            saver.save_failed.connect(save_failed)
+            self.savers[editor] = saver
+
+        return self.savers[editor]
+
+    # Marking a workspace saved, unless it was edited while being written
+    def document_saved(self, editor, revision):
+        if editor not in self.documents or not self.documents[editor].saved(revision):
+            return
+
+        if editor in self.hibernation.hibernated:
+            self.hibernation.hibernated[editor].modified = False
+        else:
+            editor.document().setModified(False)
+
+    # Defining Save All, writing only the workspaces changed since they were last saved or opened
+    def save_all_function(self):
+        jobs = []
+        untitled = 0
+
+        for index in range(self.center.count()):
+            editor = self.center.widget(index)
+
+            if not isinstance(editor, workspace_editors) or editor in self.loads or not self.documents[editor].modified:
+                continue
+
+            # A workspace without a file needs Save As, which asks for one
+            if not self.documents[editor].path:
+                untitled += 1
+                continue
+
+            jobs.append((editor, self.documents[editor].path, self.documents[editor].encoding))
 
-                if isinstance(current_editor, QTextEdit):
-                    with open(path, 'w', encoding='utf-8') as f:
-                        if path.endswith('.txt'):
-                            f.write(current_editor.toPlainText())
-                        else:
-                            f.write(current_editor.toHtml())
-                    self.center.setTabText(index, os.path.basename(path))
-            except Exception as e:
-                QMessageBox.warning(self, "Save Error", f"Unable to save document due to:\n{e}")
+        skipped = f', {untitled} untitled left for Save As' if untitled else ''
+
+        if not jobs:
+            self.status_bar.showMessage('Nothing to save' + skipped, 5000)
+            return
+
+        batch = BatchSave(jobs, parent=self)
+        batch.saver = self.document_saver
+        finish_task = self.diagnostics.task(f'Save {len(jobs)} documents', 'save')
+
+        def batch_finished(results):
+            self.batch_saves.remove(batch)
+            finish_task()
+            batch.deleteLater()
+
+            saved = len([error for path, error in results if error is None])
+            self.status_bar.showMessage(f'Saved {saved} of {len(results)} documents' + skipped, 5000)
+
+        batch.batch_finished.connect(batch_finished)
+
+        self.batch_saves.append(batch)
+        self.status_bar.showMessage(f'Saving {len(jobs)} documents')
+        batch.start()
 
     # Defining Save As PDF Document function
     def save_as_pdf(self):
@@ -313,15 +1089,129 @@ class PowerText(QMainWindow):
             if not path.endswith('.pdf'):
                 path += '.pdf'
 
-            printer = QPrinter()
-            printer.setOutputFormat(QPrinter.OutputFormat.PdfFormat)
-            printer.setOutputFileName(path)
-
             current_editor = self.center.currentWidget()
 
-            if isinstance(current_editor, QTextEdit):
-                current_editor.document().print(printer)
-                QMessageBox.information(self, "Export Successful", f"Document exported as PDF:\n{path}")
+            if isinstance(current_editor, workspace_editors):
+                self.export_pdf(current_editor, path)
+
+    # Progress and Cancel shown in the status bar while a background task runs, handing back what removes them
+    def status_progress(self, tip, cancel):
+        progress_bar = QProgressBar()
+        progress_bar.setMaximumWidth(200)
+        progress_bar.setStatusTip(tip)
+        cancel_button = QPushButton('Cancel')
+        cancel_button.setStatusTip('Cancel ' + tip[0].lower() + tip[1:])
+        cancel_button.clicked.connect(cancel)
+        self.status_bar.addPermanentWidget(progress_bar)
+        self.status_bar.addPermanentWidget(cancel_button)
+
+        def remove():
+            self.status_bar.removeWidget(progress_bar)
+            self.status_bar.removeWidget(cancel_button)
+            progress_bar.deleteLater()
+            cancel_button.deleteLater()
+
+        return progress_bar, remove
+
+    # Exporting a copy of an editor's document to PDF in the background
+    def export_pdf(self, editor, path):
+        try:
+            document = self.hibernation.snapshot(editor)
+        except Exception as e:
+            QMessageBox.warning(self, "Export Error", f"Unable to export document due to:\n{e}")
+            return
+
+        export = PdfExport(document, path, self)
+        progress_bar, remove_progress = self.status_progress('Exporting ' + os.path.basename(path), export.cancel)
+        progress_bar.setMaximum(100)
+        finish_task = self.diagnostics.task('Export ' + os.path.basename(path), 'export')
+
+        def export_ended():
+            self.exports.remove(export)
+            finish_task()
+            remove_progress()
+            export.deleteLater()
+
+        def export_finished(path):
+            export_ended()
+            QMessageBox.information(self, "Export Successful", f"Document exported as PDF:\n{path}")
+
+        def export_failed(path, message):
+            export_ended()
+            QMessageBox.warning(self, "Export Error", f"Unable to export document due to:\n{message}")
+
+        def export_cancelled(path):
+            export_ended()
+            self.status_bar.showMessage('Cancelled exporting ' + path, 5000)
+
+        export.progress_changed.connect(progress_bar.setValue)
+        export.export_finished.connect(export_finished)
+        export.export_failed.connect(export_failed)
+        export.export_cancelled.connect(export_cancelled)
+
+        self.exports.append(export)
+        self.status_bar.showMessage('Exporting ' + path)
+        export.start()
+
+    # Defining Export All to PDF function
+    def export_all_pdf_function(self):
+        editors = [self.center.widget(index) for index in range(self.center.count()) if isinstance(self.center.widget(index), workspace_editors)]
+
+        if not editors:
+            return
+
+        folder = QFileDialog.getExistingDirectory(self, 'Export All to PDF')
+
+        if not folder:
+            return
+
+        # Every PDF is named after the file of its workspace, or its tab when it has none
+        jobs = []
+        names = set()
+
+        for editor in editors:
+            index = self.center.indexOf(editor)
+            path = self.documents[editor].path
+            base = os.path.splitext(os.path.basename(path))[0] if path else 'Workspace ' + str(index + 1)
+            name = base
+            number = 2
+
+            while name.lower() in names:
+                name = f'{base} ({number})'
+                number += 1
+
+            names.add(name.lower())
+            jobs.append((editor, os.path.join(folder, name + '.pdf')))
+
+        batch = PdfBatchExport(jobs, parent=self)
+        batch.snapshot = self.hibernation.snapshot
+        progress_bar, remove_progress = self.status_progress(f'Exporting {len(jobs)} documents', batch.cancel)
+        finish_task = self.diagnostics.task(f'Export {len(jobs)} documents', 'export')
+
+        def progress_changed(done, total):
+            progress_bar.setMaximum(max(total, 1))
+            progress_bar.setValue(done)
+
+        def batch_finished(results):
+            self.exports.remove(batch)
+            finish_task()
+            remove_progress()
+            batch.deleteLater()
+
+            failed = [(path, error) for path, error in results if error is not None]
+            summary = '\n'.join(f'{os.path.basename(path)}: ' + ('Exported' if error is None else 'Failed, ' + error) for path, error in results)
+
+            message = QMessageBox(QMessageBox.Icon.Warning if failed else QMessageBox.Icon.Information, "Export All to PDF",
+                                  f'{len(results) - len(failed)} of {len(results)} documents exported to:\n{folder}', parent=self)
+            message.setDetailedText(summary)
+            message.exec()
+
+        batch.progress_changed.connect(progress_changed)
+        batch.batch_finished.connect(batch_finished)
+
+        self.exports.append(batch)
+        self.status_bar.showMessage(f'Exporting {len(jobs)} documents to ' + folder)
+        batch.start()
 
     # Defining Font Selection
     def font_selection(self):
@@ -330,6 +1220,11 @@ class PowerText(QMainWindow):
         if isinstance(current_editor, QTextEdit):
             font = self.font_box.currentFont()
             current_editor.setCurrentFont(font)
+        elif is_plain_editor(current_editor):
+            # Plain text has one font for the whole workspace
+            font = current_editor.font()
+            font.setFamily(self.font_box.currentFont().family())
+            current_editor.setFont(font)
 
     # Defining Font Size Selection
     def font_size_selection(self):
@@ -337,6 +1232,10 @@ class PowerText(QMainWindow):
 
         if isinstance(current_editor, QTextEdit):
             current_editor.setFontPointSize(float(self.font_size.value()))
+        elif is_plain_editor(current_editor):
+            font = current_editor.font()
+            font.setPointSize(self.font_size.value())
+            current_editor.setFont(font)
 
     # Defining Updating of Font when tab is switched
     def font_changed(self):
@@ -345,66 +1244,94 @@ class PowerText(QMainWindow):
         if isinstance(current_editor, QTextEdit):
             self.font_box.setCurrentFont(current_editor.font())
             self.font_size.setValue(int(current_editor.fontPointSize()))
+        elif is_plain_editor(current_editor):
+            self.font_box.setCurrentFont(current_editor.font())
+            self.font_size.setValue(current_editor.font().pointSize())
+
+    # Defining converting a plain text workspace to rich text, a new editor takes its place with a copy of its document
+    def convert_rich_text_function(self):
+        current_editor = self.center.currentWidget()
+
+        if not is_plain_editor(current_editor) or current_editor in self.loads:
+            return
+
+        index = self.center.currentIndex()
+        title = self.center.tabText(index)
+        model = self.documents[current_editor]
+
+        self.text_editor_tab()
+        document, cursor = rich_copy(current_editor, self.text_editor)
+        replace_document(self.text_editor, document)
+        self.text_editor.setTextCursor(cursor)
+        self.replace_tab(index, self.text_editor)
+        self.center.setTabText(index, title)
+
+        self.documents[self.text_editor].set_path(model.path)
+        self.documents[self.text_editor].encoding = model.encoding
+        self.documents[self.text_editor].modified = model.modified
+
+        # A file which still holds the document is where its journal starts, otherwise a snapshot is
+        if model.path and not model.modified:
+            self.autosave.reset(self.text_editor, model.path)
+        else:
+            self.autosave.rebase(self.text_editor)
+        self.status_bar.showMessage('Converted to rich text, it is saved as plain text until saved in another format', 5000)
 
     # Defining the Bold Function
     def bold_function(self):
         current_editor = self.center.currentWidget()
 
         if isinstance(current_editor, QTextEdit):
-            cursor = current_editor.textCursor()
-            fmt = cursor.charFormat()
+            fmt = QTextCharFormat()
             
             if self.bold.isChecked() == True:
                 fmt.setFontWeight(QFont.Weight.Bold)
             else:
                 fmt.setFontWeight(QFont.Weight.Normal)
 
-            cursor.mergeCharFormat(fmt)
+            self.formatting.apply(current_editor, fmt)
 
     # Defining the Italic Function
     def italic_function(self):
         current_editor = self.center.currentWidget()
 
         if isinstance(current_editor, QTextEdit):
-            cursor = current_editor.textCursor()
-            fmt = cursor.charFormat()
+            fmt = QTextCharFormat()
             
             if self.italic.isChecked() == True:
                 fmt.setFontItalic(True)
             else:
                 fmt.setFontItalic(False)
 
-            cursor.mergeCharFormat(fmt)
+            self.formatting.apply(current_editor, fmt)
 
     # Defining the Underline Function
     def underline_function(self):
         current_editor = self.center.currentWidget()
 
         if isinstance(current_editor, QTextEdit):
-            cursor = current_editor.textCursor()
-            fmt = cursor.charFormat()
+            fmt = QTextCharFormat()
             
             if self.underline.isChecked() == True:
                 fmt.setFontUnderline(True)
             else:
                 fmt.setFontUnderline(False)
 
-            cursor.mergeCharFormat(fmt)
+            self.formatting.apply(current_editor, fmt)
 
     # Defining a Strikethrough Function
     def strikethrough_function(self):
         current_editor = self.center.currentWidget()
 
         if isinstance(current_editor, QTextEdit):
-            cursor = current_editor.textCursor()
-            fmt = cursor.charFormat()
+            fmt = QTextCharFormat()
             
             if self.strikethrough.isChecked() == True:
                 fmt.setFontStrikeOut(True)
             else:
                 fmt.setFontStrikeOut(False)
 
-            cursor.mergeCharFormat(fmt)
+            self.formatting.apply(current_editor, fmt)
 
     # Deifining of Insert Image Function
     def insert_image_function(self):
@@ -419,6 +1346,9 @@ class PowerText(QMainWindow):
             current_editor = self.center.currentWidget()
 
             if isinstance(current_editor, QTextEdit):
+                # The document gets a downscaled copy from the shared cache instead of decoding the file itself
+                image_cache().attach(current_editor.document(), path, path, width, height)
+
                 cursor = current_editor.textCursor()
                 image = QTextImageFormat()
                 image.setName(path)
@@ -436,7 +1366,47 @@ class PowerText(QMainWindow):
             
             if ok and ok2:
                 cursor = current_editor.textCursor()
-                cursor.insertTable(rows, columns)
+
+                if rows * columns <= large_table_cells:
+                    cursor.insertTable(rows, columns)
+                else:
+                    # Large tables are built in segments, a few at a time
+                    builder = TableBuilder(current_editor, columns, self)
+                    builder.progress_changed.connect(lambda done: self.status_bar.showMessage(f'Inserting table... {done} of {rows} rows'))
+                    builder.build_finished.connect(lambda: self.status_bar.showMessage(f'Inserted a table of {rows} rows', 5000))
+                    builder.build_finished.connect(lambda: self.table_jobs.remove(builder))
+                    builder.build_finished.connect(builder.deleteLater)
+                    self.table_jobs.append(builder)
+                    builder.add_empty_rows(rows)
+                    builder.finish_input()
+                    builder.start(cursor)
+
+    # Defining the function of importing tables
+    def import_table_function(self):
+        current_editor = self.center.currentWidget()
+
+        if isinstance(current_editor, QTextEdit):
+            path, _ = QFileDialog.getOpenFileName(self, 'Import Table', '', 'Tables (*.csv *.tsv *.tab);;All Files (*.*)')
+
+            if path:
+                table_import = TableImport(current_editor, path, self)
+
+                def import_finished(rows):
+                    self.status_bar.showMessage(f'Imported {rows} rows from ' + path, 5000)
+                    self.table_jobs.remove(table_import)
+                    table_import.deleteLater()
+
+                def import_failed(message):
+                    self.status_bar.clearMessage()
+                    self.table_jobs.remove(table_import)
+                    table_import.deleteLater()
+                    QMessageBox.warning(self, "Import Table Error", f"Unable to import table due to:\n{message}")
+
+                table_import.progress_changed.connect(lambda done: self.status_bar.showMessage(f'Importing table... {done} rows'))
+                table_import.import_finished.connect(import_finished)
+                table_import.import_failed.connect(import_failed)
+                self.table_jobs.append(table_import)
+                table_import.start(current_editor.textCursor())
 
     # Defining Right Alignment Function
     def right_align_function(self):
@@ -506,10 +1476,9 @@ class PowerText(QMainWindow):
             colour_dialog = QColorDialog.getColor(Qt.GlobalColor.yellow, self, 'Select Highlighting Colour')
 
             if colour_dialog.isValid():
-                cursor = current_editor.textCursor()
                 highlighter = QTextCharFormat()
                 highlighter.setBackground(colour_dialog)
-                cursor.mergeCharFormat(highlighter)
+                self.formatting.apply(current_editor, highlighter)
             else:
                 pass
 
@@ -521,10 +1490,9 @@ class PowerText(QMainWindow):
             colour_dialog = QColorDialog.getColor(Qt.GlobalColor.black, self, 'Select Highlighting Colour')
 
             if colour_dialog.isValid():
-                cursor = current_editor.textCursor()
                 highlighter = QTextCharFormat()
                 highlighter.setForeground(colour_dialog)
-                cursor.mergeCharFormat(highlighter)
+                self.formatting.apply(current_editor, highlighter)
             else:
                 pass
     
@@ -538,35 +1506,35 @@ class PowerText(QMainWindow):
         else:
             pass
 
-    # PDF Viewer Tab
+    # PDF Viewer Tab, every tab of the same file shares one parsed document
     def pdf_tab(self):
-        widget = QWidget()
-
-        layout = QVBoxLayout()
-        widget.setLayout(layout)
-
         path = self.pdf_path
 
-        pdf = QPdfDocument(self)
-        viewer = QPdfView(self)
-        viewer.setDocument(pdf)
-        viewer.setPageMode(QPdfView.PageMode.MultiPage)
-        pdf.load(path)
-
-        layout.addWidget(viewer)
-
-        self.center.addTab(widget, 'PDF: ' + str(os.path.basename(path)))
-
-
-
-# Using QApplication as a base for PowerText() to run
-app = QApplication(sys.argv)
-app.setApplicationName(name)
-app.setApplicationDisplayName(display_name)
-app.setWindowIcon(QIcon('Icons/ApplicationIcon.ico'))
-window = PowerText()
-window.show()
-window.setGeometry(100, 100, 1050, 600)
-app.exec()
-
-
+        try:
+            viewer = PdfViewer(path)
+        except Exception as e:
+            QMessageBox.warning(self, "Open PDF Error", f"Unable to open PDF due to:\n{e}")
+            return
+
+        self.center.setCurrentIndex(self.center.addTab(viewer, 'PDF: ' + str(os.path.basename(path))))
+
+
+
+# Starting PowerText only when run, so importing this file has no side effects
+if __name__ == '__main__':
+    # Converting documents from the command line never opens a window
+    if len(sys.argv) > 1 and sys.argv[1] == 'convert':
+        import batch_convert
+        sys.exit(batch_convert.main(sys.argv[2:]))
+
+    # Using QApplication as a base for PowerText() to run
+    app = QApplication(sys.argv)
+    app.setApplicationName(name)
+    app.setApplicationDisplayName(display_name)
+    app.setWindowIcon(icon('Icons/ApplicationIcon.ico'))
+    window = PowerText()
+    window.restore_session()
+    window.show()
+    window.setGeometry(100, 100, 1050, 600)
+    window.offer_recovery()
+    app.exec()
@@ -0,0 +1,267 @@
+# pdf_export.py - Exporting documents to PDF in the background, one at a time or every workspace at once.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+from PyQt6 import sip
+
+
+from collections import deque
+import os
+
+from document_saver import write_atomically
+from image_cache import restore_originals
+
+# Exports which run at the same time when exporting every workspace
+export_threads = 2
+
+# Blocks laid out per step, every step is a short call so the GUI thread gets its turn in between
+layout_step = 200
+
+# Margin around every page, the same as QTextDocument.print() leaves
+page_margin_cm = 2
+
+# Resolution documents are laid out in on screen, which the layout scales to the PDF from
+screen_dpi = 96
+
+
+class ExportInterrupted(Exception):
+    pass
+
+
+# Paginating and painting a document into PDF data the way QTextDocument.print() does, one page at a time,
+# checking between steps whether to stop
+def render_pdf(document, title, check_interruption=lambda: None, progress=lambda percent: None):
+    buffer = QBuffer()
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    writer = QPdfWriter(buffer)
+    writer.setTitle(title)
+
+    # The document is a copy of its own, which is printed with its images at their full size
+    restore_originals(document)
+
+    layout = document.documentLayout()
+    layout.setPaintDevice(writer)
+
+    # The frame margin is given at screen resolution, the page number is placed in PDF units
+    dpi = writer.logicalDpiY()
+    frame_format = document.rootFrame().frameFormat()
+    frame_format.setMargin(int(page_margin_cm / 2.54 * screen_dpi))
+    document.rootFrame().setFrameFormat(frame_format)
+    margin = frame_format.margin() * dpi / screen_dpi
+
+    page_height = writer.height()
+    document.setPageSize(QSizeF(writer.width(), page_height))
+
+    # Laying out a slice at a time, asking where a block goes lays out everything before it. Only blocks
+    # of the root frame are asked for, asking for a cell of a table not laid out yet can crash Qt
+    size = max(document.characterCount(), 1)
+    iterator = document.rootFrame().begin()
+    step = 0
+
+    while not iterator.atEnd():
+        if iterator.currentFrame() is None:
+            if step % layout_step == 0:
+                check_interruption()
+                block = iterator.currentBlock()
+                layout.blockBoundingRect(block)
+                progress(50 * block.position() // size)
+            step += 1
+
+        iterator += 1
+
+    page_count = document.pageCount()
+
+    painter = QPainter(writer)
+    painter.setFont(document.defaultFont())
+
+    # The painter has to end before the writer goes away, also when cancelled halfway
+    try:
+        for page in range(page_count):
+            check_interruption()
+
+            if page:
+                writer.newPage()
+
+            view = QRectF(0, page * page_height, writer.width(), page_height)
+
+            painter.save()
+            painter.translate(0, -view.top())
+            painter.setClipRect(view)
+
+            context = QAbstractTextDocumentLayout.PaintContext()
+            context.clip = view
+            context.palette.setColor(QPalette.ColorRole.Text, Qt.GlobalColor.black)
+            layout.draw(painter, context)
+            painter.restore()
+
+            # Page number in the bottom right corner of the margin
+            number = str(page + 1)
+            x = writer.width() - margin - painter.fontMetrics().horizontalAdvance(number)
+            y = page_height - margin + painter.fontMetrics().ascent() + 5 * dpi / 72
+            painter.drawText(round(x), round(y), number)
+
+            progress(50 + 50 * (page + 1) // page_count)
+    finally:
+        painter.end()
+
+    buffer.close()
+    return bytes(buffer.data())
+
+
+# Worker thread which lays out and paints its own copy of a document into a PDF
+class PdfWriter(QThread):
+    progress_changed = pyqtSignal(int)
+
+    def __init__(self, document, path, parent=None):
+        super(PdfWriter, self).__init__(parent)
+
+        # The copy belongs to this thread from now on and is freed here as well
+        self.document = document
+        self.document.moveToThread(self)
+        self.path = path
+        self.error = None
+        self.cancelled = False
+
+    def run(self):
+        try:
+            write_atomically(self.path, self.render())
+        except ExportInterrupted:
+            self.cancelled = True
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.document = None
+
+    def check_interruption(self):
+        if self.isInterruptionRequested():
+            raise ExportInterrupted()
+
+    def render(self):
+        title = os.path.splitext(os.path.basename(self.path))[0]
+        return render_pdf(self.document, title, self.check_interruption, self.progress_changed.emit)
+
+
+# Export of one document, made from a copy so the workspace stays editable meanwhile
+class PdfExport(QObject):
+    progress_changed = pyqtSignal(int)
+    export_finished = pyqtSignal(str)
+    export_failed = pyqtSignal(str, str)
+    export_cancelled = pyqtSignal(str)
+
+    def __init__(self, document, path, parent=None):
+        super(PdfExport, self).__init__(parent)
+
+        self.path = path
+        self.writer = PdfWriter(document, path, self)
+        self.writer.progress_changed.connect(self.progress_changed)
+        self.writer.finished.connect(self.writer_finished)
+
+    def start(self):
+        self.writer.start()
+
+    def writer_finished(self):
+        if self.writer.cancelled:
+            self.export_cancelled.emit(self.path)
+        elif self.writer.error is not None:
+            self.export_failed.emit(self.path, self.writer.error)
+        else:
+            self.export_finished.emit(self.path)
+
+    # Stopping at the next page, nothing is written
+    def cancel(self):
+        self.writer.requestInterruption()
+
+    # Waiting for the export to stop before the application quits
+    def abandon(self):
+        self.writer.requestInterruption()
+        self.writer.wait()
+
+
+# Exports of many editors with only a few running at once, each copied only when its turn comes
+class PdfBatchExport(QObject):
+    progress_changed = pyqtSignal(int, int)
+    batch_finished = pyqtSignal(list)
+
+    def __init__(self, jobs, workers=export_threads, parent=None):
+        super(PdfBatchExport, self).__init__(parent)
+
+        self.queued = deque(jobs)
+        self.total = len(jobs)
+        self.workers = max(1, workers)
+        self.running = []
+        self.results = []
+        self.cancelled = False
+
+        # How the copy of an editor's document is made, the owner may read it from elsewhere
+        self.snapshot = lambda editor: editor.document().clone()
+
+    def start(self):
+        self.start_next()
+
+    # Starting queued exports while there are free workers
+    def start_next(self):
+        while self.queued and len(self.running) < self.workers and not self.cancelled:
+            editor, path = self.queued.popleft()
+
+            if sip.isdeleted(editor):
+                self.results.append((path, 'The workspace was closed'))
+                continue
+
+            # A hibernated workspace whose scratch file cannot be read fails by itself
+            try:
+                document = self.snapshot(editor)
+            except Exception as e:
+                self.results.append((path, str(e)))
+                continue
+
+            export = PdfExport(document, path, self)
+            export.export_finished.connect(lambda path, export=export: self.export_ended(export, path, None))
+            export.export_failed.connect(lambda path, message, export=export: self.export_ended(export, path, message))
+            export.export_cancelled.connect(lambda path, export=export: self.export_ended(export, path, 'Cancelled'))
+            self.running.append(export)
+            export.start()
+
+        self.progress_changed.emit(len(self.results), self.total)
+
+        if not self.running and (not self.queued or self.cancelled):
+            self.results.extend((path, 'Cancelled') for _, path in self.queued)
+            self.queued.clear()
+            self.batch_finished.emit(self.results)
+
+    def export_ended(self, export, path, error):
+        self.running.remove(export)
+        export.deleteLater()
+        self.results.append((path, error))
+        self.start_next()
+
+    # Stopping the running exports and dropping the queued ones
+    def cancel(self):
+        self.cancelled = True
+
+        for export in self.running:
+            export.cancel()
+
+        if not self.running:
+            self.start_next()
+
+    def abandon(self):
+        self.cancelled = True
+
+        for export in self.running:
+            export.abandon()
@@ -0,0 +1,201 @@
+# pdf_search.py - Reading the text of PDFs on a worker thread and searching it through an index kept on disk.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# The text of a PDF is read a page at a time by a worker thread, from the document its tabs share, and made into
+# an inverted index: every word with the pages it is on. The text and the index are written to a cache file named
+# after the hash of the PDF's contents, so the same file opened again, even moved or renamed, is searched without
+# reading its text again. A search narrows the pages down to those holding every one of its words, matched by
+# their start so there are results while typing, and only those pages are searched for the text itself.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+
+
+from bisect import bisect_left
+import hashlib
+import json
+import os
+import re
+
+from document_saver import write_atomically
+
+# Version of the index files
+index_version = 1
+
+# Bytes of a PDF hashed at once
+hash_chunk_size = 1024 * 1024
+
+# Matches a search finds at most
+listed_hits = 10000
+
+# What counts as a word of the index
+word_pattern = re.compile(r'\w+')
+
+
+# Folder the indexes are cached in
+def default_folder():
+    return os.path.join(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericCacheLocation), 'PowerText', 'pdf-index')
+
+
+# Hash of a file's contents, the name of its index
+def file_hash(path):
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(hash_chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Words of a text as the index keeps them
+def text_words(text):
+    return word_pattern.findall(text.lower())
+
+
+# One match, by page and by the index of its first character in the text of the page
+class PdfHit:
+    __slots__ = ('page', 'start', 'length')
+
+    def __init__(self, page, start, length):
+        self.page = page
+        self.start = start
+        self.length = length
+
+
+# The text of every page of a PDF and the pages every word is on
+class PdfTextIndex:
+    def __init__(self, pages, terms=None):
+        self.pages = pages
+        self.terms = terms if terms is not None else index_terms(pages)
+        self.sorted_terms = sorted(self.terms)
+
+    # Pages holding a word which starts with the given one
+    def pages_with(self, word):
+        pages = set()
+
+        for position in range(bisect_left(self.sorted_terms, word), len(self.sorted_terms)):
+            term = self.sorted_terms[position]
+
+            if not term.startswith(word):
+                break
+            pages.update(self.terms[term])
+        return pages
+
+    # Every match of a text, whose words may be broken over lines, in the order of the pages
+    def search(self, text, limit=listed_hits):
+        words = text_words(text)
+
+        if not words:
+            return []
+
+        pages = self.pages_with(words[0])
+
+        for word in words[1:]:
+            if not pages:
+                return []
+            pages &= self.pages_with(word)
+
+        pattern = re.compile(r'\s+'.join(re.escape(part) for part in text.split()), re.IGNORECASE)
+        hits = []
+
+        for page in sorted(pages):
+            for match in pattern.finditer(self.pages[page]):
+                hits.append(PdfHit(page, match.start(), match.end() - match.start()))
+
+                if len(hits) >= limit:
+                    return hits
+        return hits
+
+    def to_dict(self):
+        return {'index': index_version, 'pages': self.pages, 'terms': self.terms}
+
+
+# Pages every word of a PDF is on, in order
+def index_terms(pages):
+    terms = {}
+
+    for page, text in enumerate(pages):
+        for word in set(text_words(text)):
+            terms.setdefault(word, []).append(page)
+    return terms
+
+
+# The cached index of a PDF, none when there is none or it cannot be read
+def read_index(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            index = json.load(f)
+
+        if index.get('index') != index_version:
+            return None
+        return PdfTextIndex(index['pages'], index['terms'])
+    except (OSError, ValueError, TypeError, KeyError, AttributeError):
+        return None
+
+
+def write_index(path, index):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_atomically(path, json.dumps(index.to_dict()))
+
+
+# Worker thread which reads the text of a PDF page by page, or its cached index when it has been read before
+class PdfTextExtractor(QThread):
+    page_extracted = pyqtSignal(int, int)
+    index_ready = pyqtSignal(object)
+    extraction_failed = pyqtSignal(str)
+
+    def __init__(self, shared, path, folder=None, parent=None):
+        super(PdfTextExtractor, self).__init__(parent)
+
+        self.document = shared.document
+        self.path = path
+        self.folder = folder or default_folder()
+
+    def run(self):
+        try:
+            cache_path = os.path.join(self.folder, file_hash(self.path) + '.json')
+            index = read_index(cache_path)
+
+            if index is None:
+                pages = []
+                count = self.document.pageCount()
+
+                for page in range(count):
+                    if self.isInterruptionRequested():
+                        return
+
+                    pages.append(self.document.getAllText(page).text())
+                    self.page_extracted.emit(page + 1, count)
+
+                index = PdfTextIndex(pages)
+
+                # A PDF whose index cannot be cached can still be searched, it is only read again next time
+                try:
+                    write_index(cache_path, index)
+                except OSError:
+                    pass
+
+            if not self.isInterruptionRequested():
+                self.index_ready.emit(index)
+        except OSError as e:
+            self.extraction_failed.emit(str(e))
+
+    # Stopping once the current page is done
+    def stop(self):
+        self.requestInterruption()
+        self.wait()
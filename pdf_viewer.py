@@ -0,0 +1,599 @@
+# pdf_viewer.py - Viewing PDFs with one parsed document per file, a cache of rendered pages and pages rendered ahead.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+
+
+from bisect import bisect_right
+from collections import OrderedDict, deque
+import os
+import threading
+
+from pdf_search import PdfTextExtractor, listed_hits
+
+# Memory the rendered pages may take before the least recently used ones are dropped
+default_render_budget = 256 * 1024 * 1024
+
+# Pages rendered ahead of and behind the ones in view
+prefetch_pages = 2
+
+# Gap between pages, in pixels
+page_spacing = 8
+
+# Zoom levels the view steps through, 1.0 shows a page at its printed size
+zoom_levels = [0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 3.0, 4.0]
+
+# Colours matches are painted over the pages with, the one selected stands out
+hit_colour = QColor(255, 220, 0, 110)
+current_hit_colour = QColor(255, 140, 0, 150)
+
+
+# Key of a file on disk, a file changed since it was parsed is parsed again
+def file_key(path):
+    return (os.path.abspath(path), os.stat(path).st_mtime_ns)
+
+
+# A parsed PDF shared by every tab showing it, with the index of its text once it has been read
+class SharedPdf:
+    __slots__ = ('key', 'document', 'references', 'text_index')
+
+    def __init__(self, key, document):
+        self.key = key
+        self.document = document
+        self.references = 0
+        self.text_index = None
+
+
+# Parsed PDFs by file, each parsed once however many tabs show it
+class PdfDocumentCache(QObject):
+    def __init__(self, parent=None):
+        super(PdfDocumentCache, self).__init__(parent)
+
+        self.shared = {}
+
+    # Getting the parsed document of a file, parsing it only when no tab holds it yet
+    def acquire(self, path):
+        key = file_key(path)
+        shared = self.shared.get(key)
+
+        if shared is None:
+            # Qt PDF is only loaded once the first PDF is opened, it is not needed to start up
+            from PyQt6.QtPdf import QPdfDocument
+
+            document = QPdfDocument(self)
+            error = document.load(path)
+
+            if error != QPdfDocument.Error.None_:
+                document.deleteLater()
+                raise OSError(f'{os.path.basename(path)} could not be opened ({error.name.rstrip("_")})')
+
+            shared = SharedPdf(key, document)
+            self.shared[key] = shared
+
+        shared.references += 1
+        return shared
+
+    # Giving a document back, the last tab to do so frees it and its rendered pages
+    def release(self, shared):
+        shared.references -= 1
+
+        if shared.references == 0 and self.shared.get(shared.key) is shared:
+            del self.shared[shared.key]
+            page_cache().drop(shared.key)
+            shared.document.close()
+            shared.document.deleteLater()
+
+    # Number of parsed documents
+    def document_count(self):
+        return len(self.shared)
+
+
+# Rendered pages keyed by file, page and size in pixels, the size standing for the zoom level
+class PageRenderCache:
+    def __init__(self, budget=default_render_budget):
+        self.budget = budget
+        self.used = 0
+        self.images = OrderedDict()
+        self.lock = threading.Lock()
+
+    # Looking up a page, marking it as the most recently used
+    def get(self, key):
+        with self.lock:
+            image = self.images.get(key)
+
+            if image is not None:
+                self.images.move_to_end(key)
+
+            return image
+
+    def contains(self, key):
+        with self.lock:
+            return key in self.images
+
+    # Storing a page and dropping the least recently used ones while over the budget
+    def put(self, key, image):
+        with self.lock:
+            if key in self.images:
+                return
+
+            self.images[key] = image
+            self.used += image.sizeInBytes()
+
+            while self.used > self.budget and len(self.images) > 1:
+                _, dropped = self.images.popitem(last=False)
+                self.used -= dropped.sizeInBytes()
+
+    # Dropping every page of a file
+    def drop(self, document_key):
+        with self.lock:
+            for key in [key for key in self.images if key[0] == document_key]:
+                self.used -= self.images.pop(key).sizeInBytes()
+
+    # Changing the memory budget
+    def set_budget(self, budget):
+        self.budget = budget
+
+        with self.lock:
+            while self.used > self.budget and self.images:
+                _, dropped = self.images.popitem(last=False)
+                self.used -= dropped.sizeInBytes()
+
+    # Memory taken by the rendered pages
+    def memory_used(self):
+        return self.used
+
+
+# Worker thread which renders the pages a view asks for, newest requests first
+class PageRenderer(QThread):
+    page_rendered = pyqtSignal(object)
+
+    def __init__(self, shared, parent=None):
+        super(PageRenderer, self).__init__(parent)
+
+        self.document = shared.document
+        self.document_key = shared.key
+        self.requests = deque()
+        self.condition = threading.Condition()
+
+    # Replacing what is waiting with the pages a view needs now, in the order given
+    def request(self, keys):
+        with self.condition:
+            self.requests = deque(key for key in keys if not page_cache().contains(key))
+            self.condition.notify()
+
+    def run(self):
+        while not self.isInterruptionRequested():
+            with self.condition:
+                while not self.requests and not self.isInterruptionRequested():
+                    self.condition.wait(0.1)
+
+                if self.isInterruptionRequested():
+                    return
+
+                key = self.requests.popleft()
+
+            if page_cache().contains(key):
+                continue
+
+            _, page, width, height, ratio = key
+            image = self.document.render(page, QSize(width, height))
+
+            if not image.isNull():
+                image.setDevicePixelRatio(ratio)
+                page_cache().put(key, image)
+                self.page_rendered.emit(key)
+
+    # Stopping once the current page is done
+    def stop(self):
+        self.requestInterruption()
+
+        with self.condition:
+            self.condition.notify()
+        self.wait()
+
+
+# Scroll area which paints the rendered pages in view and asks for the ones it lacks
+class PdfPageView(QAbstractScrollArea):
+    zoom_changed = pyqtSignal(float)
+    page_changed = pyqtSignal(int)
+
+    def __init__(self, shared, parent=None):
+        super(PdfPageView, self).__init__(parent)
+
+        self.shared = shared
+        self.document = shared.document
+        self.zoom = 1.0
+        self.page_tops = []
+        self.page_sizes = []
+        self.content_width = 0
+        self.content_height = 0
+        self.current_page = -1
+
+        # Matches of a search by page, the one selected, and where on its page every match is once painted
+        self.hits = {}
+        self.current_hit = None
+        self.hit_bounds = {}
+
+        self.renderer = PageRenderer(shared, self)
+        self.renderer.page_rendered.connect(self.page_rendered)
+        self.renderer.start()
+
+        self.viewport().setAutoFillBackground(False)
+        self.lay_out_pages()
+
+    # Working out where every page goes at the current zoom
+    def lay_out_pages(self):
+        scale = self.zoom * self.logicalDpiX() / 72
+        top = page_spacing
+
+        self.page_tops = []
+        self.page_sizes = []
+        self.content_width = 0
+
+        for page in range(self.document.pageCount()):
+            size = self.document.pagePointSize(page)
+            width, height = max(1, round(size.width() * scale)), max(1, round(size.height() * scale))
+
+            self.page_tops.append(top)
+            self.page_sizes.append((width, height))
+            self.content_width = max(self.content_width, width + 2 * page_spacing)
+            top += height + page_spacing
+
+        self.content_height = top
+        self.update_scroll_bars()
+
+    def update_scroll_bars(self):
+        viewport = self.viewport()
+
+        self.verticalScrollBar().setRange(0, max(0, self.content_height - viewport.height()))
+        self.verticalScrollBar().setPageStep(viewport.height())
+        self.verticalScrollBar().setSingleStep(40)
+        self.horizontalScrollBar().setRange(0, max(0, self.content_width - viewport.width()))
+        self.horizontalScrollBar().setPageStep(viewport.width())
+        self.horizontalScrollBar().setSingleStep(40)
+
+    # Changing the zoom while keeping the same part of the document in view
+    def set_zoom(self, zoom):
+        if zoom == self.zoom:
+            return
+
+        scroll_bar = self.verticalScrollBar()
+        position = scroll_bar.value() / max(1, self.content_height)
+
+        self.zoom = zoom
+        self.lay_out_pages()
+        scroll_bar.setValue(round(position * self.content_height))
+
+        self.viewport().update()
+        self.zoom_changed.emit(zoom)
+
+    def zoom_in(self):
+        self.set_zoom(next((level for level in zoom_levels if level > self.zoom), zoom_levels[-1]))
+
+    def zoom_out(self):
+        self.set_zoom(next((level for level in reversed(zoom_levels) if level < self.zoom), zoom_levels[0]))
+
+    # Pages overlapping a band of the content
+    def pages_between(self, top, bottom):
+        if not self.page_tops:
+            return range(0)
+
+        first = max(0, bisect_right(self.page_tops, top) - 1)
+        last = max(first, bisect_right(self.page_tops, bottom) - 1)
+        return range(first, last + 1)
+
+    # Scrolling so that a page is at the top
+    def go_to_page(self, page):
+        if 0 <= page < len(self.page_tops):
+            self.verticalScrollBar().setValue(self.page_tops[page] - page_spacing)
+
+    # Showing the matches of a search over the pages
+    def set_hits(self, hits):
+        self.hits = {}
+        self.current_hit = None
+        self.hit_bounds = {}
+
+        for hit in hits:
+            self.hits.setdefault(hit.page, []).append(hit)
+
+        self.viewport().update()
+
+    # Where a match is on its page, in points, looked up the first time it is needed
+    def bounds(self, hit):
+        key = (hit.page, hit.start)
+        bounds = self.hit_bounds.get(key)
+
+        if bounds is None:
+            bounds = self.document.getSelectionAtIndex(hit.page, hit.start, hit.length).bounds()
+            self.hit_bounds[key] = bounds
+
+        return bounds
+
+    # Selecting a match and scrolling it into view, a third of the way down
+    def show_hit(self, hit):
+        self.current_hit = hit
+
+        if 0 <= hit.page < len(self.page_tops):
+            bounds = self.bounds(hit)
+            top = min((polygon.boundingRect().top() for polygon in bounds), default=0)
+            scale = self.page_sizes[hit.page][1] / max(1, self.document.pagePointSize(hit.page).height())
+            self.verticalScrollBar().setValue(round(self.page_tops[hit.page] + top * scale - self.viewport().height() / 3))
+
+        self.viewport().update()
+
+    # Painting the matches on a page over its image
+    def paint_hits(self, painter, page, target):
+        size = self.document.pagePointSize(page)
+
+        painter.save()
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.translate(QPointF(target.topLeft()))
+        painter.scale(target.width() / max(1, size.width()), target.height() / max(1, size.height()))
+
+        for hit in self.hits[page]:
+            painter.setBrush(current_hit_colour if hit is self.current_hit else hit_colour)
+
+            for polygon in self.bounds(hit):
+                painter.drawPolygon(polygon)
+
+        painter.restore()
+
+    # Key under which a page is rendered at the current zoom
+    def page_key(self, page):
+        ratio = self.devicePixelRatioF()
+        width, height = self.page_sizes[page]
+        return (self.shared.key, page, round(width * ratio), round(height * ratio), ratio)
+
+    def resizeEvent(self, event):
+        super(PdfPageView, self).resizeEvent(event)
+        self.update_scroll_bars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    # Ctrl and the mouse wheel zoom
+    def wheelEvent(self, event):
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            if event.angleDelta().y() > 0:
+                self.zoom_in()
+            elif event.angleDelta().y() < 0:
+                self.zoom_out()
+        else:
+            super(PdfPageView, self).wheelEvent(event)
+
+    # Painting the pages in view from the cache, with blank pages standing in for those still rendering
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(event.rect(), self.palette().dark())
+
+        top = self.verticalScrollBar().value()
+        height = self.viewport().height()
+        left = max(0, (self.viewport().width() - self.content_width) // 2) - self.horizontalScrollBar().value()
+
+        visible = self.pages_between(top, top + height)
+        missing = []
+
+        for page in visible:
+            width, page_height = self.page_sizes[page]
+            target = QRect(left + (self.content_width - width) // 2, self.page_tops[page] - top, width, page_height)
+            image = page_cache().get(self.page_key(page))
+
+            if image is None:
+                painter.fillRect(target, Qt.GlobalColor.white)
+                missing.append(page)
+            else:
+                painter.drawImage(target, image)
+
+            if page in self.hits:
+                self.paint_hits(painter, page, target)
+
+        painter.end()
+
+        # The pages in view come first, then their neighbours so that scrolling finds them rendered
+        wanted = missing + [page for page in self.pages_between(top - height, top + 2 * height) if page not in visible]
+        wanted += [page for page in range(visible.start - prefetch_pages, visible.stop + prefetch_pages) if 0 <= page < len(self.page_sizes) and page not in wanted and page not in visible]
+        self.renderer.request([self.page_key(page) for page in wanted])
+
+        if len(visible) and visible.start != self.current_page:
+            self.current_page = visible.start
+            self.page_changed.emit(self.current_page)
+
+    # Repainting once a page in view has been rendered
+    def page_rendered(self, key):
+        if key[0] == self.shared.key:
+            self.viewport().update()
+
+    # Stopping the renderer before the document is given back
+    def stop(self):
+        self.renderer.stop()
+
+
+# Tab which shows a PDF from the shared document cache
+class PdfViewer(QWidget):
+    def __init__(self, path, parent=None):
+        super(PdfViewer, self).__init__(parent)
+
+        self.path = path
+        self.shared = pdf_documents().acquire(path)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+
+        # Viewer Toolbar
+        self.viewer_toolbar = QToolBar('PDF Bar', self)
+
+        self.zoom_out = QAction('Zoom Out', self)
+        self.zoom_out.setShortcut(QKeySequence.StandardKey.ZoomOut)
+        self.zoom_out.setStatusTip('Show the pages smaller')
+
+        self.zoom_in = QAction('Zoom In', self)
+        self.zoom_in.setShortcut(QKeySequence.StandardKey.ZoomIn)
+        self.zoom_in.setStatusTip('Show the pages larger')
+
+        self.go_to = QAction('Go to Page', self)
+        self.go_to.setShortcut(QKeySequence('Ctrl+G'))
+        self.go_to.setStatusTip('Jump to a page of the PDF')
+        self.go_to.triggered.connect(self.go_to_function)
+
+        self.zoom_status = QLabel('100%')
+        self.page_status = QLabel()
+
+        # Searching the text of the PDF
+        self.search_field = QLineEdit(self)
+        self.search_field.setPlaceholderText('Search the PDF')
+        self.search_field.setStatusTip('Find text in the PDF as you type')
+        self.search_field.setClearButtonEnabled(True)
+        self.search_field.setMaximumWidth(240)
+        self.search_field.textChanged.connect(self.search)
+        self.search_field.returnPressed.connect(self.next_hit)
+
+        self.previous_match = QAction('Previous Match', self)
+        self.previous_match.setShortcut(QKeySequence('Shift+F3'))
+        self.previous_match.setShortcutContext(Qt.ShortcutContext.WidgetWithChildrenShortcut)
+        self.previous_match.setStatusTip('Jump to the previous match of the search')
+        self.previous_match.triggered.connect(self.previous_hit)
+
+        self.next_match = QAction('Next Match', self)
+        self.next_match.setShortcut(QKeySequence('F3'))
+        self.next_match.setShortcutContext(Qt.ShortcutContext.WidgetWithChildrenShortcut)
+        self.next_match.setStatusTip('Jump to the next match of the search')
+        self.next_match.triggered.connect(self.next_hit)
+
+        self.search_status = QLabel()
+
+        self.viewer_toolbar.addActions([self.zoom_out, self.zoom_in, self.go_to])
+        self.viewer_toolbar.addSeparator()
+        self.viewer_toolbar.addWidget(self.zoom_status)
+        self.viewer_toolbar.addSeparator()
+        self.viewer_toolbar.addWidget(self.page_status)
+        self.viewer_toolbar.addSeparator()
+        self.viewer_toolbar.addWidget(self.search_field)
+        self.viewer_toolbar.addActions([self.previous_match, self.next_match])
+        self.viewer_toolbar.addWidget(self.search_status)
+        layout.addWidget(self.viewer_toolbar)
+
+        # Pages of the PDF
+        self.page_view = PdfPageView(self.shared, self)
+        self.page_view.setStatusTip('PDF Viewer')
+        self.page_view.zoom_changed.connect(lambda zoom: self.zoom_status.setText(f'{round(zoom * 100)}%'))
+        self.page_view.page_changed.connect(lambda page: self.page_status.setText(f'Page {page + 1} of {self.shared.document.pageCount()}'))
+        layout.addWidget(self.page_view)
+
+        self.zoom_out.triggered.connect(self.page_view.zoom_out)
+        self.zoom_in.triggered.connect(self.page_view.zoom_in)
+
+        # The text is read in the background unless another tab of the same file already has
+        self.hits = []
+        self.hit = -1
+        self.extractor = None
+
+        if self.shared.text_index is None:
+            self.extractor = PdfTextExtractor(self.shared, path, parent=self)
+            self.extractor.page_extracted.connect(lambda page, count: self.search_status.setText(f'Reading text, page {page} of {count}'))
+            self.extractor.index_ready.connect(self.index_ready)
+            self.extractor.extraction_failed.connect(lambda error: self.search_status.setText('Text unavailable: ' + error))
+            self.extractor.start()
+
+    # Defining Go to Page
+    def go_to_function(self):
+        page, ok = QInputDialog.getInt(self, 'Go to Page', 'Put the number of the page to jump to.', self.page_view.current_page + 1, 1, max(1, self.shared.document.pageCount()))
+
+        if ok:
+            self.page_view.go_to_page(page - 1)
+
+    # The text has been read, searching it for whatever was typed meanwhile
+    def index_ready(self, index):
+        if self.shared is None:
+            return
+
+        self.shared.text_index = index
+        self.search_status.clear()
+        self.search(self.search_field.text())
+
+    # Finding every match of the text typed, jumping to the first one from the page in view
+    def search(self, text):
+        index = self.shared.text_index if self.shared is not None else None
+
+        if index is None:
+            return
+
+        self.hits = index.search(text) if text.strip() else []
+        self.hit = -1
+        self.page_view.set_hits(self.hits)
+
+        if not text.strip():
+            self.search_status.clear()
+        elif not self.hits:
+            self.search_status.setText('No matches')
+        else:
+            self.show_hit(next((number for number, hit in enumerate(self.hits) if hit.page >= self.page_view.current_page), 0))
+
+    def show_hit(self, number):
+        self.hit = number
+        self.page_view.show_hit(self.hits[number])
+        self.search_status.setText(f'Match {number + 1} of {len(self.hits)}' + ('+' if len(self.hits) >= listed_hits else ''))
+
+    # Stepping through the matches, round from the last to the first
+    def next_hit(self):
+        if self.hits:
+            self.show_hit((self.hit + 1) % len(self.hits))
+
+    def previous_hit(self):
+        if self.hits:
+            self.show_hit((self.hit - 1) % len(self.hits))
+
+    # Giving the document back once the tab goes away
+    def close_document(self):
+        if self.shared is not None:
+            if self.extractor is not None:
+                self.extractor.stop()
+
+            self.page_view.stop()
+            pdf_documents().release(self.shared)
+            self.shared = None
+
+
+# The caches shared by the whole process, made on first use and living on the GUI thread
+shared_documents = None
+shared_pages = None
+shared_cache_lock = threading.Lock()
+
+
+def pdf_documents():
+    global shared_documents
+
+    with shared_cache_lock:
+        if shared_documents is None:
+            shared_documents = PdfDocumentCache()
+
+            if QCoreApplication.instance() is not None:
+                shared_documents.moveToThread(QCoreApplication.instance().thread())
+
+        return shared_documents
+
+
+def page_cache():
+    global shared_pages
+
+    with shared_cache_lock:
+        if shared_pages is None:
+            shared_pages = PageRenderCache()
+
+        return shared_pages
@@ -0,0 +1,71 @@
+# plain_workspace.py - Editing text files in Qt's plain text editor instead of the rich text one.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# A .txt file keeps no formatting, so it opens in a QPlainTextEdit. Its layout works line by line and only for
+# the lines in view, where the rich text layout lays out every block of the document with its formats. A plain
+# text editor only shows documents laid out as plain text, which a document is given before it is handed over.
+# Converting a workspace to rich text copies its document into a QTextEdit, without the undo history.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+
+
+from document_saver import document_format
+
+# Editors a workspace can be made of
+workspace_editors = (QTextEdit, QPlainTextEdit)
+
+
+# Whether a file opens in a plain text workspace
+def is_plain_path(path):
+    return document_format(path) == 'txt'
+
+
+# Whether a widget is a plain text workspace
+def is_plain_editor(editor):
+    return isinstance(editor, QPlainTextEdit)
+
+
+# Giving a document the layout of the editor it is handed to, the rich text one is made when first asked for
+def fit_layout(editor, document):
+    if is_plain_editor(editor):
+        document.setDocumentLayout(QPlainTextDocumentLayout(document))
+
+
+# Handing an editor another document. The editor only deletes a replaced document which it made itself, so one
+# it was handed, owned by the editor, is deleted here
+def replace_document(editor, document):
+    old = editor.document()
+    owned = old is not document and old.parent() is editor
+
+    fit_layout(editor, document)
+    editor.setDocument(document)
+
+    if owned:
+        old.deleteLater()
+
+
+# Copy of a plain text workspace's document for a rich text editor, with its cursor
+def rich_copy(editor, parent=None):
+    document = editor.document().clone(parent)
+    document.setModified(editor.document().isModified())
+
+    cursor = QTextCursor(document)
+    cursor.setPosition(editor.textCursor().anchor())
+    cursor.setPosition(editor.textCursor().position(), QTextCursor.MoveMode.KeepAnchor)
+    return document, cursor
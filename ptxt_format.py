@@ -0,0 +1,492 @@
+# ptxt_format.py - The compact binary PowerText Document (.ptxt) format, version 2.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Layout of a version 2 file:
+#
+#     header   b'PTXT', version (u8), flags (u8), QDataStream version (u16, big endian)
+#     body     records until an END record, zlib compressed as one stream when flags has COMPRESSED
+#     record   tag (u8), payload length (varint), payload
+#
+# Every format is written once, the first time it is used, and referred to by its position in the
+# format table afterwards. Records a reader does not know are skipped, so later versions can add some.
+# Version 1 files are the HTML written by QTextEdit.toHtml() and are read transparently.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+
+
+import os
+import struct
+import zlib
+
+from image_cache import original_image
+
+magic = b'PTXT'
+version = 2
+header = struct.Struct('>4sBBH')
+
+# Header flags
+COMPRESSED = 1
+
+# Record tags
+END = 0
+FORMAT = 1
+BLOCK = 2
+LIST = 3
+TABLE = 4
+CELL = 5
+TABLE_END = 6
+IMAGE = 7
+
+# Formats are written with a fixed QDataStream version so files do not depend on the Qt they were saved with
+stream_version = QDataStream.Version.Qt_6_0
+
+read_size = 256 * 1024
+
+
+# Raised for files which claim to be version 2 but cannot be read as such
+class PtxtError(Exception):
+    pass
+
+
+# Encoding of unsigned integers, 7 bits per byte with the high bit marking that more follow
+def encode_varint(value):
+    if value < 0x80:
+        return bytes((value,))
+
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_varint(data, position):
+    value = data[position]
+    position += 1
+
+    if value < 0x80:
+        return value, position
+
+    value &= 0x7F
+    shift = 7
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+# Format serialization
+def format_to_bytes(text_format):
+    data = QByteArray()
+    stream = QDataStream(data, QIODevice.OpenModeFlag.WriteOnly)
+    stream.setVersion(stream_version)
+    stream << text_format
+    return bytes(data)
+
+
+def format_from_bytes(data, data_stream_version=stream_version):
+    text_format = QTextFormat()
+    stream = QDataStream(QByteArray(data))
+    stream.setVersion(data_stream_version)
+    stream >> text_format
+    return text_format
+
+
+# A format of the kind a record needs. Qt does not check the kind of a format it is handed, and a damaged file
+# may point at a format of another kind
+def checked_format(text_format, is_kind):
+    if not is_kind(text_format):
+        raise PtxtError('PowerText document is damaged')
+    return text_format
+
+
+# Whether the start of a file is a version 2 document
+def is_ptxt(head):
+    return head[:len(magic)] == magic
+
+
+# Writes documents as a stream of records
+class PtxtWriter:
+    def __init__(self, f, compress=True, level=1):
+        self.f = f
+        self.formats = {}
+        self.format_ids = {}
+        self.object_format_ids = {}
+        self.lists = {}
+        self.images = set()
+        self.compressor = zlib.compressobj(level) if compress else None
+
+        self.f.write(header.pack(magic, version, COMPRESSED if compress else 0, stream_version.value))
+
+    # Writing a single record
+    def write_record(self, tag, payload=b''):
+        data = bytes((tag,)) + encode_varint(len(payload)) + payload
+
+        if self.compressor is not None:
+            data = self.compressor.compress(data)
+
+        if data:
+            self.f.write(data)
+
+    # Finishing the stream
+    def close(self):
+        self.write_record(END)
+
+        if self.compressor is not None:
+            self.f.write(self.compressor.flush())
+
+    # Position of a format in the table, written out the first time a format with the same content is seen
+    def intern_format(self, text_format):
+        data = format_to_bytes(text_format)
+        format_id = self.formats.get(data)
+
+        if format_id is None:
+            format_id = self.formats[data] = len(self.formats)
+            self.write_record(FORMAT, data)
+
+            if text_format.isImageFormat():
+                self.write_image(text_format.toImageFormat().name())
+
+        return format_id
+
+    # Formats remembered by their index in the document, so most lookups never serialize anything
+    def format_id(self, index, text_format):
+        format_id = self.format_ids.get(index)
+
+        if format_id is None:
+            format_id = self.format_ids[index] = self.intern_format(text_format)
+
+        return format_id
+
+    # Formats tied to an object refer to it by index, which means nothing in another document
+    def object_format_id(self, index, text_format):
+        format_id = self.object_format_ids.get(index)
+
+        if format_id is None:
+            text_format.setObjectIndex(-1)
+            format_id = self.object_format_ids[index] = self.intern_format(text_format)
+
+        return format_id
+
+    # Writing a whole document
+    def write_document(self, document):
+        self.document = document
+        self.write_frame(document.rootFrame())
+        self.close()
+
+    def write_frame(self, frame):
+        iterator = frame.begin()
+
+        while not iterator.atEnd():
+            child = iterator.currentFrame()
+
+            if child is None:
+                self.write_block(iterator.currentBlock())
+            elif isinstance(child, QTextTable):
+                self.write_table(child)
+            else:
+                # Frames which are not tables keep their contents but not the frame itself
+                self.write_frame(child)
+
+            iterator += 1
+
+    def write_table(self, table):
+        self.write_record(TABLE, encode_varint(table.rows()) + encode_varint(table.columns()) + encode_varint(self.object_format_id(table.formatIndex(), table.format())))
+
+        # The table frame holds the contents of every cell in order, a new cell starts wherever the position crosses into one
+        current = None
+        iterator = table.begin()
+
+        while not iterator.atEnd():
+            child = iterator.currentFrame()
+            cell = table.cellAt(iterator.currentBlock().position() if child is None else child.firstPosition())
+
+            if (cell.row(), cell.column()) != current:
+                current = (cell.row(), cell.column())
+                payload = encode_varint(cell.row()) + encode_varint(cell.column()) + encode_varint(cell.rowSpan()) + encode_varint(cell.columnSpan())
+                self.write_record(CELL, payload + encode_varint(self.format_id(cell.tableCellFormatIndex(), cell.format())))
+
+            if child is None:
+                self.write_block(iterator.currentBlock())
+            elif isinstance(child, QTextTable):
+                self.write_table(child)
+            else:
+                self.write_frame(child)
+
+            iterator += 1
+
+        self.write_record(TABLE_END)
+
+    def write_block(self, block):
+        text_list = block.textList()
+        list_id = 0
+
+        if text_list is not None:
+            list_id = self.lists.get(text_list.objectIndex())
+
+            if list_id is None:
+                list_id = self.lists[text_list.objectIndex()] = len(self.lists) + 1
+                self.write_record(LIST, encode_varint(list_id) + encode_varint(self.object_format_id(text_list.formatIndex(), text_list.format())))
+
+            block_format_id = self.object_format_id(block.blockFormatIndex(), block.blockFormat())
+        else:
+            block_format_id = self.format_id(block.blockFormatIndex(), block.blockFormat())
+
+        parts = [encode_varint(block_format_id),
+                 encode_varint(self.format_id(block.charFormatIndex(), block.charFormat())),
+                 encode_varint(list_id)]
+
+        format_ids = self.format_ids
+        iterator = block.begin()
+        while not iterator.atEnd():
+            fragment = iterator.fragment()
+            index = fragment.charFormatIndex()
+            format_id = format_ids.get(index)
+
+            if format_id is None:
+                format_id = self.format_id(index, fragment.charFormat())
+
+            text = fragment.text().encode('utf-8')
+            parts.append(encode_varint(format_id))
+            parts.append(encode_varint(len(text)))
+            parts.append(text)
+            iterator += 1
+
+        self.write_record(BLOCK, b''.join(parts))
+
+    # Embedding an image the first time it is used
+    def write_image(self, name):
+        if name in self.images:
+            return
+
+        self.images.add(name)
+        data = None
+
+        # Files and the data embedded images were read from go in as they are, anything else goes in as PNG
+        if os.path.isfile(name):
+            with open(name, 'rb') as f:
+                data = f.read()
+        else:
+            resource = original_image(self.document, name)
+
+            if isinstance(resource, QPixmap):
+                resource = resource.toImage()
+
+            if isinstance(resource, QByteArray) and not resource.isEmpty():
+                data = bytes(resource)
+            elif isinstance(resource, QImage) and not resource.isNull():
+                buffer = QBuffer()
+                buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+                resource.save(buffer, 'PNG')
+                data = bytes(buffer.data())
+
+        if data is not None:
+            encoded_name = name.encode('utf-8')
+            self.write_record(IMAGE, encode_varint(len(encoded_name)) + encoded_name + data)
+
+
+# Reads documents from a stream of records
+class PtxtReader:
+    def __init__(self, f):
+        self.f = f
+
+        data = f.read(header.size)
+        if len(data) < header.size or not is_ptxt(data):
+            raise PtxtError('Not a PowerText version 2 document')
+
+        _, self.version, self.flags, self.stream_version = header.unpack(data)
+        if self.version > version:
+            raise PtxtError(f'PowerText document version {self.version} is newer than this PowerText supports')
+
+        self.decompressor = zlib.decompressobj() if self.flags & COMPRESSED else None
+        self.buffer = bytearray()
+        self.position = 0
+        self.exhausted = False
+
+    # Buffering at least a number of bytes past the current position, as far as the stream allows
+    def fill(self, size):
+        while len(self.buffer) - self.position < size and not self.exhausted:
+            data = self.f.read(read_size)
+
+            try:
+                if not data:
+                    self.exhausted = True
+                    if self.decompressor is not None:
+                        data = self.decompressor.flush()
+
+                        # The compressed stream of a whole document ends with its checksum, before the file does
+                        if not self.decompressor.eof:
+                            raise PtxtError('PowerText document ends unexpectedly')
+                elif self.decompressor is not None:
+                    data = self.decompressor.decompress(data)
+            except zlib.error as e:
+                raise PtxtError(f'PowerText document is damaged: {e}')
+
+            # Dropping the consumed front of a bytearray does not copy the rest
+            del self.buffer[:self.position]
+            self.position = 0
+            self.buffer += data
+
+        return len(self.buffer) - self.position >= size
+
+    # Iterating over the records as (tag, payload)
+    def records(self):
+        while True:
+            # A tag and the longest varint a record length needs
+            self.fill(11)
+
+            try:
+                tag = self.buffer[self.position]
+                length, position = decode_varint(self.buffer, self.position + 1)
+            except IndexError:
+                raise PtxtError('PowerText document ends unexpectedly')
+
+            self.position = position
+            if not self.fill(length):
+                raise PtxtError('PowerText document ends unexpectedly')
+
+            payload = bytes(self.buffer[self.position:self.position + length])
+            self.position += length
+
+            if tag == END:
+                return
+
+            yield tag, payload
+
+    # Reading the whole document into an empty QTextDocument
+    def read_document(self, document):
+        formats = []
+        lists = {}
+        list_formats = {}
+
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+
+        # Whether the cursor sits on a block which exists already and only needs its formats set
+        fresh = True
+        tables = []
+
+        # A record whose payload does not decode is as damaged as a file which ends early
+        try:
+            for tag, payload in self.records():
+                if tag == FORMAT:
+                    formats.append(format_from_bytes(payload, QDataStream.Version(self.stream_version)))
+
+                elif tag == BLOCK:
+                    block_format_id, position = decode_varint(payload, 0)
+                    char_format_id, position = decode_varint(payload, position)
+                    list_id, position = decode_varint(payload, position)
+                    block_format = checked_format(formats[block_format_id], QTextFormat.isBlockFormat).toBlockFormat()
+                    char_format = checked_format(formats[char_format_id], QTextFormat.isCharFormat).toCharFormat()
+
+                    if fresh:
+                        cursor.setBlockFormat(block_format)
+                        cursor.setBlockCharFormat(char_format)
+                        fresh = False
+                    else:
+                        cursor.insertBlock(block_format, char_format)
+
+                    if list_id:
+                        if list_id in lists:
+                            lists[list_id].add(cursor.block())
+                        else:
+                            lists[list_id] = cursor.createList(list_formats[list_id])
+
+                    while position < len(payload):
+                        fragment_format_id, position = decode_varint(payload, position)
+                        length, position = decode_varint(payload, position)
+                        cursor.insertText(payload[position:position + length].decode('utf-8'), checked_format(formats[fragment_format_id], QTextFormat.isCharFormat).toCharFormat())
+                        position += length
+
+                elif tag == LIST:
+                    list_id, position = decode_varint(payload, 0)
+                    format_id, position = decode_varint(payload, position)
+                    list_formats[list_id] = checked_format(formats[format_id], QTextFormat.isListFormat).toListFormat()
+
+                elif tag == TABLE:
+                    rows, position = decode_varint(payload, 0)
+                    columns, position = decode_varint(payload, position)
+                    format_id, position = decode_varint(payload, position)
+
+                    table = cursor.insertTable(rows, columns, checked_format(formats[format_id], QTextFormat.isTableFormat).toTableFormat())
+                    if table is None:
+                        raise PtxtError('PowerText document is damaged')
+
+                    tables.append(table)
+
+                elif tag == CELL:
+                    values = []
+                    position = 0
+                    for _ in range(5):
+                        value, position = decode_varint(payload, position)
+                        values.append(value)
+                    row, column, row_span, column_span, format_id = values
+
+                    table = tables[-1]
+                    if row_span > 1 or column_span > 1:
+                        table.mergeCells(row, column, row_span, column_span)
+
+                    cell = table.cellAt(row, column)
+                    if not cell.isValid():
+                        raise PtxtError('PowerText document is damaged')
+
+                    cell.setFormat(checked_format(formats[format_id], QTextFormat.isCharFormat).toCharFormat())
+                    cursor = cell.firstCursorPosition()
+                    fresh = True
+
+                elif tag == TABLE_END:
+                    # The block following a table always exists already
+                    table = tables.pop()
+                    cursor = QTextCursor(document)
+                    cursor.setPosition(table.lastPosition() + 1)
+                    fresh = True
+
+                elif tag == IMAGE:
+                    length, position = decode_varint(payload, 0)
+                    name = payload[position:position + length].decode('utf-8')
+
+                    # Kept as it was written, Qt decodes an image once it is shown
+                    document.addResource(QTextDocument.ResourceType.ImageResource, QUrl(name), QByteArray(payload[position + length:]))
+        except (IndexError, KeyError, struct.error, UnicodeDecodeError) as e:
+            raise PtxtError('PowerText document is damaged') from e
+
+        cursor.endEditBlock()
+
+
+# Writing a document to a version 2 file object
+def write_ptxt(document, f, compress=True):
+    writer = PtxtWriter(f, compress)
+    writer.write_document(document)
+
+
+# Reading a .ptxt file of either version into a document
+def read_ptxt(document, f):
+    head = f.read(len(magic))
+
+    if is_ptxt(head):
+        f.seek(0)
+        PtxtReader(f).read_document(document)
+    else:
+        # Version 1 files are HTML
+        document.setHtml((head + f.read()).decode('utf-8'))
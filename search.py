@@ -0,0 +1,703 @@
+# search.py - Finding and replacing text across every workspace on a worker thread.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Every searched document keeps an index of the text of its blocks, read once from the raw text of the
+# document and afterwards kept up to date from its contentsChange signal, re-reading only the blocks an
+# edit touched. A search hands the worker a copy of that list, which is only a list of references to
+# strings that never change, and the worker searches it a slice at a time, so the GUI thread gets the
+# interpreter in between. Hibernated workspaces are read from their scratch file by the worker itself.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+from PyQt6 import sip
+
+
+from bisect import bisect_right
+from collections import deque
+import queue
+import re
+import threading
+import time
+
+from ptxt_format import read_ptxt
+from plain_workspace import workspace_editors
+
+# Characters searched at once by the worker, a regular expression holds the interpreter until it is done with them
+search_chunk_characters = 64 * 1024
+
+# An edit touching more blocks than this has its document read again on the next search, instead of block by block
+index_rebuild_blocks = 256
+
+# Matches the worker hands over at once
+result_batch_size = 500
+
+# Matches listed in the panel, every match is counted and replaced regardless
+listed_results = 10000
+
+# Characters of text shown around a match
+preview_characters = 80
+
+# How long the GUI thread prepares documents for the worker before letting events through, in seconds
+prepare_slice = 0.01
+
+# Times a document edited while its replacements were worked out is searched again
+replace_attempts = 3
+
+# Characters which end a block in the raw text of a document: paragraphs, and the start and end of frames
+block_separators = re.compile('[\u2029\ufdd0\ufdd1]')
+
+
+class SearchInterrupted(Exception):
+    pass
+
+
+# One match, with where it is in the document and what replaces it
+class Match:
+    __slots__ = ('position', 'length', 'text', 'line', 'preview', 'replacement')
+
+    def __init__(self, position, text, line, preview, replacement=None):
+        self.position = position
+        self.length = len(text)
+        self.text = text
+        self.line = line
+        self.preview = preview
+        self.replacement = replacement
+
+
+# The expression a search looks for, plain text is matched as it is
+def compile_pattern(text, regular_expression=False, match_case=False, whole_words=False):
+    pattern = text if regular_expression else re.escape(text)
+
+    if whole_words:
+        pattern = r'\b(?:' + pattern + r')\b'
+
+    return re.compile(pattern, re.MULTILINE | (0 if match_case else re.IGNORECASE))
+
+
+# Text of every block of a document, from its raw text in one go
+def block_texts(document):
+    return block_separators.split(document.toRawText())
+
+
+# Text of every block of a hibernated workspace, read from its scratch file
+def read_scratch(path):
+    document = QTextDocument()
+
+    with open(path, 'rb') as f:
+        read_ptxt(document, f)
+    return block_texts(document)
+
+
+# Line of text around a match, shortened to what fits a row of the panel
+def preview_text(text, start, end):
+    left = max(0, start - (preview_characters - (end - start)) // 2)
+    preview = text[left:left + max(preview_characters, end - start)].strip()
+    return ('...' if left else '') + preview.replace('\u2028', ' ')
+
+
+# Every match in a list of block texts, joined a slice at a time with newlines, so that ^ and $ match at the
+# ends of blocks. Matches reaching across a block border and empty matches are left out
+def search_blocks(blocks, pattern, template=None, check_interruption=lambda: None):
+    position = 0
+    first = 0
+
+    while first < len(blocks):
+        check_interruption()
+
+        # Slices end at a block border, a single block larger than a slice is searched on its own
+        last = first
+        size = 0
+        starts = []
+
+        while last < len(blocks) and (last == first or size + len(blocks[last]) <= search_chunk_characters):
+            starts.append(size)
+            size += len(blocks[last]) + 1
+            last += 1
+
+        text = '\n'.join(blocks[first:last])
+
+        for found in pattern.finditer(text):
+            start, end = found.span()
+
+            if start == end:
+                continue
+
+            block = bisect_right(starts, start) - 1
+
+            if end > starts[block] + len(blocks[first + block]):
+                continue
+
+            column = start - starts[block]
+            line = blocks[first + block]
+            replacement = found.expand(template) if template is not None else None
+
+            yield Match(position + start, found.group(), first + block, preview_text(line, column, column + end - start), replacement)
+
+        position += size
+        first = last
+
+
+# Text of a document's blocks, kept up to date as it is edited
+class TextIndex(QObject):
+    def __init__(self, document):
+        super(TextIndex, self).__init__(document)
+
+        self.document = document
+        self.blocks = None
+
+        # Counts every change, a search result is only where it says while the count is the same
+        self.generation = 0
+
+        document.contentsChange.connect(self.contents_change)
+
+    # Text of every block, read again when an edit was too large to follow
+    def texts(self):
+        if self.blocks is None:
+            self.blocks = block_texts(self.document)
+
+        return self.blocks
+
+    # Reading the blocks an edit touched again, the blocks after them only moved
+    def contents_change(self, position, removed, added):
+        self.generation += 1
+
+        if self.blocks is None:
+            return
+
+        document = self.document
+        first = document.findBlock(position)
+        last = document.findBlock(position + added)
+
+        if not last.isValid():
+            last = document.lastBlock()
+
+        count = last.blockNumber() - first.blockNumber() + 1
+        replaced = count - (document.blockCount() - len(self.blocks))
+
+        if not first.isValid() or count > index_rebuild_blocks or replaced < 0 or first.blockNumber() + replaced > len(self.blocks):
+            self.blocks = None
+            return
+
+        texts = []
+        block = first
+
+        for _ in range(count):
+            texts.append(block.text())
+            block = block.next()
+
+        self.blocks[first.blockNumber():first.blockNumber() + replaced] = texts
+
+
+# Index of a document, made on its first search and freed along with the document
+def text_index(document):
+    index = document.findChild(TextIndex)
+    return index if index is not None else TextIndex(document)
+
+
+# Worker thread which searches the documents handed to it, one after another until told there are no more
+class SearchWorker(QThread):
+    matches_found = pyqtSignal(object, list)
+    document_searched = pyqtSignal(object, object, list)
+    document_failed = pyqtSignal(object, str)
+
+    def __init__(self, pattern, template=None, parent=None):
+        super(SearchWorker, self).__init__(parent)
+
+        self.pattern = pattern
+        self.template = template
+        self.jobs = queue.Queue()
+
+        # Cleared while the GUI thread edits a document, so the two do not take turns with the interpreter
+        self.resumed = threading.Event()
+        self.resumed.set()
+
+    # Searching the text of a document, or of its scratch file when it is hibernated
+    def add(self, editor, generation, blocks=None, scratch_path=None):
+        self.jobs.put((editor, generation, blocks, scratch_path))
+
+    # No more documents are coming
+    def finish_input(self):
+        self.jobs.put(None)
+
+    def stop(self):
+        self.requestInterruption()
+        self.resumed.set()
+        self.jobs.put(None)
+
+    def pause(self):
+        self.resumed.clear()
+
+    def resume(self):
+        self.resumed.set()
+
+    def check_interruption(self):
+        self.resumed.wait()
+
+        if self.isInterruptionRequested():
+            raise SearchInterrupted()
+
+    def run(self):
+        while not self.isInterruptionRequested():
+            job = self.jobs.get()
+
+            if job is None:
+                return
+
+            editor, generation, blocks, scratch_path = job
+
+            try:
+                if blocks is None:
+                    blocks = read_scratch(scratch_path)
+
+                # Replacements are handed over whole, as they are applied as one edit
+                matches = []
+                batch = []
+
+                for match in search_blocks(blocks, self.pattern, self.template, self.check_interruption):
+                    if self.template is not None:
+                        matches.append(match)
+                        continue
+
+                    batch.append(match)
+
+                    if len(batch) >= result_batch_size:
+                        self.matches_found.emit(editor, batch)
+                        batch = []
+
+                if batch:
+                    self.matches_found.emit(editor, batch)
+
+                self.document_searched.emit(editor, generation, matches)
+            except SearchInterrupted:
+                return
+            except Exception as e:
+                self.document_failed.emit(editor, str(e))
+
+
+# Searches of every workspace of a tab widget, found matches are streamed out as the worker finds them
+class FindReplace(QObject):
+    matches_found = pyqtSignal(object, list)
+    search_finished = pyqtSignal(int, int)
+    replace_finished = pyqtSignal(int, int, list)
+
+    def __init__(self, tabs, parent=None):
+        super(FindReplace, self).__init__(parent)
+
+        self.tabs = tabs
+        self.worker = None
+        self.template = None
+        self.pending = deque()
+        self.outstanding = 0
+        self.found = 0
+        self.documents = set()
+        self.skipped = []
+        self.attempts = {}
+        self.generations = {}
+
+        # What is kept of a hibernated workspace, its text is read from its scratch file
+        self.hibernated = lambda editor: None
+
+        # Bringing a hibernated workspace back once it turns out to have something to replace
+        self.restore = lambda editor: True
+
+        # Workspaces which may not be edited right now, such as ones still loading
+        self.busy = lambda editor: False
+
+        # How the replacements of a document are applied, the owner may set the layout aside meanwhile
+        self.edit = lambda editor, change: change()
+
+    def editors(self):
+        return [self.tabs.widget(index) for index in range(self.tabs.count()) if isinstance(self.tabs.widget(index), workspace_editors)]
+
+    # Searching every workspace for a pattern, with a replacement template every match is replaced as well
+    def search(self, pattern, template=None):
+        self.stop()
+
+        self.worker = SearchWorker(pattern, template, self)
+        self.worker.matches_found.connect(self.worker_matches_found)
+        self.worker.document_searched.connect(self.document_searched)
+        self.worker.document_failed.connect(self.document_failed)
+        self.worker.finished.connect(lambda worker=self.worker: worker.deleteLater())
+
+        self.template = template
+        self.pending = deque(self.editors())
+        self.outstanding = 0
+        self.found = 0
+        self.documents = set()
+        self.skipped = []
+        self.attempts = {}
+
+        # Index of every editor handed to the worker and its generation then, replacements need it unchanged
+        self.generations = {}
+
+        self.worker.start()
+        self.prepare()
+
+    def running(self):
+        return self.worker is not None
+
+    # Handing documents to the worker a few at a time, making an index takes a moment for a large document
+    def prepare(self):
+        if self.worker is None:
+            return
+
+        deadline = time.perf_counter() + prepare_slice
+
+        while self.pending and time.perf_counter() < deadline:
+            editor = self.pending.popleft()
+
+            if sip.isdeleted(editor):
+                continue
+
+            if self.template is not None and self.busy(editor):
+                self.skipped.append(editor)
+                continue
+
+            tab = self.hibernated(editor)
+
+            if tab is not None:
+                self.worker.add(editor, None, scratch_path=tab.scratch_path)
+            else:
+                index = text_index(editor.document())
+                self.generations[editor] = index
+                self.worker.add(editor, index.generation, blocks=list(index.texts()))
+
+            self.outstanding += 1
+
+        if self.pending:
+            QTimer.singleShot(0, self.prepare)
+        else:
+            self.check_finished()
+
+    def worker_matches_found(self, editor, matches):
+        if self.sender() is not self.worker:
+            return
+
+        self.found += len(matches)
+        self.documents.add(editor)
+        self.matches_found.emit(editor, matches)
+
+    def document_searched(self, editor, generation, matches):
+        if self.sender() is not self.worker:
+            return
+
+        self.outstanding -= 1
+
+        if self.template is not None and matches and not sip.isdeleted(editor):
+            if generation is None and self.hibernated(editor) is not None:
+                # Only a hibernated workspace with something to replace is brought back, and searched again
+                self.worker.pause()
+
+                try:
+                    restored = self.restore(editor)
+                finally:
+                    self.worker.resume()
+
+                if restored:
+                    self.pending.append(editor)
+                    self.prepare()
+                    return
+
+                self.skipped.append(editor)
+            elif self.is_current(editor, generation):
+                self.replace(editor, matches)
+            elif self.attempts.get(editor, 0) < replace_attempts:
+                # Edited since it was handed over, so the positions are off and it is searched again
+                self.attempts[editor] = self.attempts.get(editor, 0) + 1
+                self.pending.append(editor)
+                self.prepare()
+                return
+            else:
+                self.skipped.append(editor)
+
+        self.check_finished()
+
+    def document_failed(self, editor, message):
+        if self.sender() is not self.worker:
+            return
+
+        self.outstanding -= 1
+        self.skipped.append(editor)
+        self.check_finished()
+
+    # Whether a document is still as it was when handed over
+    def is_current(self, editor, generation):
+        index = self.generations.get(editor)
+        return index is not None and not sip.isdeleted(index) and index.document is editor.document() and index.generation == generation
+
+    # Replacing every match of a document as one edit, from the end so the positions before stay where they are
+    def replace(self, editor, matches):
+        document = editor.document()
+
+        def change():
+            cursor = QTextCursor(document)
+            cursor.beginEditBlock()
+
+            for match in reversed(matches):
+                cursor.setPosition(match.position)
+                cursor.setPosition(match.position + match.length, QTextCursor.MoveMode.KeepAnchor)
+                cursor.insertText(match.replacement)
+
+            cursor.endEditBlock()
+
+        self.worker.pause()
+
+        try:
+            self.edit(editor, change)
+        finally:
+            self.worker.resume()
+
+        self.found += len(matches)
+        self.documents.add(editor)
+
+    def check_finished(self):
+        if self.worker is None or self.pending or self.outstanding:
+            return
+
+        worker = self.worker
+        self.worker = None
+        worker.finish_input()
+
+        if self.template is not None:
+            self.replace_finished.emit(self.found, len(self.documents), [editor for editor in self.skipped if not sip.isdeleted(editor)])
+        else:
+            self.search_finished.emit(self.found, len(self.documents))
+
+    # Stopping a running search, whatever it found or replaced so far stays
+    def stop(self):
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+            self.pending.clear()
+
+    # Waiting for the worker to stop before the application quits
+    def abandon(self):
+        worker = self.worker
+        self.stop()
+
+        if worker is not None:
+            worker.wait()
+
+    # Selecting a match in its workspace, unless its text changed since it was found
+    def show_match(self, editor, match):
+        if sip.isdeleted(editor):
+            return False
+
+        self.tabs.setCurrentWidget(editor)
+        document = editor.document()
+
+        if match.position + match.length >= document.characterCount():
+            return False
+
+        cursor = QTextCursor(document)
+        cursor.setPosition(match.position)
+        cursor.setPosition(match.position + match.length, QTextCursor.MoveMode.KeepAnchor)
+
+        if cursor.selectedText() != match.text:
+            return False
+
+        editor.setTextCursor(cursor)
+        editor.setFocus()
+        return True
+
+
+# Template a replacement is made from, plain text is taken as it is
+def replacement_template(text, regular_expression=False):
+    return text if regular_expression else text.replace('\\', '\\\\')
+
+
+# Panel with what to find and replace, listing the matches of every workspace as they are found
+class FindReplacePanel(QDockWidget):
+    def __init__(self, find_replace, parent=None):
+        super(FindReplacePanel, self).__init__('Find and Replace', parent)
+
+        self.find_replace = find_replace
+        self.setObjectName('Find and Replace')
+
+        # Results listed so far, grouped under their workspace
+        self.groups = {}
+        self.listed = 0
+
+        panel = QWidget()
+        layout = QVBoxLayout()
+        panel.setLayout(layout)
+        self.setWidget(panel)
+
+        self.find_text = QLineEdit()
+        self.find_text.setPlaceholderText('Find')
+        self.find_text.setStatusTip('Text to find in every workspace, Enter to search')
+        self.find_text.returnPressed.connect(self.find_all)
+        layout.addWidget(self.find_text)
+
+        self.replace_text = QLineEdit()
+        self.replace_text.setPlaceholderText('Replace with')
+        self.replace_text.setStatusTip('Text every match is replaced with, \\1 stands for the first group of a regular expression')
+        layout.addWidget(self.replace_text)
+
+        # Search Options
+        options = QHBoxLayout()
+        self.match_case = QCheckBox('Match case')
+        self.whole_words = QCheckBox('Whole words')
+        self.regular_expression = QCheckBox('Regular expression')
+        self.regular_expression.setStatusTip('Search with a Python regular expression, matches stay within a paragraph')
+        options.addWidget(self.match_case)
+        options.addWidget(self.whole_words)
+        options.addWidget(self.regular_expression)
+        layout.addLayout(options)
+
+        # Search Buttons
+        buttons = QHBoxLayout()
+        self.find_button = QPushButton('Find All')
+        self.find_button.setStatusTip('List every match in every workspace')
+        self.find_button.clicked.connect(self.find_all)
+        self.replace_button = QPushButton('Replace All')
+        self.replace_button.setStatusTip('Replace every match in every workspace, as one undo step in each')
+        self.replace_button.clicked.connect(self.replace_all)
+        self.stop_button = QPushButton('Stop')
+        self.stop_button.setStatusTip('Stop searching, what was replaced so far stays')
+        self.stop_button.clicked.connect(self.stop_function)
+        self.stop_button.setEnabled(False)
+        buttons.addWidget(self.find_button)
+        buttons.addWidget(self.replace_button)
+        buttons.addWidget(self.stop_button)
+        layout.addLayout(buttons)
+
+        self.summary = QLabel()
+        self.summary.setWordWrap(True)
+        layout.addWidget(self.summary)
+
+        # Matches of every workspace
+        self.results = QTreeWidget()
+        self.results.setHeaderLabels(['Match', 'Line'])
+        self.results.setStatusTip('Double click a match to select it in its workspace')
+        self.results.setUniformRowHeights(True)
+        self.results.itemActivated.connect(self.result_activated)
+        layout.addWidget(self.results)
+
+        self.find_replace.matches_found.connect(self.add_matches)
+        self.find_replace.search_finished.connect(self.search_finished)
+        self.find_replace.replace_finished.connect(self.replace_finished)
+
+    # Starting with the find text selected, or with the text selected in the editor
+    def start(self, text=''):
+        if text:
+            self.find_text.setText(text)
+
+        self.show()
+        self.raise_()
+        self.find_text.setFocus()
+        self.find_text.selectAll()
+
+    def pattern(self):
+        try:
+            return compile_pattern(self.find_text.text(), self.regular_expression.isChecked(), self.match_case.isChecked(), self.whole_words.isChecked())
+        except re.error as e:
+            QMessageBox.warning(self, "Find Error", f"Unable to search due to:\n{e}")
+            return None
+
+    def clear_results(self):
+        self.results.clear()
+        self.groups = {}
+        self.listed = 0
+
+    def find_all(self):
+        pattern = self.pattern()
+
+        if not self.find_text.text() or pattern is None:
+            return
+
+        self.clear_results()
+        self.summary.setText('Searching...')
+        self.stop_button.setEnabled(True)
+        self.find_replace.search(pattern)
+
+    def replace_all(self):
+        pattern = self.pattern()
+
+        if not self.find_text.text() or pattern is None:
+            return
+
+        template = replacement_template(self.replace_text.text(), self.regular_expression.isChecked())
+
+        # A bad group reference fails here instead of in every document
+        try:
+            pattern.sub(template, '')
+        except re.error as e:
+            QMessageBox.warning(self, "Replace Error", f"Unable to replace due to:\n{e}")
+            return
+
+        self.clear_results()
+        self.summary.setText('Replacing...')
+        self.stop_button.setEnabled(True)
+        self.find_replace.search(pattern, template)
+
+    def stop_function(self):
+        self.find_replace.stop()
+        self.stop_button.setEnabled(False)
+        self.summary.setText(f'Stopped, {self.find_replace.found:,} matches so far')
+
+    # Listing matches under their workspace, past the listed limit they are only counted
+    def add_matches(self, editor, matches):
+        if editor not in self.groups:
+            self.groups[editor] = QTreeWidgetItem(self.results, [self.workspace_name(editor), ''])
+            self.groups[editor].setExpanded(True)
+            self.groups[editor].setData(0, Qt.ItemDataRole.UserRole, 0)
+
+        group = self.groups[editor]
+        group.setData(0, Qt.ItemDataRole.UserRole, group.data(0, Qt.ItemDataRole.UserRole) + len(matches))
+        group.setText(0, f'{self.workspace_name(editor)} ({group.data(0, Qt.ItemDataRole.UserRole):,})')
+
+        items = []
+
+        for match in matches[:max(0, listed_results - self.listed)]:
+            item = QTreeWidgetItem([match.preview, str(match.line + 1)])
+            item.setData(0, Qt.ItemDataRole.UserRole, (editor, match))
+            items.append(item)
+
+        group.addChildren(items)
+        self.listed += len(items)
+        self.summary.setText(f'Searching... {self.find_replace.found:,} matches')
+
+    def workspace_name(self, editor):
+        index = self.find_replace.tabs.indexOf(editor)
+        return self.find_replace.tabs.tabText(index) if index != -1 else 'Closed Workspace'
+
+    def search_finished(self, found, documents):
+        self.stop_button.setEnabled(False)
+        listed = f', the first {listed_results:,} listed' if found > listed_results else ''
+        self.summary.setText(f'{found:,} matches in {documents} workspaces{listed}')
+
+    def replace_finished(self, replaced, documents, skipped):
+        self.stop_button.setEnabled(False)
+        text = f'Replaced {replaced:,} matches in {documents} workspaces'
+
+        if skipped:
+            text += f', skipped {len(skipped)} which were loading or kept changing: ' + ', '.join(self.workspace_name(editor) for editor in skipped)
+
+        self.summary.setText(text)
+
+    def result_activated(self, item, column):
+        found = item.data(0, Qt.ItemDataRole.UserRole)
+
+        if not isinstance(found, tuple):
+            return
+
+        editor, match = found
+
+        if not self.find_replace.show_match(editor, match):
+            self.summary.setText('That match has changed since the search, search again to update the list')
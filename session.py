@@ -0,0 +1,147 @@
+# session.py - Remembering the open tabs between runs and bringing them back only as they are selected.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# The tabs open when the window closes are written to a JSON file: the files of the workspaces, the files
+# shown in viewer and PDF tabs, the tab order and where each tab was scrolled to. On the next start every tab
+# comes back as a placeholder, which is no more than a label, and is opened the first time it is selected.
+# Only the tab in view is opened straight away, so starting up takes as long with thirty tabs as with one.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+from PyQt6 import sip
+
+
+import json
+import os
+
+from document_saver import write_atomically
+
+# Version of the session file
+session_version = 1
+
+# Kinds of tabs a session holds
+WORKSPACE = 'workspace'
+VIEWER = 'viewer'
+PDF = 'pdf'
+
+
+# File the session is kept in
+def default_path():
+    return os.path.join(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericDataLocation), 'PowerText', 'session.json')
+
+
+# What is remembered of a tab
+class SessionTab:
+    __slots__ = ('kind', 'path', 'title', 'cursor_position', 'cursor_anchor', 'horizontal_scroll', 'vertical_scroll', 'page', 'zoom')
+
+    def __init__(self, kind, path, title, cursor_position=0, cursor_anchor=0, horizontal_scroll=0, vertical_scroll=0, page=0, zoom=1.0):
+        self.kind = kind
+        self.path = path
+        self.title = title
+        self.cursor_position = cursor_position
+        self.cursor_anchor = cursor_anchor
+        self.horizontal_scroll = horizontal_scroll
+        self.vertical_scroll = vertical_scroll
+        self.page = page
+        self.zoom = zoom
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# A workspace showing a file, hibernated ones are remembered as they were when they went to sleep
+def workspace_tab(editor, path, title, hibernated=None):
+    if hibernated is not None:
+        return SessionTab(WORKSPACE, path, title, hibernated.cursor_position, hibernated.cursor_anchor, hibernated.horizontal_scroll, hibernated.vertical_scroll)
+
+    cursor = editor.textCursor()
+    return SessionTab(WORKSPACE, path, title, cursor.position(), cursor.anchor(), editor.horizontalScrollBar().value(), editor.verticalScrollBar().value())
+
+
+def viewer_tab(viewer, title):
+    return SessionTab(VIEWER, viewer.path, title, vertical_scroll=viewer.line_view.verticalScrollBar().value())
+
+
+def pdf_tab(viewer, title):
+    return SessionTab(PDF, viewer.path, title, page=max(0, viewer.page_view.current_page), zoom=viewer.page_view.zoom)
+
+
+# Writing the tabs and which of them was selected
+def write_session(path, tabs, current):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_atomically(path, json.dumps({'session': session_version, 'current': current, 'tabs': [tab.to_dict() for tab in tabs]}, indent=1))
+
+
+# The tabs of the last session and which of them was selected, none when there is no session to restore
+def read_session(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            session = json.load(f)
+
+        if session.get('session') != session_version:
+            return [], 0
+
+        tabs = [SessionTab(**{name: value for name, value in tab.items() if name in SessionTab.__slots__}) for tab in session['tabs']]
+        return tabs, min(max(0, int(session.get('current', 0))), max(0, len(tabs) - 1))
+    except (OSError, ValueError, TypeError, KeyError, AttributeError):
+        return [], 0
+
+
+# Putting a workspace's cursor and scroll position back once its file has loaded
+def restore_workspace(editor, tab):
+    document = editor.document()
+
+    cursor = QTextCursor(document)
+    cursor.setPosition(min(tab.cursor_anchor, document.characterCount() - 1))
+    cursor.setPosition(min(tab.cursor_position, document.characterCount() - 1), QTextCursor.MoveMode.KeepAnchor)
+    editor.setTextCursor(cursor)
+
+    # Scrolling has to wait until the document has been laid out
+    QTimer.singleShot(0, lambda: sip.isdeleted(editor) or restore_scroll(editor, tab))
+
+
+def restore_scroll(editor, tab):
+    editor.horizontalScrollBar().setValue(tab.horizontal_scroll)
+    editor.verticalScrollBar().setValue(tab.vertical_scroll)
+
+
+# Scrolling a viewer back to its line, again once the lines below it have been indexed
+def restore_viewer(viewer, tab):
+    viewer.line_view.go_to_line(tab.vertical_scroll)
+    viewer.indexer.index_finished.connect(lambda: viewer.line_view.go_to_line(tab.vertical_scroll))
+
+
+# Putting a PDF back at its zoom and page, the page once the view has its size
+def restore_pdf(viewer, tab):
+    viewer.page_view.set_zoom(tab.zoom)
+    QTimer.singleShot(0, lambda: sip.isdeleted(viewer) or viewer.page_view.go_to_page(tab.page))
+
+
+# Tab standing in for one of the last session until it is selected
+class SessionPlaceholder(QLabel):
+    def __init__(self, tab, parent=None):
+        super(SessionPlaceholder, self).__init__(parent)
+
+        self.tab = tab
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.setText('Opening ' + os.path.basename(tab.path) + '...')
+        self.setStatusTip(tab.path)
+
+    # A file which is gone keeps its tab, so it can be closed or tried again once the file is back
+    def file_missing(self):
+        self.setText(self.tab.path + ' could not be found.')
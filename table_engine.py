@@ -0,0 +1,323 @@
+# table_engine.py - Building large tables quickly and keeping them quick to type in.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Qt lays out a whole table again whenever one of its cells changes, and works out column widths from every
+# cell unless they are given. Large tables are therefore built as a stack of segments, tables of a few hundred
+# cells each with the same fixed column widths, so that they read as one table and a keystroke only lays out
+# the segment it lands in.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+
+
+from collections import deque
+import csv
+import time
+
+# Tables with more cells than this are built by the TableBuilder
+large_table_cells = 2500
+
+# Cells in every segment of a large table
+segment_cells = 500
+
+# Narrowest a column of a large table gets
+minimum_column_width = 48
+
+# Time and cells the builder may spend per turn of the event loop, laying out what it built follows every turn
+tick_seconds = 0.03
+tick_cells = 1000
+
+# Rows the CSV reader may have waiting for the builder
+rows_in_flight = 2000
+
+
+# Rows in each segment of a table with this many columns
+def segment_rows(columns):
+    return max(1, segment_cells // columns)
+
+
+# Format shared by every segment, with the column widths fixed up front
+def segment_format(columns, width):
+    column_width = max(minimum_column_width, width // max(1, columns))
+
+    table_format = QTextTableFormat()
+    table_format.setColumnWidthConstraints([QTextLength(QTextLength.Type.FixedLength, column_width)] * columns)
+    table_format.setCellPadding(2)
+    table_format.setCellSpacing(0)
+    table_format.setBorder(1)
+    table_format.setMargin(0)
+
+    # Left unset, collapsing borders is assumed and makes every keystroke several times slower
+    table_format.setBorderCollapse(False)
+    return table_format
+
+
+# Fills a large table in segments on the GUI thread, a few at every turn of the event loop,
+# with every turn joined into a single undo step
+class TableBuilder(QObject):
+    progress_changed = pyqtSignal(int)
+    build_finished = pyqtSignal()
+
+    def __init__(self, editor, columns, parent=None):
+        super(TableBuilder, self).__init__(parent)
+
+        self.editor = editor
+        self.columns = columns
+        self.rows_per_segment = segment_rows(columns)
+        self.table_format = segment_format(columns, editor.viewport().width() - 2 * int(editor.document().documentMargin()))
+
+        self.cursor = None
+        self.rows = deque()
+        self.empty_rows = 0
+        self.input_done = False
+        self.rows_built = 0
+        self.started = False
+        self.done = False
+        self.tables = []
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.build_some)
+
+    # Queuing rows of cell values, a row may be shorter or longer than the table is wide
+    def add_rows(self, rows):
+        self.rows.extend(rows)
+        self.schedule()
+
+    # Queuing empty rows
+    def add_empty_rows(self, count):
+        self.empty_rows += count
+        self.schedule()
+
+    # No rows follow the queued ones
+    def finish_input(self):
+        self.input_done = True
+        self.schedule()
+
+    # Starting at the position of a cursor
+    def start(self, cursor):
+        self.cursor = QTextCursor(cursor)
+        self.editor.setReadOnly(True)
+        self.schedule()
+
+    def schedule(self):
+        if self.cursor is not None and not self.done and not self.timer.isActive():
+            self.timer.start(0)
+
+    def queued_rows(self):
+        return len(self.rows) + self.empty_rows
+
+    # Building segments until the time for this turn is up
+    def build_some(self):
+        if self.done:
+            return
+
+        deadline = time.perf_counter() + tick_seconds
+        cells = 0
+
+        if self.started:
+            self.cursor.joinPreviousEditBlock()
+        else:
+            self.cursor.beginEditBlock()
+            self.started = True
+
+        # A partial segment is only built once no more rows are coming
+        while time.perf_counter() < deadline and cells < tick_cells and (self.queued_rows() >= self.rows_per_segment or (self.input_done and self.queued_rows())):
+            count = min(self.rows_per_segment, self.queued_rows())
+            self.build_segment(count)
+            cells += count * self.columns
+
+        self.cursor.endEditBlock()
+        self.progress_changed.emit(self.rows_built)
+
+        if self.input_done and not self.queued_rows():
+            self.finish()
+        elif self.queued_rows() >= self.rows_per_segment or self.input_done:
+            self.timer.start(0)
+
+    def build_segment(self, count):
+        # Each segment goes in the block Qt keeps after the previous one
+        if self.tables:
+            self.cursor.setPosition(self.tables[-1].lastPosition() + 1)
+
+        table = self.cursor.insertTable(count, self.columns, self.table_format)
+        self.tables.append(table)
+
+        for row in range(count):
+            if self.rows:
+                values = self.rows.popleft()
+
+                # Values past the last column stay in the last cell
+                if len(values) > self.columns:
+                    values = values[:self.columns - 1] + ['\t'.join(values[self.columns - 1:])]
+
+                for column, value in enumerate(values):
+                    if value:
+                        table.cellAt(row, column).firstCursorPosition().insertText(value)
+            else:
+                self.empty_rows -= 1
+
+        self.rows_built += count
+
+    # Handing the editor back to the user
+    def finish(self):
+        if self.done:
+            return
+
+        self.done = True
+        self.editor.setReadOnly(False)
+
+        if self.tables:
+            self.editor.setTextCursor(self.tables[0].cellAt(0, 0).firstCursorPosition())
+        self.build_finished.emit()
+
+    # Stopping where the builder got to, what is built so far stays
+    def cancel(self):
+        self.timer.stop()
+        self.finish()
+
+
+# Worker thread which reads a CSV or TSV file row by row
+class TableReader(QThread):
+    rows_read = pyqtSignal(list)
+    read_failed = pyqtSignal(str)
+    read_finished = pyqtSignal()
+
+    def __init__(self, path, encoding='utf-8', parent=None):
+        super(TableReader, self).__init__(parent)
+
+        self.path = path
+        self.encoding = encoding
+        self.slots = QSemaphore(rows_in_flight)
+
+    # Giving slots back once the builder took rows
+    def rows_consumed(self, count):
+        self.slots.release(count)
+
+    # Tab separated files by their extension, anything else by sniffing the start
+    def dialect(self, f):
+        if self.path.lower().endswith(('.tsv', '.tab')):
+            return csv.excel_tab
+
+        sample = f.read(64 * 1024)
+        f.seek(0)
+
+        try:
+            return csv.Sniffer().sniff(sample, delimiters=',;\t|')
+        except csv.Error:
+            return csv.excel
+
+    def run(self):
+        try:
+            with open(self.path, 'r', encoding=self.encoding, newline='') as f:
+                batch = []
+
+                for values in csv.reader(f, self.dialect(f)):
+                    batch.append(values)
+
+                    if len(batch) == 200:
+                        if not self.send(batch):
+                            return
+                        batch = []
+
+                if batch and not self.send(batch):
+                    return
+        except Exception as e:
+            self.read_failed.emit(str(e))
+            return
+
+        self.read_finished.emit()
+
+    # Sending rows once the builder has room for them
+    def send(self, batch):
+        while not self.slots.tryAcquire(len(batch), 100):
+            if self.isInterruptionRequested():
+                return False
+
+        self.rows_read.emit(batch)
+        return True
+
+
+# Imports a CSV or TSV file into a table at the position of a cursor, reading in the background
+class TableImport(QObject):
+    progress_changed = pyqtSignal(int)
+    import_finished = pyqtSignal(int)
+    import_failed = pyqtSignal(str)
+
+    def __init__(self, editor, path, parent=None):
+        super(TableImport, self).__init__(parent)
+
+        self.editor = editor
+        self.cursor = None
+        self.builder = None
+        self.rows_taken = 0
+        self.error = None
+
+        self.reader = TableReader(path, parent=self)
+        self.reader.rows_read.connect(self.rows_read)
+        self.reader.read_failed.connect(self.read_failed)
+        self.reader.read_finished.connect(self.read_finished)
+
+    def start(self, cursor):
+        self.cursor = QTextCursor(cursor)
+        self.reader.start()
+
+    # The width of the table comes from the first rows
+    def rows_read(self, rows):
+        if self.builder is None:
+            self.builder = TableBuilder(self.editor, max(len(values) for values in rows), self)
+            self.builder.progress_changed.connect(self.rows_built)
+            self.builder.build_finished.connect(self.build_finished)
+            self.builder.start(self.cursor)
+
+        self.builder.add_rows(rows)
+
+    # Letting the reader go on as the builder takes rows
+    def rows_built(self, rows_built):
+        self.reader.rows_consumed(rows_built - self.rows_taken)
+        self.rows_taken = rows_built
+        self.progress_changed.emit(rows_built)
+
+    def read_failed(self, message):
+        self.error = message
+        self.read_finished()
+
+    def read_finished(self):
+        if self.builder is None:
+            if self.error is not None:
+                self.import_failed.emit(self.error)
+            else:
+                self.import_finished.emit(0)
+        else:
+            self.builder.finish_input()
+
+    def build_finished(self):
+        if self.error is not None:
+            self.import_failed.emit(self.error)
+        else:
+            self.import_finished.emit(self.rows_taken)
+
+    # Stopping the import, the rows already in the table stay
+    def cancel(self):
+        self.reader.requestInterruption()
+        self.reader.wait()
+
+        if self.builder is not None:
+            self.builder.cancel()
+        else:
+            self.import_finished.emit(0)
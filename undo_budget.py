@@ -0,0 +1,242 @@
+# undo_budget.py - Keeping the undo history of the workspaces within a memory budget.
+#
+# Copyright 2025 Toshan Chowdhury
+#
+# Licensed under the Apache License, Version 2.0;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# A document's undo history is a stack of commands, one or two for every block an edit touched, and the text of
+# every removal, which stays in the document's buffer for as long as it can be undone. Neither is reported by Qt,
+# so the history's memory is estimated from the count of commands and from how much text was removed.
+#
+# Qt can only clear the whole undo stack, not its oldest steps. A history over its budget is therefore undone
+# down to the oldest step which is kept, the undo stack below it cleared, and the kept steps redone, which
+# leaves them on the undo stack by themselves. Steps are only ever kept or dropped whole.
+
+# Libraries required to be imported
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+from PyQt6 import sip
+
+
+import time
+
+from hibernation import bytes_per_character
+
+# Memory taken by a command of the undo stack, measured with blocks of 100 characters
+bytes_per_command = 32
+
+# Estimated memory the undo history of a workspace may take
+default_tab_budget = 64 * 1024 * 1024
+
+# Estimated memory the undo histories of all the workspaces may take
+default_total_budget = 256 * 1024 * 1024
+
+# Share of its budget a history over it is brought down to, so the next edit does not take it over again
+trimmed_share = 0.75
+
+# How long after an edit which took a history over its budget it is trimmed, in milliseconds, so a burst of
+# edits is trimmed once
+trim_delay = 500
+
+# Largest document whose history is trimmed. Qt takes time in proportion to the size of the document to undo a
+# step, so undoing and redoing the history of a bigger one stalls for seconds, in view or not
+trimmed_characters = 1000000
+
+
+# What is followed of the history of a document
+class UndoHistory:
+    __slots__ = ('document', 'characters', 'removed', 'boundaries', 'last_used')
+
+    def __init__(self, document):
+        self.document = document
+        self.characters = document.characterCount()
+        self.removed = 0
+
+        # Undo counts at the end of every step, the oldest first
+        self.boundaries = []
+        self.last_used = time.monotonic()
+
+
+# Estimated memory of a document's undo history
+def history_memory(document, history):
+    commands = document.availableUndoSteps() + document.availableRedoSteps()
+    return commands * bytes_per_command + history.removed * bytes_per_character
+
+
+# Trims the undo history of the editors of a tab widget once it takes more than its budget, or once the
+# histories of all of them take more than theirs
+class UndoBudget(QObject):
+    history_trimmed = pyqtSignal(object, int)
+
+    def __init__(self, tabs, tab_budget=default_tab_budget, total_budget=default_total_budget, spill_inactive=False, parent=None):
+        super(UndoBudget, self).__init__(parent)
+
+        self.tabs = tabs
+        self.tab_budget = tab_budget
+        self.total_budget = total_budget
+
+        # Whether workspaces out of view are hibernated instead of trimmed, their document goes to disk and
+        # their history is freed with it
+        self.spill_inactive = spill_inactive
+
+        # Editors whose history may not be trimmed right now, how a change runs without stalling the layout,
+        # and how a workspace is hibernated
+        self.busy = lambda editor: False
+        self.edit = lambda editor, change: change()
+        self.hibernate = lambda editor: False
+
+        self.histories = {}
+        self.trimming = False
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(trim_delay)
+        self.timer.timeout.connect(self.check)
+
+    # Following the history of an editor's documents
+    def track(self, editor):
+        self.histories[editor] = UndoHistory(editor.document())
+        editor.textChanged.connect(lambda: self.contents_changed(editor))
+
+    def forget(self, editor):
+        self.histories.pop(editor, None)
+
+    # Noting what an edit, an undo or a redo left on the history
+    def contents_changed(self, editor):
+        history = self.histories.get(editor)
+
+        if history is None or self.trimming:
+            return
+
+        document = editor.document()
+
+        # Another document handed to the editor, such as a loaded file or a hibernated workspace, has a history of its own
+        if document is not history.document:
+            self.histories[editor] = UndoHistory(document)
+            return
+
+        characters = document.characterCount()
+        history.removed += max(0, history.characters - characters)
+        history.characters = characters
+        history.last_used = time.monotonic()
+
+        # Undone steps are no longer on the undo stack, and nothing is left of a history which was cleared
+        steps = document.availableUndoSteps()
+
+        while history.boundaries and history.boundaries[-1] > steps:
+            history.boundaries.pop()
+
+        if steps == 0 and not document.isRedoAvailable():
+            history.removed = 0
+        elif not history.boundaries or history.boundaries[-1] < steps:
+            history.boundaries.append(steps)
+
+        if not self.timer.isActive() and (self.memory(editor) > self.tab_budget or self.total_memory() > self.total_budget):
+            self.timer.start()
+
+    # Estimated memory of an editor's history, a hibernated workspace has none
+    def memory(self, editor):
+        history = self.histories.get(editor)
+
+        if history is None or sip.isdeleted(editor) or editor.document() is not history.document:
+            return 0
+        return history_memory(history.document, history)
+
+    def total_memory(self):
+        return sum(self.memory(editor) for editor in self.histories)
+
+    # Trimming every history over the budget of its workspace, then the least recently used until all of them
+    # are within the total budget, the one in view last
+    def check(self):
+        for editor in list(self.histories):
+            if self.memory(editor) > self.tab_budget:
+                self.trim(editor, self.tab_budget * trimmed_share)
+
+        total = self.total_memory()
+
+        if total <= self.total_budget:
+            return
+
+        current = self.tabs.currentWidget()
+        target = self.total_budget * trimmed_share
+
+        for editor in sorted(self.histories, key=lambda editor: (editor is current, self.histories[editor].last_used)):
+            if total <= target:
+                break
+
+            memory = self.memory(editor)
+
+            if editor is not current and self.spill_inactive and memory and self.hibernate(editor):
+                total -= memory
+            else:
+                total -= self.trim(editor, max(0, memory - (total - target)))
+
+    # Dropping the oldest steps of an editor's history until it is within a target, handing back the memory freed
+    def trim(self, editor, target):
+        history = self.histories[editor]
+        document = editor.document()
+        memory = self.memory(editor)
+        steps = document.availableUndoSteps()
+
+        if memory <= target or steps == 0 or document is not history.document or editor.isReadOnly() or self.busy(editor):
+            return 0
+
+        if document.characterCount() > trimmed_characters:
+            return 0
+
+        # The newest steps which fit are kept, the removed text is counted as shared out among the commands
+        keep = int(steps * target / memory)
+        boundary = next((boundary for boundary in history.boundaries if boundary >= steps - keep), steps)
+
+        modified = document.isModified()
+        cursor = editor.textCursor()
+        anchor, position = cursor.anchor(), cursor.position()
+        horizontal_scroll, vertical_scroll = editor.horizontalScrollBar().value(), editor.verticalScrollBar().value()
+
+        def change():
+            undone = 0
+
+            while document.availableUndoSteps() > boundary and document.isUndoAvailable():
+                document.undo()
+                undone += 1
+
+            document.clearUndoRedoStacks(QTextDocument.Stacks.UndoStack)
+
+            for _ in range(undone):
+                document.redo()
+
+            cursor = QTextCursor(document)
+            cursor.setPosition(min(anchor, document.characterCount() - 1))
+            cursor.setPosition(min(position, document.characterCount() - 1), QTextCursor.MoveMode.KeepAnchor)
+            editor.setTextCursor(cursor)
+            editor.horizontalScrollBar().setValue(horizontal_scroll)
+            editor.verticalScrollBar().setValue(vertical_scroll)
+
+        self.trimming = True
+
+        try:
+            self.edit(editor, change)
+        finally:
+            self.trimming = False
+
+        # Redoing the kept steps leaves the document as it was, the saved state may have been among the dropped ones
+        document.setModified(modified)
+
+        kept = document.availableUndoSteps()
+        history.boundaries = [step - boundary for step in history.boundaries if step > boundary]
+        history.removed = history.removed * kept // steps
+        history.characters = document.characterCount()
+
+        self.history_trimmed.emit(editor, steps - kept)
+        return memory - self.memory(editor)